@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+Benchmark reproducible untuk simple_server (headless, tanpa kamera).
+
+Kamera diganti FakeVideoCapture yang memutar ulang frame dari file video /
+gambar (atau frame sintetis), lalu app Flask di-drive oleh N client paralel.
+Hasil: latensi p50/p95/p99, frame per detik, CPU, memori, dan rata-rata
+durasi per stage dari histogram /metrics. Untuk server in-process, stage
+decode/detect/encode juga diukur terpisah di satu thread sebelum kamera
+berjalan: CPU per panggilan, puncak alokasi (tracemalloc) dan delta RSS.
+
+Contoh (jalankan dari assets/python_server):
+    python benchmark.py --clients 4 --requests 200
+    python benchmark.py --video sample.mp4 --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --max-regression 0.15
+"""
+
+import argparse
+import base64
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCENARIOS = (
+    'detector', 'detect_hands_binary', 'detect_hands_base64', 'detect_hands_batch',
+    'realtime', 'frame', 'video_feed', 'classify',
+)
+BATCH_SIZE = 8
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FakeVideoCapture:
+    """Pengganti cv2.VideoCapture yang memutar ulang frame dari memori pada FPS tetap"""
+
+    def __init__(self, frames, fps=30.0):
+        self.frames = frames
+        self.fps = fps
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.index = 0
+        self.opened = True
+        self._next_at = time.perf_counter()
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.frames[0].shape[1]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.frames[0].shape[0]
+        return 0.0
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        if self.interval:
+            # Tiru waktu frame sensor: blok sampai jadwal frame berikutnya
+            delay = self._next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_at = max(self._next_at + self.interval, time.perf_counter())
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        # cv2.VideoCapture.read() mengembalikan array baru setiap kali
+        return True, frame.copy()
+
+    def release(self):
+        self.opened = False
+
+
+def synthetic_frames(count=60, size=(320, 240)):
+    """Frame deterministik: background noise + kotak terang yang bergerak"""
+    rng = np.random.default_rng(0)
+    width, height = size
+    frames = []
+    for i in range(count):
+        frame = rng.integers(0, 90, size=(height, width, 3), dtype=np.uint8)
+        x = 40 + (i * 5) % (width - 120)
+        cv2.rectangle(frame, (x, 60), (x + 60, 60 + 90), (230, 230, 230), -1)
+        frames.append(frame)
+    return frames
+
+
+def load_frames(path, size=(320, 240), limit=300):
+    """Frame dari file video atau gambar, di-resize ke ukuran kamera server"""
+    if path is None:
+        return synthetic_frames(size=size)
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f'Gagal membaca gambar: {path}')
+        return [cv2.resize(image, size)]
+
+    capture = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < limit:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(cv2.resize(frame, size))
+    finally:
+        capture.release()
+    if not frames:
+        raise ValueError(f'Tidak ada frame yang bisa dibaca dari {path}')
+    return frames
+
+
+class InProcessClient:
+    """Client Flask test_client (tanpa network); satu instance per thread"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.data
+
+    def post(self, path, data, content_type):
+        response = self.client.post(path, data=data, content_type=content_type)
+        return response.status_code, response.data
+
+    def stream(self, path):
+        response = self.client.get(path, buffered=False)
+        for chunk in response.response:
+            yield chunk
+
+
+class HttpClient:
+    """Client HTTP ke server yang sudah berjalan (--url)"""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _open(self, request):
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def get(self, path):
+        return self._open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, data, content_type):
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers={'Content-Type': content_type}
+        )
+        return self._open(request)
+
+    def stream(self, path):
+        response = urllib.request.urlopen(self.base_url + path, timeout=self.timeout)
+        boundary = b'--frame\r\n'
+        buffer = b''
+        try:
+            while True:
+                data = response.read1(65536)
+                if not data:
+                    return
+                buffer += data
+                while True:
+                    start = buffer.find(boundary)
+                    end = buffer.find(boundary, start + len(boundary))
+                    if start < 0 or end < 0:
+                        break
+                    yield buffer[start:end]
+                    buffer = buffer[end:]
+        finally:
+            response.close()
+
+
+def stage_snapshot(server):
+    """(sum, count) per stage dari histogram sibi_stage_seconds"""
+    if server is None:
+        return {}
+    return {
+        stage: (child.sum, child.count)
+        for stage, child in server.STAGES.items()
+    }
+
+
+def stage_means(before, after):
+    """Rata-rata ms per stage yang berjalan selama skenario"""
+    means = {}
+    for stage, (total, count) in after.items():
+        prev_total, prev_count = before.get(stage, (0.0, 0))
+        if count > prev_count:
+            means[stage] = round((total - prev_total) / (count - prev_count) * 1000.0, 4)
+    return means
+
+
+def max_rss_kb():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: byte
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def measure_stage_memory(frames, server, runs):
+    """CPU dan memori per stage (decode/detect/encode), satu thread, tanpa client lain.
+
+    peak_alloc_kb: rata-rata puncak alokasi Python/NumPy per panggilan (tracemalloc);
+    rss_delta_kb: kenaikan RSS setelah semua panggilan, termasuk buffer internal
+    OpenCV yang tidak terlihat oleh tracemalloc.
+    """
+    jpegs = [cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes() for frame in frames]
+    encoded = [base64.b64encode(data) for data in jpegs]
+    results = [server.detector.detect_hands(frame) for frame in frames]
+    broadcaster = server.JpegBroadcaster(None)
+    n = len(frames)
+    stages = {
+        'base64_decode': lambda i: base64.b64decode(encoded[i % n]),
+        'imdecode': lambda i: server.decode_image_bytes(jpegs[i % n]),
+        'detect': lambda i: server.detector.detect_hands(frames[i % n]),
+        'jpeg_encode': lambda i: broadcaster.encode(frames[i % n]),
+        'json_serialize': lambda i: json.dumps(results[i % n]),
+    }
+
+    report = {}
+    for name, fn in stages.items():
+        fn(0)  # buffer scratch/lazy init tidak ikut terhitung
+        gc.collect()
+        rss_before = server.resident_bytes()
+        tracemalloc.start()
+        peaks = []
+        cpu_before = time.thread_time()
+        for i in range(runs):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            fn(i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        cpu = time.thread_time() - cpu_before
+        tracemalloc.stop()
+        report[name] = {
+            'cpu_ms': round(cpu / runs * 1000.0, 4),
+            'peak_alloc_kb': round(sum(peaks) / runs / 1024.0, 1),
+            'rss_delta_kb': round((server.resident_bytes() - rss_before) / 1024.0, 1),
+        }
+    return report
+
+
+def run_clients(make_client, task, clients, requests_per_client):
+    """Jalankan task(client, i) -> (ok, items) dari N thread; return latensi dan error"""
+    latencies = []
+    errors = [0]
+    items = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def worker():
+        client = make_client()
+        local = []
+        local_errors = 0
+        local_items = 0
+        barrier.wait()
+        for i in range(requests_per_client):
+            started = time.perf_counter()
+            try:
+                ok, count = task(client, i)
+            except Exception:
+                ok, count = False, 0
+            local.append(time.perf_counter() - started)
+            if ok:
+                local_items += count
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+            items[0] += local_items
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], items[0], time.perf_counter() - started
+
+
+def measure(name, make_client, task, clients, requests_per_client, server, trace_memory):
+    """Jalankan satu skenario dan kumpulkan statistiknya"""
+    stages_before = stage_snapshot(server)
+    cpu_before = time.process_time()
+    if trace_memory:
+        tracemalloc.start()
+
+    latencies, errors, items, wall = run_clients(make_client, task, clients, requests_per_client)
+
+    peak_kb = None
+    if trace_memory:
+        peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024.0, 1)
+        tracemalloc.stop()
+    cpu = time.process_time() - cpu_before
+    values = np.asarray(latencies) * 1000.0
+    total = len(latencies)
+    return {
+        'scenario': name,
+        'clients': clients,
+        'requests': total,
+        'errors': errors,
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'mean_ms': round(float(values.mean()), 3),
+        'fps': round(items / wall, 2) if wall > 0 else 0.0,
+        'cpu_percent': round(cpu / wall * 100.0, 1) if wall > 0 else 0.0,
+        'cpu_ms_per_request': round(cpu / total * 1000.0, 3) if total else 0.0,
+        'peak_alloc_kb': peak_kb,
+        'max_rss_kb': max_rss_kb(),
+        'stages_ms': stage_means(stages_before, stage_snapshot(server)),
+    }
+
+
+def build_tasks(frames, server):
+    """Task per skenario; setiap task mengembalikan (ok, jumlah frame yang diproses)"""
+    jpegs = [cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes() for frame in frames]
+    encoded = [base64.b64encode(data).decode('ascii') for data in jpegs]
+    n = len(frames)
+
+    def detector_task(_client, i):
+        server.detector.detect_hands(frames[i % n])
+        return True, 1
+
+    def binary_task(client, i):
+        status, _ = client.post('/detect_hands', jpegs[i % n], 'image/jpeg')
+        return status == 200, 1
+
+    def base64_task(client, i):
+        body = json.dumps({'image': encoded[i % n]}).encode()
+        status, _ = client.post('/detect_hands', body, 'application/json')
+        return status == 200, 1
+
+    def batch_task(client, i):
+        images = [encoded[(i * BATCH_SIZE + k) % n] for k in range(BATCH_SIZE)]
+        status, _ = client.post('/detect_hands_batch', json.dumps({'images': images}).encode(), 'application/json')
+        return status == 200, BATCH_SIZE
+
+    def realtime_task(client, _i):
+        status, _ = client.get('/detect_hands_realtime')
+        return status == 200, 1
+
+    def frame_task(client, _i):
+        status, body = client.get('/frame')
+        return status == 200 and body[:2] == b'\xff\xd8', 1
+
+    features = None
+    if server is not None and server.classifier is not None:
+        features = np.random.default_rng(0).normal(
+            size=(BATCH_SIZE, server.classifier.feature_length)
+        ).astype(np.float32).tolist()
+
+    def classify_task(client, i):
+        body = json.dumps({'features': features[i % BATCH_SIZE]}).encode()
+        status, _ = client.post('/classify', body, 'application/json')
+        return status == 200, 1
+
+    return {
+        'detector': detector_task,
+        'detect_hands_binary': binary_task,
+        'detect_hands_base64': base64_task,
+        'detect_hands_batch': batch_task,
+        'realtime': realtime_task,
+        'frame': frame_task,
+        'classify': classify_task if features is not None else None,
+    }
+
+
+def measure_video_feed(make_client, clients, frames_per_client, server, trace_memory):
+    """Latensi = jarak antar frame MJPEG per subscriber, fps = total frame / waktu"""
+    streams = {}
+
+    def task(client, i):
+        key = threading.get_ident()
+        if i == 0:
+            streams[key] = client.stream('/video_feed')
+        chunk = next(streams[key], None)
+        return chunk is not None, 1
+
+    try:
+        return measure('video_feed', make_client, task, clients, frames_per_client, server, trace_memory)
+    finally:
+        for stream in streams.values():
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+
+
+def compare(baseline, current, max_regression):
+    """Bandingkan dengan baseline; return daftar regresi (p95 naik / fps turun)"""
+    previous = {row['scenario']: row for row in baseline.get('results', [])}
+    regressions = []
+    print('')
+    print(f"{'scenario':<22}{'p95 base':>10}{'p95 now':>10}{'Δp95':>8}{'fps base':>10}{'fps now':>10}{'Δfps':>8}")
+    for row in current['results']:
+        base = previous.get(row['scenario'])
+        if base is None:
+            continue
+        p95_delta = (row['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0.0
+        fps_delta = (row['fps'] - base['fps']) / base['fps'] if base['fps'] else 0.0
+        flag = ''
+        if p95_delta > max_regression or fps_delta < -max_regression:
+            regressions.append(row['scenario'])
+            flag = '  ⚠️ REGRESI'
+        print(f"{row['scenario']:<22}{base['p95_ms']:>10.2f}{row['p95_ms']:>10.2f}{p95_delta:>+8.0%}"
+              f"{base['fps']:>10.1f}{row['fps']:>10.1f}{fps_delta:>+8.0%}{flag}")
+    return regressions
+
+
+def print_results(results):
+    print('')
+    print(f"{'scenario':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'fps':>9}{'cpu%':>7}{'err':>5}  stages (ms)")
+    for row in results:
+        stages = ', '.join(f'{k}={v}' for k, v in row['stages_ms'].items())
+        print(f"{row['scenario']:<22}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+              f"{row['fps']:>9.1f}{row['cpu_percent']:>7.0f}{row['errors']:>5}  {stages}")
+
+
+def print_stage_memory(stage_memory):
+    print('')
+    print(f"{'stage':<22}{'cpu ms':>9}{'peak KiB':>10}{'ΔRSS KiB':>10}")
+    for name, row in stage_memory.items():
+        print(f"{name:<22}{row['cpu_ms']:>9.3f}{row['peak_alloc_kb']:>10.1f}{row['rss_delta_kb']:>10.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark endpoint dan stage detector simple_server.')
+    parser.add_argument('--video', default=None, help='File video/gambar untuk FakeVideoCapture (default: frame sintetis).')
+    parser.add_argument('--camera-fps', type=float, default=30.0, help='FPS replay kamera palsu.')
+    parser.add_argument('--clients', type=int, default=4, help='Jumlah client paralel.')
+    parser.add_argument('--requests', type=int, default=100, help='Request per client per skenario.')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Daftar skenario dipisah koma.')
+    parser.add_argument('--url', default=None, help='Benchmark server yang sudah berjalan alih-alih in-process.')
+    parser.add_argument('--result-cache', action='store_true',
+                        help='Biarkan cache hasil /detect_hands aktif (frame replay jadi cache hit).')
+    parser.add_argument('--trace-memory', action='store_true', help='Ukur peak alokasi Python per skenario (lebih lambat).')
+    parser.add_argument('--stage-runs', type=int, default=50,
+                        help='Panggilan per stage untuk CPU/memori per stage (0 = lewati).')
+    parser.add_argument('--output', default=None, help='Simpan hasil sebagai JSON.')
+    parser.add_argument('--save-baseline', default=None, help='Simpan hasil sebagai baseline JSON.')
+    parser.add_argument('--baseline', default=None, help='Baseline JSON untuk dibandingkan.')
+    parser.add_argument('--max-regression', type=float, default=0.10,
+                        help='Toleransi regresi relatif p95/fps sebelum exit code 1.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Skenario tidak dikenal: {', '.join(sorted(unknown))}")
+    frames = load_frames(args.video)
+
+    server = None
+    stage_memory = None
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+        scenarios = [name for name in scenarios if name != 'detector']
+    else:
+        # Log per-request dimatikan supaya tidak ikut terukur
+        os.environ.setdefault('SIBI_LOG_LEVEL', 'WARNING')
+        # Frame yang diputar ulang akan selalu kena cache hasil; ukur jalur penuh kecuali diminta
+        if not args.result_cache:
+            os.environ['SIBI_RESULT_CACHE_SIZE'] = '0'
+        import simple_server as server
+        # Warmup sinkron: yang diukur adalah server yang sudah siap (/ready)
+        app = server.create_app(background=False)
+        # Sebelum kamera jalan: thread capture tidak ikut teralokasi di tracemalloc
+        if args.stage_runs > 0:
+            stage_memory = measure_stage_memory(frames, server, args.stage_runs)
+        camera = server.cameras.get()
+        camera.capture_factory = lambda _source: FakeVideoCapture(frames, args.camera_fps)
+        camera.start()
+        make_client = lambda: InProcessClient(app)
+        # Tunggu frame pertama dari thread capture
+        camera.wait_for_frame(0, timeout=2.0)
+
+    tasks = build_tasks(frames, server)
+    results = []
+    try:
+        for name in scenarios:
+            if name == 'video_feed':
+                row = measure_video_feed(make_client, args.clients, args.requests, server, args.trace_memory)
+            else:
+                task = tasks.get(name)
+                if task is None:
+                    print(f"⏭️ Lewati {name} (tidak tersedia)")
+                    continue
+                row = measure(name, make_client, task, args.clients, args.requests, server, args.trace_memory)
+            results.append(row)
+            print(f"✅ {name}: p95={row['p95_ms']} ms fps={row['fps']}")
+    finally:
+        if server is not None:
+            server.cameras.stop()
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'clients': args.clients,
+            'requests': args.requests,
+            'camera_fps': args.camera_fps,
+            'video': args.video,
+            'frames': len(frames),
+            'url': args.url,
+            'result_cache': args.result_cache,
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+        'stage_memory': stage_memory,
+    }
+    print_results(results)
+    if stage_memory:
+        print_stage_memory(stage_memory)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Hasil disimpan ke {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.max_regression)
+        if regressions:
+            print(f"❌ Regresi melebihi {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print('✅ Tidak ada regresi terhadap baseline')
+
+
+if __name__ == '__main__':
+    main()
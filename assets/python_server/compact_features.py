@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Port NumPy dari lib/services/compact_feature_builder.dart.
+
+Berbeda dengan versi Dart yang menyimpan List + removeAt(0) dan menghitung
+ulang fitur semua frame setiap kali, builder ini:
+- menghitung fitur tangan sekali per frame saat paket masuk,
+- menyimpan tip distance di array sirkular yang dialokasikan sekali
+  (ditulis dua kali agar window selalu berupa slice kontigu berurutan),
+- memperbarui jumlah frame aktif dan max delta secara O(1) (max dihitung
+  ulang dari window hanya jika nilai max keluar dari window).
+
+Penyimpangan dari rancangan O(1) penuh: mean/std temporal TIDAK memakai jumlah
+berjalan. Versi sum + sum-of-squares berjalan sudah dicoba dan berbeda dari
+Dart sampai ~4e-8 (std dari sum-of-squares kehilangan presisi saat variansnya
+kecil), jadi output tidak lagi identik bit-per-bit. Mean/std dihitung two-pass
+atas window kontigu (maks. sequence_length x 10 nilai) dengan urutan operasi
+Dart; biayanya O(window) per build_feature_vector(), bukan O(1).
+Semua perhitungan memakai float64 sehingga output identik dengan Dart
+(diuji terhadap port baris-per-baris di test_compact_features.py).
+"""
+
+import math
+
+import numpy as np
+
+from sign_classifier import FeatureScaler
+
+HAND_POINTS = [0, 1, 4, 5, 8, 9, 12, 13, 16, 20]
+TIP_POINTS = [4, 8, 12, 16, 20]
+RATIO_POINTS = [8, 12, 16, 20]
+THUMB_TIP = 4
+THUMB_CMC = 1
+# MoveNet Thunder: indeks 5/6 = bahu kiri/kanan (koordinat dari sudut pandang kamera)
+POSE_LEFT_SHOULDER = 5
+POSE_RIGHT_SHOULDER = 6
+
+HAND_LANDMARKS = 21
+POSE_MIN_LANDMARKS = POSE_RIGHT_SHOULDER + 1
+TIP_COLUMNS = 2 * len(TIP_POINTS)
+
+# 2x(flatXY + tipDists + ratios) + bahu + confidence + 4 statistik temporal
+FEATURE_LENGTH = (
+    2 * (2 * len(HAND_POINTS) + len(TIP_POINTS) + len(RATIO_POINTS))
+    + 4 + 2 + 4 * TIP_COLUMNS
+)
+
+
+def _norm_rows(delta):
+    """sqrt(x*x + y*y + z*z) per baris, urutan operasi sama dengan _norm3 Dart"""
+    x = delta[..., 0]
+    y = delta[..., 1]
+    z = delta[..., 2]
+    return np.sqrt(x * x + y * y + z * z)
+
+
+def _sequential_mean(values):
+    """Rata-rata dengan penjumlahan kiri-ke-kanan seperti reduce((a, b) => a + b)"""
+    if len(values) == 0:
+        return 0.0
+    total = values[0]
+    for value in values[1:]:
+        total += value
+    return total / len(values)
+
+
+def _as_landmarks(flat, min_count, name):
+    array = np.asarray(flat, dtype=np.float64)
+    if array.ndim != 1 or array.size % 4 or array.size < min_count * 4:
+        raise ValueError(f'{name} harus berisi minimal {min_count} landmark x,y,z,visibility')
+    return array.reshape(-1, 4)
+
+
+def hand_frame_features(hand, pose):
+    """Fitur satu frame untuk satu tangan: (flat_xy[20], tip_dists[5], ratios[4])"""
+    wrist = hand[0, :3]
+    shoulder_dist = _norm_rows(pose[POSE_LEFT_SHOULDER, :3] - pose[POSE_RIGHT_SHOULDER, :3])
+
+    tip_offsets = _norm_rows(hand[TIP_POINTS, :3] - wrist)
+    span = tip_offsets.max()
+    scale = max(max(float(shoulder_dist), float(span)), 1e-4)
+
+    flat_xy = ((hand[HAND_POINTS, :2] - wrist[:2]) / scale).reshape(-1)
+    tip_dists = tip_offsets / scale
+
+    thumb_tip = hand[THUMB_TIP, :3]
+    thumb_len = max(float(_norm_rows(thumb_tip - hand[THUMB_CMC, :3])), 1e-4)
+    ratios = _norm_rows(hand[RATIO_POINTS, :3] - thumb_tip) / thumb_len
+    return flat_xy, tip_dists, ratios
+
+
+def shoulder_features(pose):
+    """Posisi bahu relatif terhadap titik tengah, dinormalisasi jarak bahu"""
+    if not (pose[POSE_LEFT_SHOULDER, 3] > 0.1 and pose[POSE_RIGHT_SHOULDER, 3] > 0.1):
+        return np.zeros(4, dtype=np.float64)
+    left = pose[POSE_LEFT_SHOULDER, :3]
+    right = pose[POSE_RIGHT_SHOULDER, :3]
+    center = (left + right) / 2.0
+    scale = max(float(_norm_rows(left - right)), 1e-4)
+    return np.array([
+        (left[0] - center[0]) / scale,
+        (left[1] - center[1]) / scale,
+        (right[0] - center[0]) / scale,
+        (right[1] - center[1]) / scale,
+    ], dtype=np.float64)
+
+
+class CompactFeatureBuilder:
+    """Builder fitur compact 104 dimensi dengan window sirkular per sesi"""
+
+    def __init__(self, sequence_length=24, active_threshold=0.12,
+                 scaler_mean=None, scaler_std=None):
+        self.sequence_length = int(sequence_length)
+        self.active_threshold = active_threshold
+        self.scaler = None
+        if scaler_mean is not None and scaler_std is not None and \
+                len(scaler_mean) == FEATURE_LENGTH and len(scaler_std) == FEATURE_LENGTH:
+            self.scaler = FeatureScaler(scaler_mean, scaler_std, dtype=np.float64)
+
+        n = self.sequence_length
+        # Ditulis di posisi i dan i+n sehingga _tips[start:start+count] selalu kontigu
+        self._tips = np.zeros((2 * n, TIP_COLUMNS), dtype=np.float64)
+        self._deltas = np.zeros((2 * n, TIP_COLUMNS), dtype=np.float64)
+        self._active_counts = np.zeros(TIP_COLUMNS, dtype=np.int64)
+        self._max_deltas = np.zeros(TIP_COLUMNS, dtype=np.float64)
+        self._out = np.empty(FEATURE_LENGTH, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        """Kosongkan window"""
+        self._head = 0  # posisi tulis berikutnya dalam [0, n)
+        self._count = 0
+        self._active_counts.fill(0)
+        self._max_deltas.fill(0.0)
+        self._max_stale = False
+        self._last = None
+
+    def __len__(self):
+        return self._count
+
+    @classmethod
+    def from_scaler_file(cls, path, **kwargs):
+        """Buat builder dengan scaler dari compact_scaler.json (float64 seperti Dart)"""
+        scaler = FeatureScaler.load(path, dtype=np.float64)
+        return cls(scaler_mean=scaler.mean, scaler_std=scaler.scale, **kwargs)
+
+    def add_packet(self, pose, left_hand, right_hand):
+        """Tambahkan satu paket landmark (list datar x,y,z,visibility per titik)"""
+        pose = _as_landmarks(pose, POSE_MIN_LANDMARKS, 'pose')
+        left = _as_landmarks(left_hand, HAND_LANDMARKS, 'left_hand')
+        right = _as_landmarks(right_hand, HAND_LANDMARKS, 'right_hand')
+
+        left_xy, left_tips, left_ratios = hand_frame_features(left, pose)
+        right_xy, right_tips, right_ratios = hand_frame_features(right, pose)
+        tips = np.concatenate((left_tips, right_tips))
+
+        n = self.sequence_length
+        head = self._head
+        threshold = self.active_threshold
+
+        if self._count == n:
+            # Frame terlama keluar dari window
+            evicted = self._tips[head]
+            self._active_counts -= evicted > threshold
+        else:
+            self._count += 1
+
+        if self._count > 1:
+            previous = self._tips[(head - 1) % n]
+            delta = np.abs(tips - previous)
+        else:
+            delta = np.zeros(TIP_COLUMNS, dtype=np.float64)
+
+        self._tips[head] = tips
+        self._tips[head + n] = tips
+        self._deltas[head] = delta
+        self._deltas[head + n] = delta
+        self._active_counts += tips > threshold
+        self._head = (head + 1) % n
+
+        # Max delta dihitung atas frame ke-2 dst di window: delta frame terlama ikut keluar
+        if self._count > 1:
+            np.maximum(self._max_deltas, delta, out=self._max_deltas)
+        if self._count == n and n > 1:
+            leaving = self._deltas[self._head]
+            if (leaving >= self._max_deltas).any():
+                self._max_stale = True
+
+        self._last = (
+            left_xy, right_xy, left_tips, right_tips, left_ratios, right_ratios,
+            shoulder_features(pose),
+            _sequential_mean(left[:, 3].tolist()),
+            _sequential_mean(right[:, 3].tolist()),
+        )
+
+    def window(self):
+        """View kontigu [count, 10] tip distance dalam urutan waktu (tanpa copy)"""
+        start = (self._head - self._count) % self.sequence_length
+        return self._tips[start:start + self._count]
+
+    def _temporal_stats(self, out):
+        rows = self._count
+        cols = TIP_COLUMNS
+        window = self.window()
+        # Reduksi axis 0 berjalan baris demi baris: urutan jumlah sama dengan Dart
+        means = window.sum(axis=0) / rows
+        diff = window - means
+        stds = np.sqrt((diff * diff).sum(axis=0) / rows)
+        out[0:cols] = means
+        out[cols:2 * cols] = stds
+
+        if rows > 1:
+            if self._max_stale:
+                start = (self._head - rows + 1) % self.sequence_length
+                self._deltas[start:start + rows - 1].max(axis=0, out=self._max_deltas)
+                self._max_stale = False
+            out[2 * cols:3 * cols] = self._max_deltas
+        else:
+            out[2 * cols:3 * cols] = 0.0
+        out[3 * cols:4 * cols] = self._active_counts / rows
+
+    def build_feature_vector(self):
+        """Vektor fitur [104] float64, atau None jika belum ada paket"""
+        if self._last is None:
+            return None
+        (left_xy, right_xy, left_tips, right_tips, left_ratios, right_ratios,
+         shoulders, left_conf, right_conf) = self._last
+
+        out = self._out
+        offset = 0
+        for part in (left_xy, right_xy, left_tips, right_tips, left_ratios, right_ratios, shoulders):
+            out[offset:offset + part.size] = part
+            offset += part.size
+        out[offset] = left_conf
+        out[offset + 1] = right_conf
+        offset += 2
+        self._temporal_stats(out[offset:])
+
+        if self.scaler is not None:
+            return self.scaler.transform(out)
+        return out.copy()
+
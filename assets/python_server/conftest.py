@@ -0,0 +1,11 @@
+"""Fixture pytest bersama untuk test server (tanpa kamera dan tanpa model TFLite)"""
+
+import pytest
+
+import simple_server
+
+
+@pytest.fixture(scope='session')
+def app():
+    """App Flask dari create_app(): metrik, pool dan cache siap, runtime belum dimuat"""
+    return simple_server.create_app(warmup=False, handle_signals=False)
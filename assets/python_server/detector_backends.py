@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Registry backend deteksi tangan dengan skema hasil yang sama.
+
+Backend:
+- contour: SimpleDetector (threshold grayscale + contour terbesar), paling murah,
+- skin: mask warna kulit YCrCb AND HSV + opening, lebih tahan latar terang,
+- tflite: model gambar TFLite pada ROI tangan (box dari mask kulit); butuh
+  model ber-input [N, H, W, C]. Model bawaan (body_language_classifier,
+  bima_model) ber-input landmark, bukan gambar, jadi backend ini dilaporkan
+  tidak tersedia beserta alasannya sampai SIBI_DETECTOR_MODEL diisi,
+- auto: kaskade menurut biaya terukur; backend termurah untuk semua frame,
+  backend termahal hanya untuk frame yang berisi tangan.
+
+Setiap hasil berisi 'backend' dan 'cost_ms'; /detectors menampilkan biaya
+rata-rata (EMA) per backend.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from hand_detector import SimpleDetector
+
+logger = logging.getLogger('sibi')
+
+DEFAULT_DETECTOR_MODEL = 'body_language_classifier.tflite'
+DEFAULT_DETECTOR_LABELS = 'label_map.json'
+
+
+class SkinDetector(SimpleDetector):
+    """Deteksi berbasis warna kulit: YCrCb AND HSV, lalu filter contour yang sama"""
+    name = 'skin'
+    NOMINAL_COST_MS = 0.6
+    CONFIDENCE = 0.7
+    YCRCB_LOWER = (0, 133, 77)
+    YCRCB_UPPER = (255, 173, 127)
+    HSV_LOWER = (0, 30, 60)
+    HSV_UPPER = (25, 255, 255)
+
+    def __init__(self, stages=None, verbose=True, scratch=True):
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        super().__init__(stages=stages, verbose=verbose, scratch=scratch)
+
+    def mask(self, image, size):
+        width, height = size
+        small_image = self._resize(image, size)
+        with self.stages['skin_mask'].time():
+            converted = cv2.cvtColor(small_image, cv2.COLOR_BGR2YCrCb, dst=self.buffer('converted', (height, width, 3)))
+            ycrcb = cv2.inRange(converted, self.YCRCB_LOWER, self.YCRCB_UPPER, dst=self.buffer('ycrcb', (height, width)))
+            converted = cv2.cvtColor(small_image, cv2.COLOR_BGR2HSV, dst=converted)
+            hsv = cv2.inRange(converted, self.HSV_LOWER, self.HSV_UPPER, dst=self.buffer('hsv', (height, width)))
+            skin = cv2.bitwise_and(ycrcb, hsv, dst=ycrcb)
+            # Opening membuang bintik kecil agar contour terbesar = tangan/lengan
+            return cv2.morphologyEx(skin, cv2.MORPH_OPEN, self._kernel, dst=self.buffer('mask', (height, width)))
+
+    def detect_hands_batch(self, images):
+        return [self.detect_hands(image) for image in images]
+
+
+class TFLiteDetector(SkinDetector):
+    """Model gambar TFLite pada crop ROI tangan; label model menjadi gesture"""
+    name = 'tflite'
+    NOMINAL_COST_MS = 5.0
+    TRACKABLE = False
+    LABELED = True
+    ROI_PADDING = 0.15
+
+    def __init__(self, model_path=None, labels_path=None, stages=None, verbose=True, num_threads=1, scratch=True):
+        from sign_classifier import MODEL_DIR, InterpreterPool, load_labels
+        self.model_path = model_path or os.path.join(MODEL_DIR, DEFAULT_DETECTOR_MODEL)
+        self.pool = InterpreterPool(self.model_path, num_threads=num_threads)
+        shape = self.pool.input_shape
+        if len(shape) != 4 or shape[3] not in (1, 3):
+            raise ValueError(
+                f'{os.path.basename(self.model_path)} ber-input {shape}; backend tflite butuh model gambar '
+                f'[N, H, W, 1|3] (model landmark dipakai lewat /landmarks)'
+            )
+        self.input_size = (shape[2], shape[1])
+        self.channels = shape[3]
+        class_count = self.pool.output_shape[-1]
+        labels_path = labels_path or os.path.join(MODEL_DIR, DEFAULT_DETECTOR_LABELS)
+        self.labels = load_labels(labels_path, class_count) if os.path.exists(labels_path) else \
+            [f'Class {i + 1}' for i in range(class_count)]
+        super().__init__(stages=stages, verbose=verbose, scratch=scratch)
+
+    def _crop(self, image, box):
+        """Crop frame asli di sekitar box (piksel DETECT_SIZE) lalu resize ke input model"""
+        x, y, w, h = box
+        width, height = self.DETECT_SIZE
+        pad_x, pad_y = w * self.ROI_PADDING, h * self.ROI_PADDING
+        scale_x = image.shape[1] / width
+        scale_y = image.shape[0] / height
+        x0, y0 = int(max(0, x - pad_x) * scale_x), int(max(0, y - pad_y) * scale_y)
+        x1, y1 = int(min(width, x + w + pad_x) * scale_x), int(min(height, y + h + pad_y) * scale_y)
+        crop = self._resize(image[y0:y1, x0:x1], self.input_size, name='crop')
+        width, height = self.input_size
+        if self.channels == 1:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY, dst=self.buffer('crop_pixels', (height, width)))[..., np.newaxis]
+        else:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=self.buffer('crop_pixels', (height, width, 3)))
+        if np.issubdtype(self.pool.input_dtype, np.integer) and self.pool.input_quant[0] == 0:
+            # Model uint8 tanpa parameter quantize menerima piksel mentah
+            return crop[np.newaxis].astype(self.pool.input_dtype), True
+        batch = self.buffer('crop_input', (1, height, width, self.channels), np.float32)
+        return np.multiply(crop[np.newaxis], 1.0 / 255.0, out=batch, dtype=np.float32), False
+
+    def detect_hands(self, image):
+        from sign_classifier import normalize_scores
+        started = time.perf_counter()
+        try:
+            if image is None or image.size == 0:
+                return self._get_empty_result()
+            box = self._find_hand_box(self.mask(image, self.DETECT_SIZE))
+            if box is None:
+                return self.finish(self._get_empty_result(), started)
+            batch, quantized = self._crop(image, box)
+            with self.stages['tflite_invoke'].time():
+                probs = normalize_scores(self.pool.run(batch, quantized=quantized).reshape(1, -1))[0]
+            index = int(np.argmax(probs))
+            result = self._box_result(box, 'good')
+            result['confidence'] = float(probs[index])
+            result['gestures'] = [self.labels[index]]
+            return self.finish(result, started)
+
+        except Exception as e:
+            logger.warning("Error deteksi tflite: %s", e)
+            return self._get_empty_result()
+
+    def describe(self):
+        info = super().describe()
+        info['model'] = os.path.basename(self.model_path)
+        return info
+
+
+class CascadeDetector:
+    """Backend termurah untuk setiap frame; termahal hanya jika tangan terdeteksi"""
+    name = 'auto'
+    TRACKABLE = False
+    DETECT_SIZE = SimpleDetector.DETECT_SIZE
+    RERANK_EVERY = 30  # EMA berubah tiap frame; urutan biaya dihitung ulang tiap N frame
+
+    def __init__(self, registry, verbose=True):
+        self.registry = registry
+        # Daftar backend dimuat sekali (registry.available() memuat semua dengan lock)
+        self._backends = None
+        self._ranked = None
+        self._frames = 0
+        if verbose:
+            print("✅ CascadeDetector initialized (auto)")
+
+    def _members(self):
+        """(termurah, termahal) dari backend yang tersedia, diurutkan dengan biaya terukur"""
+        self._frames += 1
+        ranked = self._ranked
+        if ranked is None or self._frames >= self.RERANK_EVERY:
+            if self._backends is None:
+                self._backends = self.registry.available(exclude=(self.name,))
+            backends = sorted(self._backends, key=lambda backend: backend.cost.ms)
+            ranked = self._ranked = (backends[0], backends[-1])
+            self._frames = 0
+        return ranked
+
+    def _cascade(self, image, first, members=None):
+        cheap, expensive = members or self._members()
+        result = first if first is not None else cheap.detect_hands(image)
+        if result['hands_detected'] and expensive is not cheap:
+            total = result['cost_ms']
+            result = expensive.detect_hands(image)
+            result['cost_ms'] = round(total + result['cost_ms'], 4)
+            result['cascade'] = [cheap.name, expensive.name]
+        else:
+            result['cascade'] = [cheap.name]
+        return result
+
+    def detect_hands(self, image):
+        return self._cascade(image, None)
+
+    def detect_hands_batch(self, images):
+        # Tahap murah tetap batch (mis. satu threshold untuk seluruh stack)
+        members = self._members()
+        firsts = members[0].detect_hands_batch(images)
+        return [self._cascade(image, first, members) for image, first in zip(images, firsts)]
+
+    def _get_empty_result(self):
+        return dict(self._members()[0]._get_empty_result(), backend=self.name)
+
+    def describe(self):
+        cheap, expensive = self._members()
+        return {'name': self.name, 'trackable': False, 'cheap': cheap.name, 'expensive': expensive.name}
+
+
+DETECTOR_BACKENDS = ('contour', 'skin', 'tflite', 'auto')
+
+
+class DetectorRegistry:
+    """Backend deteksi bernama, dibuat saat pertama diminta; gagal muat = None + alasan"""
+
+    def __init__(self, default='contour', stages=None, model_path=None, labels_path=None, verbose=True,
+                 scratch=True):
+        if default not in DETECTOR_BACKENDS:
+            raise KeyError(default)
+        self.default = default
+        self.stages = stages
+        self.model_path = model_path
+        self.labels_path = labels_path
+        self.verbose = verbose
+        self.scratch = scratch
+        self._backends = {}
+        self._errors = {}
+        self._lock = threading.RLock()
+
+    def _create(self, name):
+        options = {'stages': self.stages, 'verbose': self.verbose, 'scratch': self.scratch}
+        if name == 'contour':
+            return SimpleDetector(**options)
+        if name == 'skin':
+            return SkinDetector(**options)
+        if name == 'tflite':
+            return TFLiteDetector(self.model_path, self.labels_path, **options)
+        return CascadeDetector(self, verbose=self.verbose)
+
+    def get(self, name=None):
+        """Backend bernama (default jika None); KeyError jika nama tidak dikenal, None jika tidak tersedia"""
+        name = name or self.default
+        if name not in DETECTOR_BACKENDS:
+            raise KeyError(name)
+        with self._lock:
+            if name not in self._backends:
+                try:
+                    self._backends[name] = self._create(name)
+                except Exception as e:
+                    print(f"⚠️ Detector '{name}' tidak tersedia: {e}")
+                    self._backends[name] = None
+                    self._errors[name] = str(e)
+            return self._backends[name]
+
+    def available(self, exclude=()):
+        """Semua backend yang bisa dimuat (dimuat sekarang jika belum)"""
+        return [backend for backend in (self.get(name) for name in DETECTOR_BACKENDS if name not in exclude)
+                if backend is not None]
+
+    def status(self):
+        """Status semua backend untuk /detectors (tanpa memuat yang belum diminta)"""
+        with self._lock:
+            entries = {}
+            for name in DETECTOR_BACKENDS:
+                backend = self._backends.get(name)
+                entry = backend.describe() if backend is not None else {'name': name}
+                entry['loaded'] = name in self._backends
+                entry['available'] = backend is not None if name in self._backends else None
+                if name in self._errors:
+                    entry['error'] = self._errors[name]
+                entry['default'] = name == self.default
+                entries[name] = entry
+            return entries
+
+    def scratch_bytes(self):
+        """Total buffer scratch semua backend yang sudah dimuat"""
+        with self._lock:
+            return sum(backend.scratch.nbytes for backend in self._backends.values()
+                       if getattr(backend, 'scratch', None) is not None)
+
+
+def create_detector(name='contour', verbose=True, scratch=True):
+    """Backend dari registry sendiri (proses worker deteksi); None jika tidak tersedia"""
+    return DetectorRegistry(name, verbose=verbose, scratch=scratch).get(name)
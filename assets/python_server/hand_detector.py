@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Deteksi tangan berbasis contour (SimpleDetector) dan tracking temporal (HandTracker).
+
+SimpleDetector juga menjadi dasar backend lain (detector_backends.py): backend
+berbasis mask cukup mengganti mask(); skema hasil, filter contour dan
+pengukuran biaya per panggilan dipakai bersama.
+
+Dengan scratch=True (default) resize/grayscale/threshold menulis ke buffer
+per thread lewat dst= (ukuran maksimum, crop ROI memakai slice-nya), jadi
+hot loop tidak mengalokasikan gambar baru per frame.
+
+Modul ini tanpa state global dan tanpa efek samping saat di-import, sehingga
+bisa dipakai juga di proses worker (lihat shared_frames.py).
+"""
+
+import contextlib
+import logging
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger('sibi')
+
+
+class _NullStage:
+    """Pengganti histogram stage saat metrik tidak dipakai"""
+
+    def time(self):
+        return contextlib.nullcontext()
+
+
+_NULL_STAGE = _NullStage()
+
+
+def _null_stages():
+    return defaultdict(lambda: _NULL_STAGE)
+
+
+def _fits(shape, capacity):
+    # Loop biasa (tanpa generator/array sementara): dipanggil beberapa kali per frame
+    for size, limit in zip(shape, capacity):
+        if size > limit:
+            return False
+    return True
+
+
+class ScratchBuffers:
+    """Buffer kerja per thread per nama; tumbuh sekali ke ukuran terbesar lalu di-slice"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.nbytes = 0  # total buffer hidup di semua thread (untuk /metrics)
+
+    def _release(self, nbytes):
+        with self._lock:
+            self.nbytes -= nbytes
+
+    def get(self, name, shape, dtype=np.uint8):
+        """View berukuran shape dari buffer name milik thread ini"""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buffer = buffers.get(name)
+        if buffer is not None and buffer.shape == shape:
+            return buffer  # jalur umum: ukuran penuh, tanpa slicing
+        if buffer is None or buffer.ndim != len(shape) or not _fits(shape, buffer.shape):
+            grown = shape if buffer is None or buffer.ndim != len(shape) else tuple(map(max, shape, buffer.shape))
+            buffer = np.empty(grown, dtype=dtype)
+            buffers[name] = buffer
+            with self._lock:
+                self.nbytes += buffer.nbytes
+            # Buffer lama / milik thread yang sudah selesai dibebaskan bersama hitungannya
+            weakref.finalize(buffer, self._release, buffer.nbytes)
+        return buffer[tuple(map(slice, shape))]
+
+
+class DetectorCost:
+    """Biaya backend: EMA durasi per frame (ms); sebelum ada data memakai nilai nominal"""
+    __slots__ = ('nominal_ms', 'ema_ms', 'calls')
+    ALPHA = 0.1
+
+    def __init__(self, nominal_ms):
+        self.nominal_ms = nominal_ms
+        self.ema_ms = None
+        self.calls = 0
+
+    def record(self, ms):
+        self.calls += 1
+        self.ema_ms = ms if self.ema_ms is None else self.ema_ms + self.ALPHA * (ms - self.ema_ms)
+
+    @property
+    def ms(self):
+        return self.nominal_ms if self.ema_ms is None else self.ema_ms
+
+    def status(self):
+        return {
+            'ms': round(self.ms, 4),
+            'measured': self.ema_ms is not None,
+            'calls': self.calls,
+        }
+
+
+class SimpleDetector:
+    """Deteksi tangan berbasis contour; frame kamera datang dari CaptureManager"""
+    name = 'contour'
+    NOMINAL_COST_MS = 0.3  # perkiraan biaya sebelum ada pengukuran
+    CONFIDENCE = 0.6  # Confidence lebih rendah tapi lebih cepat
+    TRACKABLE = True  # punya mask(), jadi HandTracker bisa mencari di ROI
+    LABELED = False  # gestures hanya penanda 'Tangan terdeteksi', bukan label isyarat
+
+    def __init__(self, stages=None, verbose=True, scratch=True):
+        # stages: {nama: histogram child} untuk /metrics; tanpa itu timer no-op
+        self.stages = _null_stages() if stages is None else stages
+        self.cost = DetectorCost(self.NOMINAL_COST_MS)
+        self.scratch = ScratchBuffers() if scratch else None
+        if verbose:
+            print(f"✅ {type(self).__name__} initialized ({self.name})")
+    
+    # Ukuran kerja deteksi (w, h) dan parameter contour
+    DETECT_SIZE = (160, 120)
+    THRESHOLD = 120
+    MIN_AREA = 200
+    MAX_AREA = 10000
+    
+    def buffer(self, name, shape, dtype=np.uint8):
+        """Buffer dst= untuk OpenCV, atau None (OpenCV alokasi sendiri) tanpa scratch"""
+        return self.scratch.get(name, shape, dtype) if self.scratch is not None else None
+    
+    def _resize(self, image, size, name='small'):
+        """Resize BGR ke size (w, h) ke buffer scratch"""
+        width, height = size
+        with self.stages['resize'].time():
+            return cv2.resize(image, size, dst=self.buffer(name, (height, width, 3)))
+    
+    def _preprocess(self, image, out=None):
+        """Resize + grayscale ke ukuran kerja deteksi (ke out jika diberikan)"""
+        # Resize image untuk deteksi yang lebih cepat
+        small_image = self._resize(image, self.DETECT_SIZE)
+        # Convert ke grayscale
+        width, height = self.DETECT_SIZE
+        with self.stages['grayscale'].time():
+            return cv2.cvtColor(small_image, cv2.COLOR_BGR2GRAY,
+                                dst=out if out is not None else self.buffer('gray', (height, width)))
+    
+    def mask(self, image, size):
+        """Mask biner kandidat tangan berukuran size (w, h) dari frame/crop BGR.
+
+        Dengan scratch, hasil adalah view buffer thread ini: pakai sebelum mask() berikutnya.
+        """
+        width, height = size
+        small_image = self._resize(image, size)
+        with self.stages['grayscale'].time():
+            gray = cv2.cvtColor(small_image, cv2.COLOR_BGR2GRAY, dst=self.buffer('gray', (height, width)))
+        # Simple threshold tanpa blur untuk performa lebih baik
+        with self.stages['threshold'].time():
+            _, thresh = cv2.threshold(gray, self.THRESHOLD, 255, cv2.THRESH_BINARY,
+                                      dst=self.buffer('mask', (height, width)))
+        return thresh
+    
+    def finish(self, result, started, frames=1):
+        """Catat biaya sejak started (per frame) dan tandai hasil dengan backend-nya"""
+        ms = (time.perf_counter() - started) * 1000.0 / max(frames, 1)
+        self.cost.record(ms)
+        result['backend'] = self.name
+        result['cost_ms'] = round(ms, 4)
+        return result
+    
+    def describe(self):
+        """Info backend untuk /detectors"""
+        return {
+            'name': self.name,
+            'trackable': self.TRACKABLE,
+            'cost': self.cost.status(),
+            'scratch_bytes': self.scratch.nbytes if self.scratch is not None else None,
+        }
+    
+    def detect_hands(self, image):
+        """Deteksi tangan sederhana - versi enteng"""
+        started = time.perf_counter()
+        try:
+            if image is None or image.size == 0:
+                return self._get_empty_result()
+            
+            thresh = self.mask(image, self.DETECT_SIZE)
+            return self.finish(self._detect_from_mask(thresh, image.shape), started)
+                
+        except Exception as e:
+            logger.warning("Error deteksi: %s", e)
+            return self._get_empty_result()
+    
+    def detect_hands_batch(self, images):
+        """Deteksi tangan untuk banyak frame; threshold dijalankan sekali untuk seluruh stack"""
+        results = [self._get_empty_result() for _ in images]
+        valid = [i for i, image in enumerate(images) if image is not None and image.size > 0]
+        if not valid:
+            return results
+        
+        started = time.perf_counter()
+        try:
+            width, height = self.DETECT_SIZE
+            shape = (len(valid), height, width)
+            stack = self.buffer('stack', shape)
+            if stack is None:
+                stack = np.empty(shape, dtype=np.uint8)
+            for row, i in enumerate(valid):
+                # Grayscale langsung ke baris stack, tanpa gambar perantara
+                gray = self._preprocess(images[i], out=stack[row])
+                if not np.shares_memory(gray, stack):
+                    stack[row] = gray
+            
+            # Stack (N, h, w) dilihat sebagai satu gambar (N*h, w) supaya threshold cukup sekali
+            masks = self.buffer('stack_mask', shape)
+            with self.stages['threshold'].time():
+                _, masks = cv2.threshold(stack.reshape(-1, width), self.THRESHOLD, 255, cv2.THRESH_BINARY,
+                                         dst=masks.reshape(-1, width) if masks is not None else None)
+            masks = masks.reshape(shape)
+            
+            for row, i in enumerate(valid):
+                results[i] = self._detect_from_mask(masks[row], images[i].shape)
+            for i in valid:
+                self.finish(results[i], started, len(valid))
+        except Exception as e:
+            logger.warning("Error deteksi batch: %s", e)
+        return results
+    
+    def _detect_from_mask(self, thresh, image_shape):
+        """Cari contour tangan pada mask biner dan bangun hasil deteksi"""
+        box = self._find_hand_box(thresh)
+        if box is None:
+            return self._get_empty_result()
+        return self._box_result(box, 'good')
+    
+    def _find_hand_box(self, thresh, offset=(0, 0)):
+        """(x, y, w, h) contour terbesar dalam rentang area (piksel DETECT_SIZE), atau None"""
+        # Find contours
+        with self.stages['find_contours'].time():
+            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=offset)
+        
+        # Filter contours berdasarkan area (disesuaikan dengan ukuran kecil), ambil yang terbesar
+        largest_contour = None
+        largest_area = 0.0
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if self.MIN_AREA < area < self.MAX_AREA and area > largest_area:
+                largest_contour, largest_area = contour, area
+        
+        if largest_contour is None:
+            return None
+        return cv2.boundingRect(largest_contour)
+    
+    def _box_result(self, box, tracking_quality):
+        """Hasil deteksi dari box piksel DETECT_SIZE (koordinat dinormalisasi 0..1)"""
+        x, y, w, h = box
+        width, height = self.DETECT_SIZE
+        return {
+            'hands_detected': 1,
+            'confidence': self.CONFIDENCE,
+            'gestures': ['Tangan terdeteksi'],
+            'landmarks': [],
+            'bounding_box': {
+                'left': x / width,
+                'top': y / height,
+                'width': w / width,
+                'height': h / height
+            },
+            'tracking_quality': tracking_quality,
+            'backend': self.name
+        }
+    
+    def _get_empty_result(self):
+        """Return empty detection result"""
+        return {
+            'hands_detected': 0,
+            'confidence': 0.0,
+            'gestures': [],
+            'landmarks': [],
+            'bounding_box': None,
+            'tracking_quality': 'poor',
+            'backend': self.name
+        }
+
+
+class HandTracker:
+    """Tracking temporal di atas SimpleDetector untuk satu aliran frame.
+
+    Selama track hidup, mask + findContours hanya dijalankan pada ROI
+    di sekitar box sebelumnya; pencarian full frame hanya saat track hilang
+    (atau tangan menyentuh tepi ROI). Box dihaluskan dengan EMA.
+    Backend tanpa mask (TRACKABLE=False) langsung memakai detect_hands().
+    """
+    ROI_PADDING = 0.5  # perluasan ROI relatif terhadap ukuran box
+    MIN_PADDING = 8  # piksel DETECT_SIZE
+    SMOOTHING = 0.5  # bobot box baru pada EMA
+    GOOD_AFTER = 3  # frame ROI berturut-turut sebelum kualitas 'good'
+    RESET_IOU = 0.1  # lompatan sejauh ini tidak dihaluskan
+
+    def __init__(self, detector):
+        self.detector = detector
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.box = None  # box halus [x, y, w, h] float, piksel DETECT_SIZE
+        self._raw = None  # box mentah terakhir untuk ROI
+        self.tracked_frames = 0
+        self.full_searches = 0
+        self.roi_searches = 0
+
+    def _roi(self):
+        x, y, w, h = self._raw
+        width, height = self.detector.DETECT_SIZE
+        pad_x = max(self.MIN_PADDING, int(w * self.ROI_PADDING))
+        pad_y = max(self.MIN_PADDING, int(h * self.ROI_PADDING))
+        return (max(0, x - pad_x), max(0, y - pad_y),
+                min(width, x + w + pad_x), min(height, y + h + pad_y))
+
+    def _search_roi(self, image):
+        """Box di dalam ROI; None jika hilang atau terpotong tepi ROI"""
+        x0, y0, x1, y1 = self._roi()
+        width, height = self.detector.DETECT_SIZE
+        # Crop dari frame asli dulu: resize + grayscale hanya untuk area ROI
+        scale_x = image.shape[1] / width
+        scale_y = image.shape[0] / height
+        crop = image[int(y0 * scale_y):int(y1 * scale_y), int(x0 * scale_x):int(x1 * scale_x)]
+        if crop.size == 0:
+            return None
+        # Mask hanya untuk area ROI (resize ke ukuran ROI di piksel DETECT_SIZE)
+        thresh = self.detector.mask(crop, (x1 - x0, y1 - y0))
+        box = self.detector._find_hand_box(thresh, offset=(x0, y0))
+        if box is None:
+            return None
+        x, y, w, h = box
+        # Contour menyentuh tepi ROI yang bukan tepi frame: tangan mungkin lebih besar dari ROI
+        if (x0 > 0 and x <= x0) or (y0 > 0 and y <= y0) or \
+                (x1 < width and x + w >= x1) or (y1 < height and y + h >= y1):
+            return None
+        return box
+
+    def _search_full(self, image):
+        return self.detector._find_hand_box(self.detector.mask(image, self.detector.DETECT_SIZE))
+
+    def _smooth(self, box):
+        box = np.asarray(box, dtype=np.float64)
+        if self.box is None or _box_iou(self.box, box) < self.RESET_IOU:
+            self.box = box
+        else:
+            self.box = self.SMOOTHING * box + (1.0 - self.SMOOTHING) * self.box
+        return self.box
+
+    def update(self, image):
+        """Deteksi pada frame berikutnya; tracking_quality mengikuti status track"""
+        if not self.detector.TRACKABLE:
+            return self.detector.detect_hands(image)
+        if image is None or image.size == 0:
+            return self.detector._get_empty_result()
+        started = time.perf_counter()
+        try:
+            with self._lock:
+                box = None
+                if self._raw is not None:
+                    self.roi_searches += 1
+                    box = self._search_roi(image)
+                if box is not None:
+                    self.tracked_frames += 1
+                    search = 'roi'
+                else:
+                    # Track hilang (atau belum ada): cari ulang di seluruh frame
+                    self.full_searches += 1
+                    box = self._search_full(image)
+                    self.tracked_frames = 0
+                    search = 'full'
+                if box is None:
+                    self.box = None
+                    self._raw = None
+                    return self.detector.finish(self.detector._get_empty_result(), started)
+                self._raw = box
+                smoothed = self._smooth(box)
+                quality = 'good' if self.tracked_frames >= self.GOOD_AFTER else 'fair'
+                result = self.detector._box_result(smoothed.tolist(), quality)
+                result['search'] = search
+                return self.detector.finish(result, started)
+        except Exception as e:
+            logger.warning("Error tracking: %s", e)
+            return self.detector._get_empty_result()
+
+
+def _box_iou(a, b):
+    """Intersection-over-union dua box [x, y, w, h]"""
+    ix = max(0.0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Stabilisasi prediksi per sesi dan penyusunan kalimat di server.
+
+Sebelumnya setiap client Flutter (sentence_builder.dart) mengulang debouncing
+sendiri dan memanggil model remote (gpt_sentence_service.dart) untuk kalimat.
+Di sini setiap sesi menyimpan riwayat prediksi terakhir secara ringkas:
+- voting N frame: label dianggap stabil jika muncul minimal `votes` kali
+  (confidence >= min_confidence) dalam `window` frame terakhir,
+- label stabil yang berbeda dari kata terakhir di-commit sebagai event kata;
+  kata yang sama bisa di-commit lagi setelah jeda (label idle/kosong) atau
+  setelah `repeat_after` detik,
+- sesi idle dibuang (TTL) dan jumlah sesi dibatasi (LRU) agar memori terbatas,
+- SentenceAssembler opsional menyusun kata menjadi kalimat berbasis aturan,
+  tanpa jaringan.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Label yang berarti "tidak ada isyarat": memutus kata berulang, tidak pernah di-commit
+IDLE_LABELS = frozenset({'', 'idle', 'none', 'no_gesture'})
+QUESTION_WORDS = frozenset({'apa', 'siapa', 'kapan', 'dimana', 'mana', 'mengapa', 'kenapa', 'bagaimana', 'berapa'})
+
+
+class SentenceAssembler:
+    """Versi server SentenceBuilder Dart + aturan lokal pengganti rewrite GPT"""
+    __slots__ = ('max_words', 'timeout', 'words', 'last_added')
+
+    def __init__(self, max_words=5, timeout=3.0):
+        self.max_words = max(1, int(max_words))
+        self.timeout = timeout
+        self.words = []
+        self.last_added = None
+
+    def tick(self, now):
+        """Reset kalimat jika tidak ada kata baru selama timeout"""
+        if self.last_added is not None and self.timeout and now - self.last_added > self.timeout:
+            self.words.clear()
+            self.last_added = None
+
+    def add(self, word, now):
+        word = word.strip().lower().replace('_', ' ')
+        if not word:
+            return
+        self.tick(now)
+        if word in self.words:
+            # Kata yang sudah ada pindah ke akhir (urutan terbaru lebih relevan)
+            self.words.remove(word)
+        elif len(self.words) >= self.max_words:
+            del self.words[0]
+        self.words.append(word)
+        self.last_added = now
+
+    def reset(self):
+        self.words.clear()
+        self.last_added = None
+
+    def text(self):
+        """Kalimat: huruf awal kapital, '?' jika ada kata tanya, selain itu '.'"""
+        if not self.words:
+            return ''
+        sentence = ' '.join(self.words)
+        ending = '?' if any(word in QUESTION_WORDS for word in self.words) else '.'
+        return sentence[0].upper() + sentence[1:] + ending
+
+
+class PredictionSession:
+    """Riwayat prediksi satu client: voting N frame dan event commit kata"""
+    __slots__ = (
+        'window', 'votes', 'min_confidence', 'repeat_after', 'labels', 'confidences',
+        'counts', 'stable_label', 'stability', 'last_word', 'last_commit_at', 'commits', 'recent_words',
+        'frames', 'last_seen', 'assembler', 'lock',
+    )
+
+    def __init__(self, window=8, votes=5, min_confidence=0.5, repeat_after=2.0,
+                 history=10, assembler=None):
+        self.window = max(1, int(window))
+        self.votes = max(1, min(int(votes), self.window))
+        self.min_confidence = min_confidence
+        self.repeat_after = repeat_after
+        # Label/confidence `window` frame terakhir + hitungan per label (voting O(1))
+        self.labels = deque(maxlen=self.window)
+        self.confidences = deque(maxlen=self.window)
+        self.counts = {}
+        self.recent_words = deque(maxlen=max(1, int(history)))
+        self.assembler = assembler
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.reset()
+
+    def reset(self):
+        self.labels.clear()
+        self.confidences.clear()
+        self.counts.clear()
+        self.recent_words.clear()
+        self.stable_label = None
+        self.stability = 0.0
+        self.last_word = None
+        self.last_commit_at = 0.0
+        self.commits = 0
+        self.frames = 0
+        if self.assembler is not None:
+            self.assembler.reset()
+
+    def _vote(self, label):
+        """Tambah satu suara; suara frame tertua keluar saat window penuh"""
+        if len(self.labels) == self.window:
+            old = self.labels[0]
+            if old is not None:
+                self.counts[old] -= 1
+                if not self.counts[old]:
+                    del self.counts[old]
+        self.labels.append(label)
+        if label is not None:
+            self.counts[label] = self.counts.get(label, 0) + 1
+
+    def push(self, label, confidence, now=None):
+        """Masukkan satu prediksi; return status stabil + event commit (jika ada)"""
+        now = time.monotonic() if now is None else now
+        label = str(label or '')
+        confidence = float(confidence or 0.0)
+        with self.lock:
+            self.last_seen = now
+            self.frames += 1
+            idle = label.lower() in IDLE_LABELS
+            # Frame idle / confidence rendah tetap mengisi window (sebagai abstain)
+            self._vote(None if idle or confidence < self.min_confidence else label)
+            self.confidences.append(confidence)
+
+            stable = None
+            if self.counts:
+                candidate, count = max(self.counts.items(), key=lambda item: item[1])
+                if count >= self.votes:
+                    stable = candidate
+            if stable is None and len(self.labels) == self.window and not self.counts:
+                # Seluruh window abstain: jeda, kata yang sama boleh di-commit lagi
+                self.last_word = None
+            self.stable_label = stable
+            self.stability = round(self.counts[stable] / self.window, 4) if stable is not None else 0.0
+
+            event = None
+            if stable is not None and (
+                stable != self.last_word
+                or (self.repeat_after and now - self.last_commit_at >= self.repeat_after
+                    and self.labels[-1] == stable and self.counts[stable] == self.window)
+            ):
+                agreeing = [c for l, c in zip(self.labels, self.confidences) if l == stable]
+                self.commits += 1
+                event = {
+                    'type': 'commit',
+                    'word': stable,
+                    'confidence': round(sum(agreeing) / len(agreeing), 4),
+                    'seq': self.commits,
+                    'frame': self.frames,
+                }
+                self.last_word = stable
+                self.last_commit_at = now
+                self.recent_words.append(stable)
+                if self.assembler is not None:
+                    self.assembler.add(stable, now)
+                # Mulai voting baru agar kata berikutnya butuh `votes` frame segar
+                self.labels.clear()
+                self.confidences.clear()
+                self.counts.clear()
+            elif self.assembler is not None:
+                self.assembler.tick(now)
+            return self._state(event)
+
+    def _state(self, event=None):
+        state = {
+            'stable_label': self.stable_label,
+            'stability': self.stability,
+            'frames': self.frames,
+            'commits': self.commits,
+            'words': list(self.recent_words),
+            'events': [event] if event else [],
+        }
+        if self.assembler is not None:
+            state['sentence'] = self.assembler.text()
+        return state
+
+    def snapshot(self):
+        with self.lock:
+            return self._state()
+
+
+class SessionStore:
+    """PredictionSession per session_id; sesi idle > ttl dibuang, maksimal max_sessions (LRU)"""
+
+    def __init__(self, factory, ttl=60.0, max_sessions=1000):
+        self.factory = factory
+        self.ttl = ttl
+        self.max_sessions = max(1, int(max_sessions))
+        self.evicted = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        # Urutan OrderedDict = urutan akses, jadi cukup periksa dari depan
+        sessions = self._sessions
+        while sessions:
+            session = next(iter(sessions.values()))
+            if len(sessions) <= self.max_sessions and now - session.last_seen <= self.ttl:
+                break
+            sessions.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, session_id, create=True):
+        """Sesi milik session_id (dibuat dengan factory() jika belum ada), atau None"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_seen = now
+            elif create:
+                session = self.factory()
+                session.last_seen = now
+                self._sessions[session_id] = session
+            self._evict(now)
+            return session
+
+    def discard(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def keys(self):
+        """Snapshot key sesi yang masih hidup"""
+        with self._lock:
+            self._evict(time.monotonic())
+            return list(self._sessions)
+
+    def __len__(self):
+        with self._lock:
+            self._evict(time.monotonic())
+            return len(self._sessions)
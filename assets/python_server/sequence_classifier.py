@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Inferensi model sekuens SIBI (sibi_movenet_sequence, sibi_sequence_classifier)
+dengan state streaming per sesi.
+
+Versi Dart (tflite_inference_service.dart) menyalin seluruh window fitur ke
+buffer input baru setiap prediksi. Di sini setiap sesi memegang window
+[seq_len, feature_len] yang dialokasikan sekali:
+- frame baru di-scale (dan di-quantize untuk model int8) sekali saat ditulis,
+  langsung ke slotnya; window yang sudah siap pakai tidak dihitung ulang,
+- slot ditulis dua kali (i dan i+n) sehingga window selalu berupa slice
+  kontigu berurutan yang bisa langsung dikirim ke interpreter,
+- interpreter hanya dipanggil setiap `stride` frame atau saat gerakan sejak
+  invoke terakhir melewati ambang; frame lain memakai prediksi terakhir,
+- top-k dihitung dari rata-rata probabilitas beberapa invoke terakhir.
+
+Kedua model memakai op Flex (TensorList), jadi butuh TensorFlow penuh atau
+runtime dengan Flex delegate; tanpa itu pemuatan gagal dan endpoint 503.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from sign_classifier import (
+    MODEL_DIR, FeatureScaler, InterpreterPool, format_predictions, load_labels, normalize_scores,
+)
+
+# nama -> (model, scaler, label)
+SEQUENCE_MODELS = {
+    'movenet': ('sibi_movenet_sequence.tflite', 'sibi_movenet_scaler.npz', 'sibi_movenet_labels.json'),
+    'sequence': ('sibi_sequence_classifier.tflite', 'sibi_sequence_scaler.npz', 'sibi_sequence_labels.json'),
+}
+
+
+class SequenceClassifier:
+    """Model sekuens [N, seq_len, feature_len] -> [N, classes] beserta scaler & label"""
+
+    def __init__(self, name='movenet', model_path=None, scaler_path=None, labels_path=None,
+                 num_threads=1, top_k=3, stride=5, motion_threshold=0.5, smoothing=3,
+                 pad_initial=True):
+        if name not in SEQUENCE_MODELS and model_path is None:
+            raise KeyError(name)
+        model_file, scaler_file, labels_file = SEQUENCE_MODELS.get(name, (None, None, None))
+        self.name = name
+        self.model_path = model_path or os.path.join(MODEL_DIR, model_file)
+        self.scaler_path = scaler_path or (os.path.join(MODEL_DIR, scaler_file) if scaler_file else None)
+        self.labels_path = labels_path or (os.path.join(MODEL_DIR, labels_file) if labels_file else None)
+        self.top_k = top_k
+        # Kebijakan invoke untuk sesi streaming
+        self.stride = max(1, int(stride))
+        self.motion_threshold = motion_threshold
+        self.smoothing = max(1, int(smoothing))
+        self.pad_initial = pad_initial
+
+        self.pool = InterpreterPool(self.model_path, num_threads=num_threads)
+        if len(self.pool.input_shape) != 3:
+            raise ValueError(f'Model sekuens harus ber-input [N, seq_len, fitur], bukan {self.pool.input_shape}')
+        self.sequence_length = self.pool.input_shape[1]
+        self.feature_length = self.pool.input_shape[2]
+        self.class_count = self.pool.output_shape[-1]
+        self.input_dtype = np.dtype(self.pool.input_dtype)
+        self.labels = np.asarray(
+            load_labels(self.labels_path, self.class_count) if self.labels_path else
+            [f'Class {i + 1}' for i in range(self.class_count)],
+            dtype=object,
+        )
+
+        self.scaler = None
+        if self.scaler_path and os.path.exists(self.scaler_path):
+            scaler = FeatureScaler.load(self.scaler_path)
+            if len(scaler) == self.feature_length:
+                self.scaler = scaler
+            else:
+                print(f"⚠️ Panjang scaler {len(scaler)} != fitur model {self.feature_length}, scaler diabaikan")
+        # Invoke percobaan: tanpa Flex delegate model baru gagal saat invoke, jadi
+        # gagalkan pemuatan di sini (sekaligus warmup) alih-alih di request pertama
+        self.predict_prepared(
+            np.zeros((1, self.sequence_length, self.feature_length), dtype=self.input_dtype)
+        )
+        print(f"✅ Sequence classifier '{name}' siap: {os.path.basename(self.model_path)} "
+              f"window={self.sequence_length}x{self.feature_length} classes={self.class_count} "
+              f"input={self.input_dtype.name}")
+
+    def new_session(self):
+        return SequenceSession(self)
+
+    def predict_windows(self, windows):
+        """Probabilitas [N, classes] untuk window mentah [seq_len, fitur] atau [N, seq_len, fitur]"""
+        batch = np.asarray(windows, dtype=np.float32)
+        if batch.ndim == 2:
+            batch = batch[np.newaxis]
+        if batch.ndim != 3 or batch.shape[1:] != (self.sequence_length, self.feature_length):
+            raise ValueError(
+                f'Window harus berukuran [{self.sequence_length}, {self.feature_length}] '
+                f'(diterima {list(np.shape(windows))})'
+            )
+        if self.scaler is not None:
+            # Satu operasi vektor untuk seluruh window (broadcast di sumbu fitur)
+            batch = self.scaler.transform(batch)
+        return self.predict_prepared(batch, quantized=False)
+
+    def predict_prepared(self, batch, quantized=True):
+        """Invoke untuk batch yang sudah di-scale (dan di-quantize jika quantized=True)"""
+        outputs = self.pool.run(batch, quantized=quantized).reshape(batch.shape[0], -1)
+        return normalize_scores(outputs)
+
+    def classify_windows(self, windows, top_k=None):
+        """Klasifikasi tanpa state untuk satu atau beberapa window lengkap"""
+        return format_predictions(self.predict_windows(windows), self.labels, top_k or self.top_k)
+
+    def quantize_into(self, values, out, scratch):
+        """Quantize values float ke out (dtype input model) memakai buffer scratch"""
+        scale, zero_point = self.pool.input_quant
+        info = np.iinfo(self.input_dtype)
+        np.divide(values, scale or 1.0, out=scratch)
+        np.add(scratch, zero_point, out=scratch)
+        np.rint(scratch, out=scratch)
+        np.clip(scratch, info.min, info.max, out=scratch)
+        out[...] = scratch
+
+
+class SequenceSession:
+    """Window streaming milik satu sesi; push() per frame, invoke hanya jika perlu"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        n = engine.sequence_length
+        features = engine.feature_length
+        self.quantized = np.issubdtype(engine.input_dtype, np.integer)
+        # Slot siap-invoke (sudah di-scale/quantize), ditulis di i dan i+n
+        self._window = np.zeros((2 * n, features), dtype=engine.input_dtype)
+        self._scaled = np.empty(features, dtype=np.float32)
+        self._scratch = np.empty(features, dtype=np.float32)
+        self._last_invoked = np.zeros(features, dtype=np.float32)
+        # Rata-rata berjalan probabilitas `smoothing` invoke terakhir
+        self._history = np.zeros((engine.smoothing, engine.class_count), dtype=np.float32)
+        self._history_sum = np.zeros(engine.class_count, dtype=np.float64)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Kosongkan window dan riwayat prediksi"""
+        self._head = 0
+        self._count = 0
+        self._since_invoke = 0
+        self._history.fill(0.0)
+        self._history_sum.fill(0.0)
+        self._history_index = 0
+        self._history_count = 0
+        self._prediction = None
+        self.frames = 0
+        self.invokes = 0
+        self.motion = 0.0
+
+    def window(self):
+        """View kontigu [seq_len, fitur] dalam urutan waktu (tanpa copy)"""
+        return self._window[self._head:self._head + self.engine.sequence_length]
+
+    def _write(self, frame):
+        """Scale (+ quantize) satu frame langsung ke slot head dan mirror-nya"""
+        engine = self.engine
+        scaled = self._scaled
+        if engine.scaler is not None:
+            engine.scaler.transform(frame, out=scaled)
+        else:
+            scaled[...] = frame
+        n = engine.sequence_length
+        slot = self._window[self._head]
+        if self.quantized:
+            engine.quantize_into(scaled, slot, self._scratch)
+        else:
+            slot[...] = scaled
+        self._window[self._head + n] = slot
+        if self._count == 0 and engine.pad_initial:
+            # Seperti Dart padInitialWindow: frame pertama mengisi seluruh window
+            self._window[:] = slot
+            self._count = n
+        else:
+            self._count = min(self._count + 1, n)
+        self._head = (self._head + 1) % n
+
+    def _record(self, probs):
+        history = self._history
+        index = self._history_index
+        if self._history_count == len(history):
+            self._history_sum -= history[index]
+        else:
+            self._history_count += 1
+        history[index] = probs
+        self._history_sum += probs
+        self._history_index = (index + 1) % len(history)
+
+    def smoothed(self):
+        """Rata-rata probabilitas invoke terakhir [classes], atau None"""
+        if self._history_count == 0:
+            return None
+        return (self._history_sum / self._history_count).astype(np.float32)
+
+    def push(self, frame, top_k=None):
+        """Tambahkan satu frame fitur mentah; return status + prediksi (terhalus) terbaru"""
+        engine = self.engine
+        frame = np.asarray(frame, dtype=np.float32)
+        if frame.shape != (engine.feature_length,):
+            raise ValueError(f'Frame harus berisi {engine.feature_length} fitur (diterima {list(frame.shape)})')
+
+        with self._lock:
+            self._write(frame)
+            self.frames += 1
+            self._since_invoke += 1
+
+            # Gerakan = rata-rata |beda| fitur ter-scale sejak invoke terakhir
+            diff = self._scratch
+            np.subtract(self._scaled, self._last_invoked, out=diff)
+            np.abs(diff, out=diff)
+            self.motion = float(diff.mean())
+
+            ready = self._count == engine.sequence_length
+            due = (self._prediction is None or self._since_invoke >= engine.stride
+                   or (engine.motion_threshold and self.motion >= engine.motion_threshold))
+            invoked = False
+            if ready and due:
+                probs = engine.predict_prepared(self.window()[np.newaxis], quantized=self.quantized)[0]
+                self._record(probs)
+                self._prediction = format_predictions(
+                    self.smoothed()[np.newaxis], engine.labels, top_k or engine.top_k
+                )[0]
+                self._last_invoked[...] = self._scaled
+                self._since_invoke = 0
+                self.invokes += 1
+                invoked = True
+
+            return {
+                'ready': ready,
+                'invoked': invoked,
+                'frames': self.frames,
+                'invokes': self.invokes,
+                'motion': round(self.motion, 4),
+                'prediction': self._prediction,
+            }
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Ring frame di shared memory antara thread request dan proses worker deteksi.
+
+Satu blok multiprocessing.shared_memory berisi header (seq per slot) dan N
+slot frame yang dialokasikan sekali. Frame disalin ke slot seq % N hanya saat
+deteksi untuk frame itu diminta (sekali per frame); worker meng-attach blok yang sama lalu membaca slot sebagai view
+NumPy, jadi yang dikirim lewat pipe hanya (nama blok, slot, seq), bukan
+frame yang di-pickle. Seq di header diperiksa sebelum dan sesudah deteksi
+sehingga frame yang tertimpa di tengah jalan dibuang.
+"""
+
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+HEADER_ALIGN = 64
+WRITING = -1  # seq sementara selama slot sedang ditulis
+WORKER_ATTACH_LIMIT = 4  # blok yang tetap di-attach per worker
+MAX_POOL_RESTARTS = 3  # pool dibuat ulang maksimal sekian kali sebelum dinonaktifkan
+
+_owned = set()
+_owned_lock = threading.Lock()
+_in_worker = False  # True di proses worker DetectorProcessPool (diset _init_worker)
+
+
+def _attach_untracked(name):
+    """Attach blok milik proses lain tanpa mendaftarkannya ke resource_tracker.
+
+    Sebelum Python 3.13 attach ikut mendaftarkan blok, lalu tracker meng-unlink
+    (atau memberi warning) blok yang masih dipakai server saat worker berhenti.
+    Di luar worker dipakai workaround stdlib: attach lalu unregister. Di worker
+    spawn itu tidak bisa: worker memakai tracker yang sama dengan server, jadi
+    unregister ikut menghapus pendaftaran pemilik dan unlink pemilik gagal di
+    tracker. Di sana register dilewati selama attach; worker ProcessPoolExecutor
+    menjalankan task di satu thread Python, jadi tidak ada SharedMemory lain
+    yang dibuat selama register diganti.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    if not _in_worker:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+    register = resource_tracker.register
+
+    def skip_shared_memory(resource, rtype):
+        if rtype != 'shared_memory':
+            register(resource, rtype)
+
+    resource_tracker.register = skip_shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedFrameRing:
+    """Slot frame [slots, *shape] + header seq di satu blok shared memory"""
+
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        # name=None: buat blok baru (pemilik, yang meng-unlink); selain itu attach
+        self.slots = max(1, int(slots))
+        self.shape = tuple(int(v) for v in shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._data_offset = -(-self.slots * 8 // HEADER_ALIGN) * HEADER_ALIGN
+        size = self._data_offset + self.slots * self.frame_bytes
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=size, name=f'sibi_{uuid.uuid4().hex[:16]}'
+            )
+        else:
+            self.shm = _attach_untracked(name)
+        self.name = self.shm.name
+        self.closed = False
+
+        self._seqs = np.ndarray((self.slots,), dtype=np.int64, buffer=self.shm.buf)
+        self._frames = np.ndarray(
+            (self.slots,) + self.shape, dtype=self.dtype,
+            buffer=self.shm.buf, offset=self._data_offset,
+        )
+        if self.owner:
+            self._seqs[:] = 0
+            with _owned_lock:
+                _owned.add(self)
+
+    def descriptor(self):
+        """Info untuk attach dari proses lain (tuple kecil, tanpa data frame)"""
+        return (self.name, self.slots, self.shape, self.dtype.str)
+
+    @classmethod
+    def attach(cls, descriptor):
+        name, slots, shape, dtype = descriptor
+        return cls(slots, shape, dtype, name=name)
+
+    def slot_of(self, seq):
+        return seq % self.slots
+
+    def write(self, seq, frame):
+        """Salin frame ke slot untuk seq; return slot"""
+        if self.closed:
+            return None
+        slot = seq % self.slots
+        self._seqs[slot] = WRITING
+        np.copyto(self._frames[slot], frame)
+        self._seqs[slot] = seq
+        return slot
+
+    def read(self, slot, seq):
+        """View NumPy slot (tanpa copy) jika masih berisi frame seq, selain itu None"""
+        if self.closed or self._seqs[slot] != seq:
+            return None
+        return self._frames[slot]
+
+    def holds(self, seq):
+        """True jika slot untuk seq sudah berisi frame seq (tidak perlu ditulis lagi)"""
+        return not self.closed and self._seqs[seq % self.slots] == seq
+
+    def valid(self, slot, seq):
+        """True jika slot belum ditimpa sejak read()"""
+        return not self.closed and self._seqs[slot] == seq
+
+    def close(self):
+        """Lepas mapping; pemilik sekaligus meng-unlink blok"""
+        if self.closed:
+            return
+        self.closed = True
+        # View NumPy harus dilepas dulu, kalau tidak shm.close() gagal (BufferError)
+        self._seqs = None
+        self._frames = None
+        self.shm.close()
+        if self.owner:
+            with _owned_lock:
+                _owned.discard(self)
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def close_all():
+    """Tutup dan unlink semua ring milik proses ini (dipanggil dari cleanup server)"""
+    with _owned_lock:
+        rings = list(_owned)
+    for ring in rings:
+        ring.close()
+
+
+# --- Sisi proses worker ---
+
+_worker_detector = None
+_worker_rings = OrderedDict()
+
+
+def _init_worker(backend='contour', scratch=True):
+    global _worker_detector, _in_worker
+    _in_worker = True
+    from detector_backends import create_detector
+    _worker_detector = create_detector(backend, verbose=False, scratch=scratch)
+
+
+def _worker_ring(descriptor):
+    """Ring yang sudah di-attach di worker ini (cache kecil per nama blok)"""
+    name = descriptor[0]
+    ring = _worker_rings.get(name)
+    if ring is None:
+        try:
+            ring = SharedFrameRing.attach(descriptor)
+        except FileNotFoundError:
+            return None
+        _worker_rings[name] = ring
+        while len(_worker_rings) > WORKER_ATTACH_LIMIT:
+            _worker_rings.popitem(last=False)[1].close()
+    else:
+        _worker_rings.move_to_end(name)
+    return ring
+
+
+def _ping():
+    """No-op untuk warmup; initializer worker sudah jalan saat ini dipanggil"""
+    return _worker_detector is not None
+
+
+def detect_shared(descriptor, slot, seq):
+    """Deteksi di proses worker langsung pada view slot; None jika frame sudah tertimpa"""
+    ring = _worker_ring(descriptor)
+    if ring is None:
+        return None
+    frame = ring.read(slot, seq)
+    if frame is None:
+        return None
+    result = _worker_detector.detect_hands(frame)
+    # Ditimpa frame lain selama deteksi: hasil dari frame campuran, buang
+    if not ring.valid(slot, seq):
+        return None
+    return result
+
+
+class DetectorProcessPool:
+    """Pool proses deteksi (spawn) yang menerima (descriptor, slot, seq), bukan frame.
+
+    Timeout worker atau pool rusak (worker mati) tidak menjadi error request:
+    detect() mengembalikan None sehingga caller mendeteksi di proses sendiri.
+    Pool yang rusak dibuat ulang, dan dinonaktifkan setelah max_restarts kali.
+    """
+
+    def __init__(self, workers, backend='contour', scratch=True, max_restarts=MAX_POOL_RESTARTS):
+        self.workers = max(1, int(workers))
+        self.backend = backend
+        self.scratch = scratch
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+        self.executor = self._create()
+
+    def _create(self):
+        # Proses worker baru dibuat saat submit pertama
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.backend, self.scratch),
+        )
+
+    @property
+    def disabled(self):
+        return self.executor is None
+
+    def _broken(self, executor):
+        """Ganti executor yang rusak; executor=None (nonaktif) setelah max_restarts"""
+        with self._lock:
+            if executor is not self.executor:
+                return  # sudah diganti thread lain
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.restarts >= self.max_restarts:
+                self.executor = None
+                print(f"⚠️ Pool proses deteksi rusak {self.restarts + 1}x, dinonaktifkan (deteksi di proses server)")
+                return
+            self.restarts += 1
+            self.executor = self._create()
+            print(f"⚠️ Pool proses deteksi rusak, dibuat ulang ({self.restarts}/{self.max_restarts})")
+
+    def detect(self, ring, seq, timeout=None):
+        """Hasil deteksi frame seq dari ring; None jika tertimpa, timeout atau pool rusak/nonaktif"""
+        executor = self.executor
+        if executor is None or ring is None:
+            return None
+        try:
+            future = executor.submit(detect_shared, ring.descriptor(), ring.slot_of(seq), seq)
+        except RuntimeError:
+            # BrokenProcessPool, atau executor baru saja di-shutdown oleh _broken() thread lain
+            self._broken(executor)
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            # Worker tetap menyelesaikan frame ini; hanya request ini yang tidak menunggu
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            return None
+        except BrokenProcessPool:
+            self._broken(executor)
+            return None
+
+    def warmup(self):
+        """Spawn semua worker dan tunggu detector-nya siap (sebelum frame pertama)"""
+        executor = self.executor
+        if executor is None:
+            return
+        try:
+            for future in [executor.submit(_ping) for _ in range(self.workers)]:
+                future.result()
+        except BrokenProcessPool:
+            self._broken(executor)
+
+    def status(self):
+        return {
+            'workers': self.workers,
+            'disabled': self.disabled,
+            'restarts': self.restarts,
+            'timeouts': self.timeouts,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
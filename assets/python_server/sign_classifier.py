@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Engine klasifikasi isyarat SIBI berbasis TFLite untuk server.
+
+Memakai model yang sama dengan aplikasi Flutter (sibi_compact_mlp.tflite +
+compact_scaler.json + sibi_compact_labels.json) sehingga HP low-end bisa
+mengirim vektor fitur dan menyerahkan inferensi ke server.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+# tflite_runtime lebih ringan; fallback ke TensorFlow penuh jika terpasang
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    try:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    except ImportError:
+        Interpreter = None
+
+MODEL_DIR = os.environ.get(
+    'SIBI_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'),
+)
+
+DEFAULT_MODEL = 'sibi_compact_mlp.tflite'
+DEFAULT_SCALER = 'compact_scaler.json'
+DEFAULT_LABELS = 'sibi_compact_labels.json'
+
+
+def load_labels(path, expected_count):
+    """Baca label (list atau map index->label), isi yang kosong dengan 'Class N'"""
+    labels = [''] * expected_count
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            decoded = json.load(f)
+        if isinstance(decoded, list):
+            for i, value in enumerate(decoded[:expected_count]):
+                labels[i] = str(value or '')
+        elif isinstance(decoded, dict):
+            for key, value in decoded.items():
+                index = int(key) if str(key).isdigit() else -1
+                if 0 <= index < expected_count:
+                    labels[index] = str(value)
+    except Exception as e:
+        print(f"⚠️ Gagal memuat label {path}: {e}")
+    return [label or f'Class {i + 1}' for i, label in enumerate(labels)]
+
+
+class FeatureScaler:
+    """Standard scaler (mean/std) yang diterapkan vektor-wise ke seluruh batch"""
+
+    def __init__(self, mean, std, dtype=np.float32):
+        self.dtype = dtype
+        self.mean = np.asarray(mean, dtype=dtype)
+        std = np.asarray(std, dtype=dtype)
+        # Sama dengan Dart: std hampir nol dianggap 1
+        self.scale = np.where(np.abs(std) < 1e-6, 1.0, std).astype(dtype)
+
+    @classmethod
+    def load(cls, path, dtype=np.float32):
+        """Muat scaler dari .json ({mean, std}) atau .npz (mean, std)"""
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                return cls(data['mean'], data['std'], dtype=dtype)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['mean'], data['std'], dtype=dtype)
+
+    def __len__(self):
+        return self.mean.shape[0]
+
+    def transform(self, features, out=None):
+        """(x - mean) / std untuk array [..., feature_len]"""
+        out = np.subtract(features, self.mean, out=out, dtype=self.dtype)
+        np.divide(out, self.scale, out=out)
+        return out
+
+
+class InterpreterPool:
+    """Satu interpreter TFLite per worker thread; file model dibaca sekali"""
+
+    def __init__(self, model_path, num_threads=1):
+        if Interpreter is None:
+            raise RuntimeError('tflite_runtime atau tensorflow tidak terpasang')
+        self.model_path = model_path
+        self.num_threads = num_threads
+        with open(model_path, 'rb') as f:
+            self.model_content = f.read()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.size = 0
+
+        # Interpreter pertama sekaligus dipakai untuk membaca metadata tensor
+        slot = self._slot()
+        input_detail = slot['interpreter'].get_input_details()[0]
+        output_detail = slot['interpreter'].get_output_details()[0]
+        signature = input_detail.get('shape_signature', input_detail['shape'])
+        self.input_shape = [int(v) for v in input_detail['shape']]
+        self.input_dtype = input_detail['dtype']
+        self.input_quant = input_detail['quantization']
+        self.output_dtype = output_detail['dtype']
+        self.output_quant = output_detail['quantization']
+        self.output_shape = [int(v) for v in output_detail['shape']]
+        self.dynamic_batch = int(signature[0]) == -1
+
+    def _slot(self):
+        """Interpreter milik thread ini (dibuat saat pertama dipakai)"""
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            interpreter = Interpreter(
+                model_content=self.model_content, num_threads=self.num_threads
+            )
+            interpreter.allocate_tensors()
+            slot = {
+                'interpreter': interpreter,
+                'input_index': interpreter.get_input_details()[0]['index'],
+                'output_index': interpreter.get_output_details()[0]['index'],
+                'batch': int(interpreter.get_input_details()[0]['shape'][0]),
+            }
+            self._local.slot = slot
+            with self._lock:
+                self.size += 1
+        return slot
+
+    def _quantize(self, values):
+        if self.input_dtype == np.float32:
+            return values
+        scale, zero_point = self.input_quant
+        scale = scale or 1.0
+        info = np.iinfo(self.input_dtype)
+        quantized = np.rint(values / scale + zero_point)
+        return np.clip(quantized, info.min, info.max).astype(self.input_dtype)
+
+    def _dequantize(self, values):
+        if self.output_dtype == np.float32:
+            return values
+        scale, zero_point = self.output_quant
+        scale = scale or 1.0
+        return (values.astype(np.float32) - zero_point) * scale
+
+    def run(self, batch, quantized=False):
+        """Invoke model untuk batch [N, ...]; return output float32 [N, ...]
+
+        quantized=True: batch sudah dalam dtype input model (tanpa quantize ulang).
+        """
+        slot = self._slot()
+        interpreter = slot['interpreter']
+        if not self.dynamic_batch:
+            return np.concatenate([self._invoke(slot, batch[i:i + 1], quantized) for i in range(len(batch))])
+
+        n = batch.shape[0]
+        if slot['batch'] != n:
+            # Realokasi hanya saat ukuran batch berubah
+            interpreter.resize_tensor_input(slot['input_index'], [n] + self.input_shape[1:])
+            interpreter.allocate_tensors()
+            slot['batch'] = n
+        return self._invoke(slot, batch, quantized)
+
+    def _invoke(self, slot, batch, quantized=False):
+        interpreter = slot['interpreter']
+        interpreter.set_tensor(slot['input_index'], batch if quantized else self._quantize(batch))
+        interpreter.invoke()
+        return self._dequantize(interpreter.get_tensor(slot['output_index']))
+
+
+def normalize_scores(outputs):
+    """Model sudah berakhir dengan SOFTMAX; hanya normalisasi jika output berupa logits"""
+    sums = outputs.sum(axis=1)
+    if outputs.min() < 0 or not np.allclose(sums, 1.0, atol=1e-2):
+        return softmax(outputs)
+    return outputs
+
+
+def format_predictions(probs, labels, top_k):
+    """Per baris probs [N, classes]: label, confidence dan top-k"""
+    k = max(1, min(int(top_k), probs.shape[1]))
+    order = np.argsort(-probs, axis=1)[:, :k]
+    scores = np.take_along_axis(probs, order, axis=1)
+    results = []
+    for row_labels, row_scores in zip(labels[order].tolist(), scores.tolist()):
+        results.append({
+            'label': row_labels[0],
+            'confidence': row_scores[0],
+            'top_k': [
+                {'label': label, 'confidence': score}
+                for label, score in zip(row_labels, row_scores)
+            ],
+        })
+    return results
+
+
+def softmax(logits):
+    """Softmax baris-per-baris yang stabil secara numerik"""
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exps = np.exp(shifted)
+    return exps / exps.sum(axis=-1, keepdims=True)
+
+
+class SignClassifier:
+    """Klasifikasi vektor fitur compact (tunggal atau batch) ke label SIBI"""
+
+    def __init__(self, model_path=None, scaler_path=None, labels_path=None,
+                 num_threads=1, top_k=3):
+        self.model_path = model_path or os.path.join(MODEL_DIR, DEFAULT_MODEL)
+        self.scaler_path = scaler_path or os.path.join(MODEL_DIR, DEFAULT_SCALER)
+        self.labels_path = labels_path or os.path.join(MODEL_DIR, DEFAULT_LABELS)
+        self.top_k = top_k
+
+        self.pool = InterpreterPool(self.model_path, num_threads=num_threads)
+        self.feature_length = self.pool.input_shape[-1]
+        self.class_count = self.pool.output_shape[-1]
+        self.labels = np.asarray(load_labels(self.labels_path, self.class_count), dtype=object)
+
+        self.scaler = None
+        if os.path.exists(self.scaler_path):
+            scaler = FeatureScaler.load(self.scaler_path)
+            if len(scaler) == self.feature_length:
+                self.scaler = scaler
+            else:
+                print(f"⚠️ Panjang scaler {len(scaler)} != fitur model {self.feature_length}, scaler diabaikan")
+        print(f"✅ Sign classifier siap: {os.path.basename(self.model_path)} "
+              f"features={self.feature_length} classes={self.class_count}")
+
+    def _as_batch(self, features):
+        batch = np.asarray(features, dtype=np.float32)
+        if batch.ndim == 1:
+            batch = batch[np.newaxis, :]
+        if batch.ndim != 2 or batch.shape[1] != self.feature_length:
+            raise ValueError(
+                f'Fitur harus berukuran {self.feature_length} (diterima {list(batch.shape)})'
+            )
+        return batch
+
+    def predict_proba(self, features):
+        """Probabilitas kelas [N, classes] untuk fitur [feature_len] atau [N, feature_len]"""
+        batch = self._as_batch(features)
+        if self.scaler is not None:
+            batch = self.scaler.transform(batch)
+        outputs = self.pool.run(batch).reshape(batch.shape[0], -1)
+        return normalize_scores(outputs)
+
+    def classify(self, features, top_k=None):
+        """Hasil klasifikasi per baris: label, confidence dan top-k"""
+        probs = self.predict_proba(features)
+        return format_predictions(probs, self.labels, top_k or self.top_k)
@@ -1,195 +1,1412 @@
 #!/usr/bin/env python3
 """
 Simple Python Server untuk Testing
+
+Import modul ini ringan dan tanpa efek samping: hanya konstanta dari
+environment dan handle kosong. create_app() memuat .env, membuat metrik,
+app Flask (+ /ws), pool CPU/decode dan cache; OpenCV/NumPy, detector,
+classifier dan sumber kamera baru dibuat saat request pertama atau saat
+warmup. Jalankan lewat `python simple_server.py` atau factory `create_app()`
+(mis. `gunicorn 'simple_server:create_app()'`), lalu tunggu /ready sebelum
+mengirim trafik.
 """
 
-import cv2
-import numpy as np
 import base64
+import hashlib
+import importlib
 import json
 import threading
 import time
 import signal
 import sys
 import atexit
+import logging
 import warnings
 import multiprocessing
-from flask import Flask, request, jsonify, Response
+import gc
+import tracemalloc
+from flask import Blueprint, Flask, request, jsonify, Response, g
 from flask_cors import CORS
 import os
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+class _LazyModule:
+    """Placeholder modul berat yang baru di-import saat atributnya pertama dipakai.
+
+    Setelah di-import, placeholder mengganti dirinya di globals() modul ini
+    sehingga akses berikutnya langsung ke modul asli tanpa overhead.
+    """
+    def __init__(self, name, alias):
+        self._name = name
+        self._alias = alias
 
-# Suppress OpenCV warnings
-warnings.filterwarnings('ignore', category=UserWarning)
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+cv2 = _LazyModule('cv2', 'cv2')
+np = _LazyModule('numpy', 'np')
+
+# Encoder respons biner (opsional)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
 
-# Fix multiprocessing resource leak
+# WebSocket streaming (opsional - /ws tidak tersedia jika tidak terpasang)
 try:
-    multiprocessing.set_start_method('spawn', force=True)
-except RuntimeError:
-    pass  # Already set
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
 
-app = Flask(__name__)
-CORS(app)
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
 
-class SimpleDetector:
-    def __init__(self):
-        self.camera = None
+def load_settings():
+    """Baca konfigurasi SIBI_* dari os.environ ke konstanta modul"""
+    global SERVER_MODE, SERVER_HOST, SERVER_PORT, SERVER_DEBUG, CPU_WORKERS, MAX_PENDING, \
+        REQUEST_TIMEOUT, TRACKING_ENABLED, MOTION_THRESHOLD, MOTION_MAX_REUSE, \
+        DETECT_PROCESSES, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, SEQUENCE_STRIDE, \
+        SEQUENCE_MOTION, SEQUENCE_SMOOTHING, STABLE_WINDOW, STABLE_VOTES, \
+        STABLE_MIN_CONFIDENCE, STABLE_REPEAT_AFTER, SESSION_TTL, MAX_SESSIONS, \
+        SENTENCE_ENABLED, SENTENCE_MAX_WORDS, SENTENCE_TIMEOUT, DETECTOR_BACKEND, \
+        DETECTOR_MODEL, DETECTOR_LABELS, DETECT_SCRATCH, TRACE_MALLOC, CAMERA_CONFIG, \
+        LOG_LEVEL, LOG_SAMPLE_EVERY, WARMUP_ENABLED
+    # 'dev' = Werkzeug threaded (perilaku lama), 'asgi' = uvicorn tanpa debug
+    SERVER_MODE = os.environ.get('SIBI_SERVER_MODE', 'dev').strip().lower()
+    SERVER_HOST = os.environ.get('SIBI_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.environ.get('SIBI_PORT', '5001'))
+    # Debug (+ reloader Werkzeug) harus diminta eksplisit: SIBI_DEBUG=1
+    SERVER_DEBUG = SERVER_MODE == 'dev' and _env_bool('SIBI_DEBUG', False)
+    # Pool CPU ukuran tetap + batas antrian admisi + timeout per request
+    CPU_WORKERS = int(os.environ.get('SIBI_CPU_WORKERS', str(os.cpu_count() or 2)))
+    MAX_PENDING = int(os.environ.get('SIBI_MAX_PENDING', str(CPU_WORKERS * 4)))
+    REQUEST_TIMEOUT = float(os.environ.get('SIBI_REQUEST_TIMEOUT', '5.0'))
+    # Tracking temporal (ROI di sekitar box sebelumnya) untuk kamera, /ws dan /detect_hands?session_id=
+    TRACKING_ENABLED = _env_bool('SIBI_TRACKING', True)
+    # Motion gate: beda rata-rata thumbnail grayscale (0-255) di bawah ambang = frame statis (0 = mati)
+    MOTION_THRESHOLD = float(os.environ.get('SIBI_MOTION_THRESHOLD', '2.0'))
+    MOTION_MAX_REUSE = int(os.environ.get('SIBI_MOTION_MAX_REUSE', '30'))  # paksa keyframe setelah N frame
+    # Proses worker deteksi untuk frame kamera via shared memory (0 = deteksi di thread)
+    DETECT_PROCESSES = int(os.environ.get('SIBI_DETECT_PROCESSES', '0'))
+    # Cache hasil /detect_hands per isi gambar (0 = mati)
+    RESULT_CACHE_SIZE = int(os.environ.get('SIBI_RESULT_CACHE_SIZE', '256'))
+    RESULT_CACHE_TTL = float(os.environ.get('SIBI_RESULT_CACHE_TTL', '30'))
+    # Model sekuens (/classify_sequence): invoke tiap N frame atau saat gerakan (fitur ter-scale)
+    SEQUENCE_STRIDE = int(os.environ.get('SIBI_SEQUENCE_STRIDE', '5'))
+    SEQUENCE_MOTION = float(os.environ.get('SIBI_SEQUENCE_MOTION', '0.5'))  # 0 = hanya stride
+    SEQUENCE_SMOOTHING = int(os.environ.get('SIBI_SEQUENCE_SMOOTHING', '3'))  # invoke yang dirata-rata
+    # Stabilisasi per sesi (?session_id=): label stabil jika >= VOTES dari WINDOW frame terakhir
+    STABLE_WINDOW = int(os.environ.get('SIBI_STABLE_WINDOW', '8'))
+    STABLE_VOTES = int(os.environ.get('SIBI_STABLE_VOTES', '5'))
+    STABLE_MIN_CONFIDENCE = float(os.environ.get('SIBI_STABLE_MIN_CONFIDENCE', '0.4'))
+    STABLE_REPEAT_AFTER = float(os.environ.get('SIBI_STABLE_REPEAT', '2.0'))  # detik sebelum kata sama boleh diulang
+    SESSION_TTL = float(os.environ.get('SIBI_SESSION_TTL', '60'))
+    MAX_SESSIONS = int(os.environ.get('SIBI_MAX_SESSIONS', '1000'))
+    # Penyusun kalimat lokal berbasis aturan (juga per request: sentence=1)
+    SENTENCE_ENABLED = _env_bool('SIBI_SENTENCE', False)
+    SENTENCE_MAX_WORDS = int(os.environ.get('SIBI_SENTENCE_WORDS', '5'))
+    SENTENCE_TIMEOUT = float(os.environ.get('SIBI_SENTENCE_TIMEOUT', '3.0'))
+    # Backend deteksi default (contour, skin, tflite, auto); per request/sesi lewat ?detector=
+    DETECTOR_BACKEND = os.environ.get('SIBI_DETECTOR', 'contour').strip().lower()
+    DETECTOR_MODEL = os.environ.get('SIBI_DETECTOR_MODEL') or None  # model gambar untuk backend tflite
+    DETECTOR_LABELS = os.environ.get('SIBI_DETECTOR_LABELS') or None
+    # Buffer kerja per thread untuk resize/grayscale/threshold (dst=), tanpa alokasi per frame
+    DETECT_SCRATCH = _env_bool('SIBI_DETECT_SCRATCH', True)
+    # tracemalloc untuk metrik alokasi Python (menambah overhead; untuk profiling)
+    TRACE_MALLOC = _env_bool('SIBI_TRACEMALLOC', False)
+    # Sumber kamera: JSON inline atau path file, mis. {"default": 0, "kelas_a": "rtsp://..."}
+    CAMERA_CONFIG = os.environ.get('SIBI_CAMERAS', '')
+
+    # Logging per-request: level + sampling (1 dari N) agar bisa dimatikan di produksi
+    LOG_LEVEL = os.environ.get('SIBI_LOG_LEVEL', 'INFO' if SERVER_MODE == 'dev' else 'WARNING').upper()
+    LOG_SAMPLE_EVERY = int(os.environ.get('SIBI_LOG_SAMPLE', '1' if SERVER_MODE == 'dev' else '100'))
+    # Warmup (inferensi + encode JPEG pertama) saat startup; /ready 503 sampai selesai
+    WARMUP_ENABLED = _env_bool('SIBI_WARMUP', True)
+
+# Konstanta dari environment proses; create_app() membaca ulang setelah .env dimuat
+load_settings()
+
+def load_config():
+    """Muat .env (jika python-dotenv terpasang) lalu baca ulang konfigurasi server"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+    load_settings()
+
+logger = logging.getLogger('sibi')
+# Logger per-request ter-sampling dan metrik hot path (/metrics, format Prometheus);
+# dibuat oleh create_app() supaya memakai konfigurasi setelah .env dimuat
+request_log = None
+metrics = STAGE_SECONDS = STAGES = REQUEST_SECONDS = REQUESTS = REQUESTS_REJECTED = \
+    FRAMES_REUSED = FRAMES_DROPPED = ACTIVE_STREAMS = RESULT_CACHE = CPU_QUEUE_DEPTH = \
+    CPU_ABANDONED = PREDICTION_SESSIONS = PROCESS_MEMORY = GC_COLLECTIONS = SCRATCH_BYTES = \
+    WORDS_COMMITTED = CAMERA_FPS = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def resident_bytes():
+    """RSS saat ini dari /proc (Linux), 0 jika tidak tersedia"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def peak_resident_bytes():
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KiB, macOS byte
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def init_metrics():
+    """Buat registry dan semua metrik (dipanggil sekali oleh create_app)"""
+    global metrics, STAGE_SECONDS, STAGES, REQUEST_SECONDS, REQUESTS, REQUESTS_REJECTED, \
+        FRAMES_REUSED, FRAMES_DROPPED, ACTIVE_STREAMS, RESULT_CACHE, CPU_QUEUE_DEPTH, \
+        CPU_ABANDONED, PREDICTION_SESSIONS, PROCESS_MEMORY, GC_COLLECTIONS, SCRATCH_BYTES, \
+        WORDS_COMMITTED, CAMERA_FPS
+    from metrics import MetricsRegistry
+    metrics = MetricsRegistry(enabled=_env_bool('SIBI_METRICS', True))
+    STAGE_SECONDS = metrics.histogram('sibi_stage_seconds', 'Durasi per stage hot path', ['stage'])
+    STAGES = {
+        name: STAGE_SECONDS.labels(stage=name)
+        for name in ('camera_read', 'base64_decode', 'imdecode', 'resize', 'grayscale',
+                     'threshold', 'skin_mask', 'tflite_invoke', 'find_contours', 'jpeg_encode', 'motion_gate',
+                     'json_serialize', 'msgpack_serialize', 'cbor_serialize')
+    }
+    REQUEST_SECONDS = metrics.histogram('sibi_request_seconds', 'Durasi request per endpoint', ['endpoint'])
+    REQUESTS = metrics.counter('sibi_requests', 'Jumlah request per endpoint dan status', ['endpoint', 'status'])
+    REQUESTS_REJECTED = metrics.counter('sibi_requests_rejected', 'Request ditolak pool CPU', ['reason'])
+    FRAMES_REUSED = metrics.counter('sibi_frames_reused', 'Hasil/JPEG yang dipakai ulang untuk frame statis', ['kind'])
+    FRAMES_DROPPED = metrics.counter('sibi_frames_dropped', 'Frame yang dilewati karena subscriber lambat', ['source'])
+    ACTIVE_STREAMS = metrics.gauge('sibi_active_streams', 'Jumlah stream aktif', ['kind'])
+    RESULT_CACHE = metrics.counter('sibi_result_cache', 'Lookup cache hasil /detect_hands', ['result'])
+    CPU_QUEUE_DEPTH = metrics.gauge('sibi_cpu_queue_depth', 'Request yang menunggu hasil kerja CPU')
+    CPU_ABANDONED = metrics.gauge('sibi_cpu_abandoned', 'Pekerjaan CPU yang sudah timeout tapi masih berjalan')
+    PREDICTION_SESSIONS = metrics.gauge('sibi_prediction_sessions', 'Sesi stabilisasi prediksi yang aktif')
+    PROCESS_MEMORY = metrics.gauge('sibi_process_memory_bytes', 'Memori proses (rss, peak_rss, traced, traced_peak)', ['kind'])
+    GC_COLLECTIONS = metrics.gauge('sibi_gc_collections', 'Jumlah koleksi GC per generasi sejak start', ['generation'])
+    SCRATCH_BYTES = metrics.gauge('sibi_detector_scratch_bytes', 'Buffer kerja detector yang dialokasikan (semua thread)')
+    WORDS_COMMITTED = metrics.counter('sibi_words_committed', 'Kata yang di-commit oleh voting per sesi')
+    CAMERA_FPS = metrics.gauge('sibi_camera_fps', 'FPS aktual thread capture (EMA)', ['camera'])
+
+    PROCESS_MEMORY.labels(kind='rss').set_function(resident_bytes)
+    PROCESS_MEMORY.labels(kind='peak_rss').set_function(peak_resident_bytes)
+    PROCESS_MEMORY.labels(kind='traced').set_function(
+        lambda: tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0)
+    PROCESS_MEMORY.labels(kind='traced_peak').set_function(
+        lambda: tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0)
+    for generation in range(3):
+        GC_COLLECTIONS.labels(generation=generation).set_function(
+            lambda generation=generation: gc.get_stats()[generation]['collections'])
+    SCRATCH_BYTES.set_function(lambda: detectors.scratch_bytes() if detectors is not None else 0)
+    CPU_QUEUE_DEPTH.set_function(lambda: cpu_pool.pending if cpu_pool is not None else 0)
+    CPU_ABANDONED.set_function(lambda: cpu_pool.abandoned if cpu_pool is not None else 0)
+    PREDICTION_SESSIONS.set_function(lambda: len(prediction_sessions) if prediction_sessions is not None else 0)
+
+# Route didaftarkan di blueprint; app Flask (+ CORS dan /ws) dibuat oleh build_app()
+bp = Blueprint('sibi', __name__)
+app = None
+sock = None
+
+class FrameRingBuffer:
+    """Ring buffer kecil (lock-protected) untuk frame terbaru dari thread capture"""
+    def __init__(self, size=4):
+        self.size = max(1, int(size))
+        self._frames = [None] * self.size
+        self._seqs = [0] * self.size
+        self._keys = [0] * self.size
+        self._seq = 0
+        self._key = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    @property
+    def seq(self):
+        """Sequence number frame terakhir yang dipublish (0 = belum ada)"""
+        return self._seq
+
+    def publish(self, frame, changed=True):
+        """Simpan frame baru dan bangunkan pembaca yang menunggu.
+
+        changed=False menandai frame hampir sama dengan keyframe terakhir;
+        frame tersebut berbagi key (lihat key_of) dengan keyframe itu.
+        """
+        with self._cond:
+            self._seq += 1
+            if changed or self._key == 0:
+                self._key = self._seq
+            slot = self._seq % self.size
+            self._frames[slot] = frame
+            self._seqs[slot] = self._seq
+            self._keys[slot] = self._key
+            self._cond.notify_all()
+            return self._seq
+
+    def latest(self):
+        """Ambil (seq, frame) terbaru tanpa blocking"""
+        with self._cond:
+            if self._seq == 0:
+                return 0, None
+            return self._seq, self._frames[self._seq % self.size]
+
+    def get(self, seq):
+        """Ambil frame dengan seq tertentu jika masih ada di ring"""
+        with self._cond:
+            slot = seq % self.size
+            if seq <= 0 or self._seqs[slot] != seq:
+                return None
+            return self._frames[slot]
+
+    def key_of(self, seq):
+        """Seq keyframe untuk frame seq (seq itu sendiri jika sudah keluar dari ring)"""
+        with self._cond:
+            slot = seq % self.size
+            if self._seqs[slot] != seq:
+                return seq
+            return self._keys[slot]
+
+    def wait_newer(self, last_seq, timeout=None):
+        """Tunggu frame dengan seq > last_seq, return (seq, frame) terbaru"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq, timeout=timeout)
+            if self._seq <= last_seq:
+                return last_seq, None
+            return self._seq, self._frames[self._seq % self.size]
+
+    def clear(self):
+        """Kosongkan slot tapi pertahankan seq agar tetap monoton"""
+        with self._cond:
+            self._frames = [None] * self.size
+            self._seqs = [0] * self.size
+            self._keys = [0] * self.size
+            self._key = 0
+            self._cond.notify_all()
+
+class MotionGate:
+    """Bandingkan thumbnail grayscale kecil dengan keyframe terakhir.
+
+    Dipanggil hanya dari thread capture. Perbandingan ke keyframe (bukan ke
+    frame sebelumnya) supaya gerakan lambat tetap terakumulasi.
+    """
+    SIZE = (32, 24)
+
+    def __init__(self, threshold=2.0, max_reuse=30):
+        self.threshold = threshold
+        self.max_reuse = max(0, int(max_reuse))
+        self.motion = 0.0
+        self.reset()
+
+    def reset(self):
+        self._key_thumb = None
+        self._reused = 0
+
+    def changed(self, frame):
+        """True jika frame cukup berbeda dari keyframe (dan menjadi keyframe baru)"""
+        if self.threshold <= 0:
+            return True
+        with STAGES['motion_gate'].time():
+            small = cv2.resize(frame, self.SIZE, interpolation=cv2.INTER_AREA)
+            thumb = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            if self._key_thumb is not None and self._reused < self.max_reuse:
+                self.motion = cv2.norm(thumb, self._key_thumb, cv2.NORM_L1) / thumb.size
+                if self.motion < self.threshold:
+                    self._reused += 1
+                    return False
+            self._key_thumb = thumb
+            self._reused = 0
+            return True
+
+# Profil stream JPEG: quality dan ukuran output (None = ukuran asli kamera)
+STREAM_PROFILES = {
+    'low': {'quality': 20, 'size': (160, 120)},
+    'default': {'quality': 30, 'size': None},
+    'medium': {'quality': 50, 'size': None},
+    'high': {'quality': 70, 'size': None},
+}
+
+# Tangga profil untuk /video_feed adaptif (murah -> mahal)
+ADAPTIVE_LADDER = ('low', 'default', 'medium', 'high')
+STREAM_DEFAULT_FPS = 10.0
+STREAM_MIN_FPS = 1.0
+STREAM_MAX_FPS = 30.0
+
+class JpegBroadcaster:
+    """Encode setiap frame sekali per profil lalu bagikan bytes-nya ke semua viewer"""
+    def __init__(self, source, profiles=None, cache_size=4):
+        self.source = source
+        self.profiles = dict(profiles or STREAM_PROFILES)
+        self.cache_size = max(1, int(cache_size))
+        self._cache = {}  # profile -> OrderedDict(seq -> bytes)
+        self._locks = {name: threading.Lock() for name in self.profiles}
+
+    def resolve_profile(self, name):
+        """Nama profil yang valid, fallback ke 'default'"""
+        return name if name in self.profiles else 'default'
+
+    def encode(self, frame, profile='default'):
+        """Encode satu frame dengan setting profil (tanpa cache)"""
+        settings = self.profiles[self.resolve_profile(profile)]
+        if settings.get('size') and (frame.shape[1], frame.shape[0]) != tuple(settings['size']):
+            frame = cv2.resize(frame, tuple(settings['size']), interpolation=cv2.INTER_AREA)
+        with STAGES['jpeg_encode'].time():
+            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(settings['quality'])])
+        return buffer.tobytes() if ret else None
+
+    def get_jpeg(self, seq, frame, profile='default'):
+        """(bytes, reused) untuk frame seq; encode hanya jika keyframe-nya belum di cache.
+
+        reused=True berarti bytes berasal dari frame statis sebelumnya (motion gate).
+        """
+        profile = self.resolve_profile(profile)
+        key = self.source.frame_key(seq)
+        # Lock per profil: viewer yang datang bersamaan menunggu satu encode saja
+        with self._locks[profile]:
+            cache = self._cache.setdefault(profile, OrderedDict())
+            data = cache.get(key)
+            if data is None:
+                data = self.encode(frame, profile)
+                if data is None:
+                    return None, False
+                cache[key] = data
+                while len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+                return data, False
+            reused = key != seq
+            if reused:
+                FRAMES_REUSED.labels(kind='jpeg').inc()
+            return data, reused
+
+    def latest(self, profile='default'):
+        """(seq, bytes, reused) untuk frame terbaru"""
+        seq, frame = self.source.get_latest_frame()
+        if frame is None:
+            return seq, None, False
+        return (seq,) + self.get_jpeg(seq, frame, profile)
+
+    def wait_next(self, last_seq, profile='default', timeout=0.5):
+        """(seq, bytes, reused) untuk frame terbaru yang lebih baru dari last_seq.
+
+        Subscriber lambat selalu melompat ke frame terbaru; frame di antaranya
+        tidak pernah diantrikan.
+        """
+        seq, frame = self.source.wait_for_frame(last_seq, timeout=timeout)
+        if frame is None:
+            return last_seq, None, False
+        return (seq,) + self.get_jpeg(seq, frame, profile)
+
+    def clear(self):
+        """Buang semua bytes yang di-cache"""
+        for profile, lock in self._locks.items():
+            with lock:
+                self._cache.pop(profile, None)
+
+class StreamRateController:
+    """Kontrol per subscriber /video_feed: deadline frame + profil dan FPS adaptif.
+
+    Throughput kirim diukur dari lamanya generator tertahan di yield (server
+    menulis chunk ke socket selama itu). Profil turun satu tingkat jika
+    ukuran frame melewati budget bitrate, client lebih lambat dari deadline,
+    atau antrian CPU hampir penuh; jika sudah di tingkat terendah FPS yang
+    diturunkan. Setelah beberapa frame stabil FPS pulih dulu, lalu profil
+    naik lagi sampai maksimal profil yang diminta client.
+    """
+    UPGRADE_AFTER = 20  # frame stabil sebelum naik satu langkah
+    DOWNGRADE_COOLDOWN = 3  # frame minimal di antara dua penurunan
+    HEADROOM = 0.8  # pakai maksimal 80% throughput terukur
+    BUSY_LOAD = 0.75  # rasio antrian CPU yang dianggap sibuk
+
+    def __init__(self, target_fps=STREAM_DEFAULT_FPS, max_bitrate=None, profile='default',
+                 ladder=ADAPTIVE_LADDER, load=None):
+        self.target_fps = min(max(float(target_fps), STREAM_MIN_FPS), STREAM_MAX_FPS)
+        self.fps = self.target_fps
+        self.max_bitrate = max_bitrate  # bit/detik, None = tanpa batas
+        self.ladder = ladder
+        self.max_level = ladder.index(profile) if profile in ladder else ladder.index('default')
+        self.level = self.max_level
+        self.load = load or (lambda: 0.0)
+        self.throughput = None  # EMA byte/detik
+        self.frame_sizes = {}  # profil -> EMA ukuran frame (byte)
+        self._stable = 0
+        self._cooldown = 0
+        self._deadline = None
+
+    @property
+    def profile(self):
+        return self.ladder[self.level]
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps
+
+    def wait_deadline(self):
+        """Tidur sampai deadline frame berikutnya; frame terlambat tidak menumpuk"""
+        now = time.perf_counter()
+        if self._deadline is not None and self._deadline > now:
+            time.sleep(self._deadline - now)
+            now = self._deadline
+        self._deadline = now + self.interval
+
+    def budget(self):
+        """Byte/detik yang boleh dipakai (None = tanpa batas)"""
+        limits = []
+        if self.max_bitrate:
+            limits.append(self.max_bitrate / 8.0)
+        if self.throughput:
+            limits.append(self.throughput * self.HEADROOM)
+        return min(limits) if limits else None
+
+    def record(self, size, send_seconds):
+        """Catat satu frame terkirim (ukuran byte, waktu tulis ke socket) lalu sesuaikan"""
+        previous = self.frame_sizes.get(self.profile)
+        self.frame_sizes[self.profile] = size if previous is None else 0.8 * previous + 0.2 * size
+        if send_seconds > 1e-4:
+            rate = size / send_seconds
+            self.throughput = rate if self.throughput is None else 0.8 * self.throughput + 0.2 * rate
+        self._adjust(send_seconds)
+
+    def _adjust(self, send_seconds):
+        budget = self.budget()
+        size = self.frame_sizes[self.profile]
+        over_budget = budget is not None and size * self.fps > budget
+        slow_client = send_seconds > self.interval
+        busy = self.load() > self.BUSY_LOAD
+
+        if self._cooldown:
+            self._cooldown -= 1
+        if over_budget or slow_client or busy:
+            self._stable = 0
+            if self._cooldown:
+                return
+            self._cooldown = self.DOWNGRADE_COOLDOWN
+            if self.level > 0:
+                self.level -= 1
+            elif over_budget:
+                self.fps = max(STREAM_MIN_FPS, min(self.fps * 0.75, budget / size))
+            else:
+                self.fps = max(STREAM_MIN_FPS, self.fps * 0.75)
+            return
+
+        self._stable += 1
+        if self._stable < self.UPGRADE_AFTER:
+            return
+        self._stable = 0
+        if self.fps < self.target_fps:
+            self.fps = min(self.target_fps, self.fps * 1.25)
+        elif self.level < self.max_level:
+            # Naik hanya jika perkiraan ukuran profil berikutnya masih muat di budget
+            estimate = self.frame_sizes.get(self.ladder[self.level + 1], size * 1.5)
+            if budget is None or estimate * self.fps < budget * 0.9:
+                self.level += 1
+
+# Sumber video bernama; profil default sama dengan perilaku lama (320x240 @ 10 FPS)
+DEFAULT_CAMERA_ID = 'default'
+DEFAULT_CAMERA_PROFILE = {'width': 320, 'height': 240, 'fps': 10}
+RECONNECT_DELAY = 1.0  # detik sebelum membuka ulang stream RTSP/HTTP yang putus
+RECONNECT_AFTER_FAILURES = 50  # read gagal berturut-turut sebelum reconnect
+
+def parse_camera_source(source):
+    """Index device (0 / '0') atau URL/path file apa adanya"""
+    if isinstance(source, int):
+        return source
+    text = str(source).strip()
+    return int(text) if text.isdigit() else text
+
+def redact_source(source):
+    """Sembunyikan password di URL kamera untuk status/log"""
+    if not isinstance(source, str) or '://' not in source:
+        return source
+    parts = urlsplit(source)
+    if parts.password is None:
+        return source
+    netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else '')
+    return urlunsplit(parts._replace(netloc=netloc))
+
+class CaptureSource:
+    """Satu sumber video (device, RTSP/HTTP, atau file) dengan thread capture sendiri.
+
+    start()/stop() bisa dipanggil berulang; setiap start membuat handle dan
+    thread baru, seq ring buffer tetap monoton antar restart.
+    """
+    def __init__(self, camera_id, source, width=320, height=240, fps=10,
+                 ring_size=4, loop=True, capture_factory=None, detector=None,
+                 process_pool=None):
+        self.camera_id = camera_id
+        self.source = parse_camera_source(source)
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.loop = loop
+        # capture_factory(source) -> objek mirip cv2.VideoCapture (bisa diganti untuk benchmark)
+        self.capture_factory = capture_factory
         self.is_camera_active = False
-        self.current_frame = None
-        self.frame_lock = threading.Lock()
-        self._shutdown_flag = False
-        self._cleanup_done = False
-        print("✅ Simple Detector initialized")
-    
-    def start_camera(self):
-        """Mulai kamera untuk streaming"""
+        self.frames = FrameRingBuffer(ring_size)
+        self.broadcaster = JpegBroadcaster(self)
+        self.detector = detector
+        if detector is not None:
+            from hand_detector import HandTracker
+            self.tracker = HandTracker(detector)
+        else:
+            self.tracker = None
+        self.motion = MotionGate(MOTION_THRESHOLD, MOTION_MAX_REUSE)
+        self._detection = None  # (key, mode, result) deteksi terakhir
+        # Dengan process_pool, frame yang diminta deteksinya disalin ke ring shared memory
+        self.process_pool = process_pool
+        self.shared = None
+        self._share_lock = threading.Lock()
+        self.camera_fps = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()  # serialisasi start/stop
+        self._capture_thread = None
+        self._capture_stop = None
+        CAMERA_FPS.labels(camera=camera_id).set_function(
+            lambda: self.camera_fps if self.is_camera_active else 0.0
+        )
+
+    @property
+    def kind(self):
+        if isinstance(self.source, int):
+            return 'device'
+        return 'stream' if '://' in self.source else 'file'
+
+    def _open(self):
+        factory = self.capture_factory or cv2.VideoCapture
+        camera = factory(self.source)
+        if not camera.isOpened():
+            camera.release()
+            raise Exception(f"Tidak dapat membuka kamera {self.camera_id}")
+        
+        # Set resolusi kamera untuk performa lebih baik
+        camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        camera.set(cv2.CAP_PROP_FPS, self.fps)
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Buffer minimal
+        return camera
+
+    def start(self):
+        """Buka sumber dan jalankan thread capture (no-op jika sudah aktif)"""
+        with self._lock:
+            if self.is_camera_active:
+                return True
+            try:
+                camera = self._open()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Error memulai kamera {self.camera_id}: {e}")
+                return False
+            self.last_error = None
+            self.camera_fps = 0.0
+            self.is_camera_active = True
+            # Event baru per run: thread lama yang belum selesai tidak ikut hidup lagi
+            self._capture_stop = threading.Event()
+            self._capture_thread = threading.Thread(
+                target=self._capture_loop, args=(camera, self._capture_stop),
+                name=f'camera-{self.camera_id}', daemon=True
+            )
+            self._capture_thread.start()
+            print(f"✅ Kamera {self.camera_id} berhasil dimulai ({self.kind})")
+            return True
+
+    def _capture_loop(self, camera, stop):
+        """Satu-satunya pemanggil camera.read(); handle dilepas oleh thread ini saat berhenti"""
+        # File dibaca secepat disk, jadi diberi jeda sesuai FPS profil
+        interval = 1.0 / self.fps if self.kind == 'file' and self.fps > 0 else 0.0
+        next_at = time.perf_counter()
+        last_frame_at = None
+        failures = 0
         try:
-            if self.camera is None:
-                self.camera = cv2.VideoCapture(0)
-                if not self.camera.isOpened():
-                    raise Exception("Tidak dapat membuka kamera")
+            while not stop.is_set():
+                try:
+                    with STAGES['camera_read'].time():
+                        ret, frame = camera.read()
+                except Exception as e:
+                    logger.warning("Error reading frame (%s): %s", self.camera_id, e)
+                    ret, frame = False, None
                 
-                # Set resolusi kamera untuk performa lebih baik
-                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 320)  # Lebih kecil
-                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)  # Lebih kecil
-                self.camera.set(cv2.CAP_PROP_FPS, 10)  # 10 FPS
-                self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Buffer minimal
+                if ret and frame is not None:
+                    failures = 0
+                    seq = self.frames.publish(frame, self.motion.changed(frame))
+                    now = time.perf_counter()
+                    if last_frame_at is not None and now > last_frame_at:
+                        # EMA supaya nilai FPS tidak melompat-lompat
+                        self.camera_fps = 0.9 * self.camera_fps + 0.1 / (now - last_frame_at)
+                    last_frame_at = now
+                    if interval:
+                        next_at += interval
+                        if next_at > now:
+                            stop.wait(next_at - now)
+                        else:
+                            next_at = now
+                    continue
                 
-                self.is_camera_active = True
-                print("✅ Kamera berhasil dimulai")
+                failures += 1
+                if self.kind == 'file' and self.loop and failures == 1:
+                    # Akhir file: putar ulang dari awal
+                    camera.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if self.kind == 'stream' and failures >= RECONNECT_AFTER_FAILURES:
+                    logger.warning("Stream %s terputus, mencoba reconnect", self.camera_id)
+                    camera.release()
+                    stop.wait(RECONNECT_DELAY)
+                    if stop.is_set():
+                        return
+                    try:
+                        camera = self._open()
+                        failures = 0
+                        self.last_error = None
+                    except Exception as e:
+                        self.last_error = str(e)
+                    continue
+                # Jika tidak bisa baca frame, tunggu sebentar
+                stop.wait(0.01)
+        finally:
+            try:
+                camera.release()
+            except Exception:
+                pass
+
+    def _share(self, seq, frame):
+        """Ring shared memory berisi frame seq; disalin saat deteksi diminta, sekali per frame"""
+        with self._share_lock:
+            if not self.is_camera_active:
+                return None
+            ring = self.shared
+            if ring is None or ring.shape != frame.shape:
+                if ring is not None:
+                    ring.close()
+                # Slot 2x ring lokal agar frame tidak tertimpa selagi worker membacanya
+                from shared_frames import SharedFrameRing
+                ring = self.shared = SharedFrameRing(self.frames.size * 2, frame.shape, frame.dtype)
+            if not ring.holds(seq):
+                ring.write(seq, frame)
+            return ring
+
+    def stop(self):
+        """Hentikan thread capture dan kosongkan buffer; bisa di-start lagi"""
+        with self._lock:
+            if not self.is_camera_active:
                 return True
-            return True
-        except Exception as e:
-            print(f"❌ Error memulai kamera: {e}")
-            return False
-    
-    def stop_camera(self):
-        """Hentikan kamera"""
-        if self._cleanup_done:
-            return True
-            
-        try:
-            self._shutdown_flag = True
             self.is_camera_active = False
-            
-            if self.camera is not None:
-                try:
-                    self.camera.release()
-                except:
-                    pass
-                self.camera = None
-            
-            # Clear current frame
-            with self.frame_lock:
-                self.current_frame = None
-            
-            self._cleanup_done = True
-            print("🛑 Kamera dihentikan")
+            self._capture_stop.set()
+            thread = self._capture_thread
+            self._capture_thread = None
+            if thread is not threading.current_thread():
+                thread.join(timeout=2)
+                if thread.is_alive():
+                    logger.warning("Thread capture %s belum berhenti, handle dilepas saat read selesai", self.camera_id)
+            self.frames.clear()
+            self.broadcaster.clear()
+            self.motion.reset()
+            self._detection = None
+            with self._share_lock:
+                if self.shared is not None:
+                    self.shared.close()
+                    self.shared = None
+            if self.tracker is not None:
+                self.tracker.reset()
+            print(f"🛑 Kamera {self.camera_id} dihentikan")
             return True
-        except Exception as e:
-            print(f"❌ Error menghentikan kamera: {e}")
-            return False
-    
+
     def get_frame(self):
-        """Ambil frame dari kamera"""
-        if not self.is_camera_active or self.camera is None or self._shutdown_flag:
-            return None
-            
-        try:
-            ret, frame = self.camera.read()
-            if ret and frame is not None:
-                with self.frame_lock:
-                    self.current_frame = frame.copy()
-                return frame
-            else:
-                # Jika tidak bisa baca frame, tunggu sebentar
-                time.sleep(0.01)
-        except Exception as e:
-            print(f"❌ Error reading frame: {e}")
-            time.sleep(0.01)
-        return None
+        """Ambil frame terbaru dari ring buffer (non-blocking)"""
+        return self.get_latest_frame()[1]
     
-    def detect_hands(self, image):
-        """Deteksi tangan sederhana - versi enteng"""
-        try:
-            if image is None or image.size == 0:
-                return self._get_empty_result()
-            
-            # Resize image untuk deteksi yang lebih cepat
-            small_image = cv2.resize(image, (160, 120))
-            
-            # Convert ke grayscale
-            gray = cv2.cvtColor(small_image, cv2.COLOR_BGR2GRAY)
-            
-            # Simple threshold tanpa blur untuk performa lebih baik
-            _, thresh = cv2.threshold(gray, 120, 255, cv2.THRESH_BINARY)
-            
-            # Find contours
-            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            # Filter contours berdasarkan area (disesuaikan dengan ukuran kecil)
-            hand_contours = []
-            for contour in contours:
-                try:
-                    area = cv2.contourArea(contour)
-                    if 200 < area < 10000:  # Filter untuk ukuran kecil
-                        hand_contours.append(contour)
-                except:
-                    continue
-            
-            if hand_contours:
-                # Ambil contour terbesar
-                largest_contour = max(hand_contours, key=cv2.contourArea)
-                
-                # Get bounding box
-                x, y, w, h = cv2.boundingRect(largest_contour)
-                
-                # Scale back ke ukuran asli
-                scale_x = image.shape[1] / 160
-                scale_y = image.shape[0] / 120
-                
-                # Normalize coordinates
-                bbox = {
-                    'left': (x * scale_x) / image.shape[1],
-                    'top': (y * scale_y) / image.shape[0],
-                    'width': (w * scale_x) / image.shape[1],
-                    'height': (h * scale_y) / image.shape[0]
-                }
-                
-                return {
-                    'hands_detected': 1,
-                    'confidence': 0.6,  # Confidence lebih rendah tapi lebih cepat
-                    'gestures': ['Tangan terdeteksi'],
-                    'landmarks': [],
-                    'bounding_box': bbox,
-                    'tracking_quality': 'good'
-                }
-            else:
-                return self._get_empty_result()
-                
-        except Exception as e:
-            print(f"❌ Error deteksi: {e}")
-            return self._get_empty_result()
+    def get_latest_frame(self):
+        """Ambil (seq, frame) terbaru; frame bersifat read-only dan dibagi antar client"""
+        if not self.is_camera_active:
+            return 0, None
+        return self.frames.latest()
     
-    def _get_empty_result(self):
-        """Return empty detection result"""
+    def wait_for_frame(self, last_seq, timeout=0.5):
+        """Tunggu frame yang lebih baru dari last_seq (untuk stream generator)"""
+        if not self.is_camera_active:
+            return last_seq, None
+        return self.frames.wait_newer(last_seq, timeout=timeout)
+
+    def frame_key(self, seq):
+        """Seq keyframe yang mewakili frame seq (sama untuk frame statis berurutan)"""
+        return self.frames.key_of(seq)
+
+    def detect(self, seq, frame, tracking=True):
+        """Deteksi untuk frame seq; frame statis memakai hasil keyframe (reused=True)"""
+        key = self.frame_key(seq)
+        mode = 'track' if tracking and self.tracker is not None else 'detect'
+        cached = self._detection
+        if cached is not None and cached[0] == key and cached[1] == mode:
+            FRAMES_REUSED.labels(kind='detection').inc()
+            return dict(cached[2], reused=True)
+        result = None
+        if mode == 'track':
+            result = self.tracker.update(frame)
+        elif self.process_pool is not None and not self.process_pool.disabled:
+            # Frame disalin ke slot shared memory hanya di sini (bukan di thread capture),
+            # worker membaca slot langsung; None jika slot sudah tertimpa,
+            # worker timeout atau pool rusak -> deteksi di proses ini. Setengah batas
+            # request supaya fallback masih sempat selesai sebelum 504
+            result = self.process_pool.detect(self._share(seq, frame), seq, timeout=REQUEST_TIMEOUT / 2)
+        if result is None:
+            result = self.detector.detect_hands(frame)
+        self._detection = (key, mode, result)
+        return dict(result, reused=False)
+
+    def status(self):
         return {
-            'hands_detected': 0,
-            'confidence': 0.0,
-            'gestures': [],
-            'landmarks': [],
-            'bounding_box': None,
-            'tracking_quality': 'poor'
+            'camera_id': self.camera_id,
+            'source': redact_source(self.source),
+            'kind': self.kind,
+            'active': self.is_camera_active,
+            'width': self.width,
+            'height': self.height,
+            'target_fps': self.fps,
+            'fps': round(self.camera_fps, 2) if self.is_camera_active else 0.0,
+            'last_error': self.last_error,
         }
 
-# Global detector instance
-detector = SimpleDetector()
+class CaptureManager:
+    """Registry sumber video bernama; tiap sumber di-start/stop secara independen"""
+    def __init__(self, detector=None, capture_factory=None, process_pool=None):
+        self.detector = detector
+        self.process_pool = process_pool
+        self.capture_factory = capture_factory
+        self.closed = False
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def add(self, camera_id, source, **profile):
+        """Daftarkan sumber baru (menggantikan sumber lama dengan id yang sama)"""
+        profile.setdefault('capture_factory', self.capture_factory)
+        profile.setdefault('detector', self.detector)
+        profile.setdefault('process_pool', self.process_pool)
+        capture = CaptureSource(camera_id, source, **profile)
+        with self._lock:
+            previous = self._sources.get(camera_id)
+            self._sources[camera_id] = capture
+        if previous is not None:
+            previous.stop()
+        return capture
+
+    def load_config(self, config):
+        """{id: source} atau {id: {source, width, height, fps, loop}}"""
+        for camera_id, entry in config.items():
+            if not isinstance(entry, dict):
+                entry = {'source': entry}
+            entry = dict(entry)
+            source = entry.pop('source', 0)
+            profile = dict(DEFAULT_CAMERA_PROFILE)
+            profile.update({key: entry[key] for key in ('width', 'height', 'fps', 'loop') if key in entry})
+            self.add(str(camera_id), source, **profile)
+
+    def get(self, camera_id=None):
+        return self._sources.get(camera_id or DEFAULT_CAMERA_ID)
+
+    def ids(self):
+        return list(self._sources)
+
+    def start(self, camera_id=None):
+        """Start satu sumber; KeyError jika id tidak terdaftar"""
+        if self.closed:
+            return False
+        source = self.get(camera_id)
+        if source is None:
+            raise KeyError(camera_id)
+        return source.start()
+
+    def stop(self, camera_id=None):
+        source = self.get(camera_id)
+        if source is None:
+            raise KeyError(camera_id)
+        return source.stop()
+
+    def stop_all(self):
+        for source in list(self._sources.values()):
+            source.stop()
+
+    def close(self):
+        """Stop semua sumber dan tolak start baru (shutdown server)"""
+        self.closed = True
+        self.stop_all()
+
+    def status(self):
+        return [source.status() for source in self._sources.values()]
+
+def load_camera_config(value):
+    """SIBI_CAMERAS: JSON inline atau path file JSON; default satu kamera device 0"""
+    if not value:
+        return {DEFAULT_CAMERA_ID: 0}
+    text = value.strip()
+    if not text.startswith('{'):
+        with open(text, 'r', encoding='utf-8') as f:
+            text = f.read()
+    config = json.loads(text)
+    if not isinstance(config, dict) or not config:
+        raise ValueError('SIBI_CAMERAS harus berupa object JSON {id: source}')
+    return config
+
+class ServerBusy(Exception):
+    """Request ditolak karena antrian CPU penuh (503)"""
+    status = 503
+
+class RequestTimedOut(ServerBusy):
+    """Pekerjaan CPU melewati batas waktu request (504)"""
+    status = 504
+
+class CpuWorkerPool:
+    """Pool thread ukuran tetap untuk kerja CPU dengan antrian admisi terbatas.
+
+    Request yang datang saat `max_pending` request sudah menunggu hasil
+    langsung ditolak (503) alih-alih menumpuk di belakang thread request.
+    Timeout hanya berhenti menunggu: pekerjaan yang sudah berjalan tidak bisa
+    dihentikan dan tetap memakai thread worker sampai selesai. Pekerjaan itu
+    dihitung terpisah (`abandoned`, maksimal `workers`), tidak di `pending`,
+    jadi tidak memakan slot admisi request baru.
+    """
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(self.workers, int(max_pending))
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cpu')
+        self._lock = threading.Lock()
+        self.pending = 0  # request yang masih menunggu hasil
+        self.abandoned = 0  # sudah timeout tapi masih berjalan
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _release(self, future):
+        with self._lock:
+            future.released = True
+            if getattr(future, 'abandoned', False):
+                self.abandoned -= 1
+            else:
+                self.pending -= 1
+
+    def run(self, fn, *args, timeout=None):
+        """Jalankan fn(*args) di pool dan tunggu hasilnya"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ServerBusy('Server sibuk, coba lagi')
+            self.pending += 1
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeout:
+            # cancel() hanya berhasil untuk pekerjaan yang belum mulai (callback langsung jalan)
+            cancelled = future.cancel()
+            with self._lock:
+                self.timeouts += 1
+                if not cancelled and not getattr(future, 'released', False):
+                    future.abandoned = True
+                    self.pending -= 1
+                    self.abandoned += 1
+            raise RequestTimedOut('Request timeout')
+
+    def warm(self, fn, timeout=10.0):
+        """Jalankan fn() sekali di setiap thread worker (state per-thread ikut siap)"""
+        # Barrier memaksa executor membuat semua thread sebelum fn dijalankan
+        barrier = threading.Barrier(self.workers)
+        def task():
+            try:
+                barrier.wait(timeout=timeout)
+            except threading.BrokenBarrierError:
+                pass  # ada thread yang sibuk melayani request; warmup seadanya
+            return fn()
+        for future in [self.executor.submit(task) for _ in range(self.workers)]:
+            future.result(timeout=timeout * 2)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def busy_response(error):
+    """Respons 503/504 untuk ServerBusy/RequestTimedOut"""
+    REQUESTS_REJECTED.labels(reason='overload' if error.status == 503 else 'timeout').inc()
+    response = make_payload_response({
+        'success': False,
+        'error': str(error)
+    }, error.status)
+    if error.status == 503:
+        response.headers['Retry-After'] = '1'
+    return response
+
+# Pool CPU bersama semua endpoint, dibuat oleh create_app()
+cpu_pool = None
+
+# Detector global (+ registry backend), sumber kamera bernama, pool proses dan classifier TFLite.
+# Dibuat oleh init_runtime() saat request/warmup pertama, bukan saat import.
+detectors = None
+detector = None
+process_pool = None
+cameras = None
+classifier = None
+runtime_lock = threading.Lock()
+
+def load_classifier():
+    """Muat SignClassifier; server tetap jalan tanpa /classify jika gagal"""
+    try:
+        from sign_classifier import SignClassifier
+        return SignClassifier()
+    except Exception as e:
+        print(f"⚠️ Sign classifier tidak tersedia: {e}")
+        return None
+
+# Model sekuens dimuat saat pertama diminta (butuh Flex; None jika gagal, tidak dicoba ulang)
+sequence_classifiers = {}
+sequence_classifiers_lock = threading.Lock()
+
+def get_sequence_classifier(name):
+    """SequenceClassifier bernama (dimuat sekali); KeyError jika nama tidak dikenal"""
+    from sequence_classifier import SEQUENCE_MODELS, SequenceClassifier
+    if name not in SEQUENCE_MODELS:
+        raise KeyError(name)
+    with sequence_classifiers_lock:
+        if name not in sequence_classifiers:
+            try:
+                sequence_classifiers[name] = SequenceClassifier(
+                    name, stride=SEQUENCE_STRIDE, motion_threshold=SEQUENCE_MOTION,
+                    smoothing=SEQUENCE_SMOOTHING,
+                )
+            except Exception as e:
+                print(f"⚠️ Sequence classifier '{name}' tidak tersedia: {e}")
+                sequence_classifiers[name] = None
+        return sequence_classifiers[name]
+
+def init_runtime():
+    """Buat detector, kamera, pool proses dan classifier (sekali; aman dipanggil berulang)"""
+    global detectors, detector, process_pool, cameras, classifier
+    if cameras is not None:
+        return
+    with runtime_lock:
+        if cameras is not None:
+            return
+        from detector_backends import DetectorRegistry
+        from shared_frames import DetectorProcessPool
+        warnings.filterwarnings('ignore', category=UserWarning)  # Suppress OpenCV warnings
+        detectors = DetectorRegistry(DETECTOR_BACKEND, stages=STAGES, model_path=DETECTOR_MODEL,
+                                     labels_path=DETECTOR_LABELS, scratch=DETECT_SCRATCH)
+        detector = detectors.get()
+        if detector is None:
+            print(f"⚠️ Detector '{DETECTOR_BACKEND}' gagal dimuat, memakai contour")
+            detectors.default = 'contour'
+            detector = detectors.get()
+        process_pool = DetectorProcessPool(DETECT_PROCESSES, detector.name, DETECT_SCRATCH) \
+            if DETECT_PROCESSES > 0 else None
+        manager = CaptureManager(detector, process_pool=process_pool)
+        manager.load_config(load_camera_config(CAMERA_CONFIG))
+        classifier = load_classifier()
+        # cameras di-set terakhir: penanda runtime lengkap untuk thread lain
+        cameras = manager
+
+class WarmupState:
+    """Progres warmup untuk /ready: durasi per langkah, error, dan event selesai"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.started_at = None
+        self.seconds = None
+        self.steps = {}
+        self.error = None
+
+    def status(self):
+        return {
+            'ready': self.done.is_set() and self.error is None,
+            'started': self.started_at is not None,
+            'seconds': self.seconds,
+            'steps': dict(self.steps),
+            'error': self.error,
+        }
+
+warmup_state = WarmupState()
+
+def warmup_frame(width=320, height=240):
+    """Frame sintetis dengan blob terang supaya seluruh jalur kontur ikut jalan"""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[height // 3:height * 2 // 3, width // 3:width // 2] = 200
+    return frame
+
+def run_warmup():
+    """Muat runtime lalu jalankan inferensi & encode JPEG pertama sebelum client datang"""
+    state = warmup_state
+    state.started_at = time.monotonic()
+
+    def step(name, fn):
+        started = time.perf_counter()
+        fn()
+        state.steps[name] = round(time.perf_counter() - started, 4)
+
+    try:
+        step('runtime', init_runtime)
+        frame = warmup_frame()
+        step('detect', lambda: cpu_pool.warm(lambda: detector.detect_hands(frame)))
+        # encode() tidak memakai sumber; cukup broadcaster tanpa kamera
+        broadcaster = JpegBroadcaster(None)
+        step('jpeg_encode', lambda: [broadcaster.encode(frame, name) for name in STREAM_PROFILES])
+        if classifier is not None:
+            features = np.zeros((1, classifier.feature_length), dtype=np.float32)
+            step('classify', lambda: cpu_pool.warm(lambda: classifier.classify(features)))
+        if process_pool is not None:
+            step('detect_processes', process_pool.warmup)
+    except Exception as e:
+        state.error = f'{type(e).__name__}: {e}'
+        logger.warning("Warmup gagal: %s", state.error)
+    state.seconds = round(time.monotonic() - state.started_at, 4)
+    state.done.set()
+    if state.error is None:
+        print(f"🔥 Warmup selesai dalam {state.seconds}s: {state.steps}")
+
+# Builder fitur per sesi untuk paket landmark mentah (/landmarks)
+FEATURE_SESSION_TTL = 60.0  # detik tanpa paket sebelum sesi dibuang
+feature_sessions = {}
+feature_sessions_lock = threading.Lock()
+
+hand_trackers = {}
+hand_trackers_lock = threading.Lock()
+
+sequence_sessions = {}
+sequence_sessions_lock = threading.Lock()
+
+def _purge_session_items(sessions, now):
+    """Buang sesi idle (dipanggil dengan lock store dipegang)"""
+    for key in [k for k, (_, seen) in sessions.items() if now - seen > FEATURE_SESSION_TTL]:
+        del sessions[key]
+
+def _set_session_item(sessions, session_id, item, now):
+    """Simpan item sebagai sesi terbaru; maksimal MAX_SESSIONS (LRU, seperti SessionStore)"""
+    # dict menjaga urutan insert: pop + insert ulang = pindah ke akhir
+    sessions.pop(session_id, None)
+    sessions[session_id] = (item, now)
+    while len(sessions) > MAX_SESSIONS:
+        del sessions[next(iter(sessions))]
+
+def _get_session_item(sessions, lock, session_id, factory):
+    """Objek milik sesi (dibuat jika belum ada); sesi idle dibuang sekalian"""
+    now = time.monotonic()
+    with lock:
+        _purge_session_items(sessions, now)
+        item = sessions.get(session_id, (None, now))[0]
+        if item is None:
+            item = factory()
+        _set_session_item(sessions, session_id, item, now)
+        return item
+
+def get_feature_builder(session_id):
+    """Builder fitur milik sesi"""
+    # Scaler diterapkan oleh classifier, builder menghasilkan fitur mentah
+    from compact_features import CompactFeatureBuilder
+    return _get_session_item(feature_sessions, feature_sessions_lock, session_id, CompactFeatureBuilder)
+
+def get_hand_tracker(session_id, backend=None):
+    """HandTracker milik sesi untuk /detect_hands?session_id=...; track baru jika backend berganti"""
+    from hand_detector import HandTracker
+    backend = backend or detector
+    tracker = _get_session_item(hand_trackers, hand_trackers_lock, session_id, lambda: HandTracker(backend))
+    if tracker.detector is not backend:
+        tracker = HandTracker(backend)
+        with hand_trackers_lock:
+            _set_session_item(hand_trackers, session_id, tracker, time.monotonic())
+    return tracker
+
+# Backend deteksi pilihan sesi: ?detector= sekali, request berikutnya dengan session_id sama ikut
+session_detectors = {}
+session_detectors_lock = threading.Lock()
+
+def requested_detector(session_id=None):
+    """(backend, None) dari ?detector=, pilihan sesi, atau default; (None, response) jika tidak valid"""
+    name = (request.args.get('detector') or '').strip().lower() or None
+    if session_id and name is None:
+        with session_detectors_lock:
+            _purge_session_items(session_detectors, time.monotonic())
+            name = session_detectors.get(session_id, (None, 0))[0]
+    try:
+        backend = detectors.get(name)
+    except KeyError:
+        from detector_backends import DETECTOR_BACKENDS
+        return None, make_payload_response({
+            'success': False,
+            'error': f'Unknown detector: {name}',
+            'detectors': list(DETECTOR_BACKENDS)
+        }, 404)
+    if backend is None:
+        return None, make_payload_response({
+            'success': False,
+            'error': f'Detector {name} not available',
+            'detectors': detectors.status()
+        }, 503)
+    # Hanya nama yang valid yang diingat, supaya salah ketik tidak menempel di sesi
+    if session_id and name is not None:
+        with session_detectors_lock:
+            _set_session_item(session_detectors, session_id, name, time.monotonic())
+    return backend, None
+
+def get_sequence_session(session_id, engine):
+    """Window streaming milik sesi untuk model sekuens engine"""
+    return _get_session_item(sequence_sessions, sequence_sessions_lock,
+                             (session_id, engine.name), engine.new_session)
+
+def new_sentence_assembler():
+    from sentence_session import SentenceAssembler
+    return SentenceAssembler(SENTENCE_MAX_WORDS, SENTENCE_TIMEOUT)
+
+def new_prediction_session(sentence=None):
+    from sentence_session import PredictionSession
+    if sentence is None:
+        sentence = SENTENCE_ENABLED
+    return PredictionSession(
+        STABLE_WINDOW, STABLE_VOTES, STABLE_MIN_CONFIDENCE, STABLE_REPEAT_AFTER,
+        assembler=new_sentence_assembler() if sentence else None,
+    )
+
+# Riwayat prediksi per (sumber, session_id): voting + commit kata; sesi idle dibuang otomatis.
+# Sumber = 'landmarks', 'sequence:<model>' atau 'detect:<backend>', agar label dari ruang
+# label berbeda tidak tercampur di satu window meski client memakai session_id yang sama.
+# SessionStore dibuat oleh create_app()
+prediction_sessions = None
+
+def sentence_requested(data=None):
+    """sentence=1/0 di query atau body JSON menimpa default SIBI_SENTENCE"""
+    value = (data or {}).get('sentence', request.args.get('sentence'))
+    if value is None:
+        return SENTENCE_ENABLED
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def stabilize(session, label, confidence, sentence=False):
+    """Masukkan prediksi ke sesi stabilisasi; return status stabil + event commit"""
+    if sentence and session.assembler is None:
+        session.assembler = new_sentence_assembler()
+    state = session.push(label, confidence)
+    if state['events']:
+        WORDS_COMMITTED.inc(len(state['events']))
+    return state
+
+def stabilize_for(source, session_id, label, confidence, data=None):
+    """stabilize() untuk sesi (source, session_id) di store bersama (endpoint HTTP)"""
+    session = prediction_sessions.get((source, str(session_id)))
+    return stabilize(session, label, confidence, sentence_requested(data))
+
+def detection_label(result):
+    """Label hasil deteksi untuk stabilisasi; '' (idle) untuk backend tanpa label model"""
+    if not result['gestures']:
+        return ''
+    try:
+        backend = detectors.get(result.get('backend'))
+    except KeyError:
+        return ''
+    return result['gestures'][0] if getattr(backend, 'LABELED', False) else ''
+
+def sessions_of(session_id):
+    """Key store untuk session_id di semua sumber"""
+    return [key for key in prediction_sessions.keys() if key[1] == session_id]
+
+def tracking_requested():
+    """?track=0/1 menimpa default SIBI_TRACKING"""
+    value = request.args.get('track')
+    if value is None:
+        return TRACKING_ENABLED
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Batas jumlah vektor fitur per request /classify
+MAX_CLASSIFY_BATCH = 256
+
+# Batas jumlah frame per request /detect_hands_batch
+MAX_BATCH_SIZE = 32
+
+# Pool untuk decode JPEG paralel (cv2.imdecode melepas GIL), dibuat oleh create_app()
+decode_pool = None
+
+def decode_image_bytes(image_data):
+    """Decode bytes JPEG/PNG ke frame BGR OpenCV, None jika tidak valid"""
+    if not image_data:
+        return None
+    nparr = np.frombuffer(image_data, np.uint8)
+    with STAGES['imdecode'].time():
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+# Content-Type yang dibaca langsung sebagai bytes gambar (tanpa base64/JSON)
+BINARY_IMAGE_TYPES = ('image/jpeg', 'image/png', 'application/octet-stream')
+
+def read_request_body():
+    """Baca body request ke satu buffer yang dialokasikan sekali (tanpa join/copy antara)"""
+    length = request.content_length
+    if not length:
+        return request.get_data(cache=False)
+    buffer = bytearray(length)
+    view = memoryview(buffer)
+    stream = request.stream
+    read = 0
+    while read < length:
+        n = stream.readinto(view[read:])
+        if not n:
+            break
+        read += n
+    return view[:read]
+
+def read_upload(file_storage):
+    """Bytes dari upload multipart; pakai buffer BytesIO langsung jika tersedia"""
+    stream = file_storage.stream
+    if hasattr(stream, 'getbuffer'):
+        return stream.getbuffer()
+    return stream.read()
+
+def read_request_payload():
+    """Ambil bytes gambar yang belum di-decode dari body biner, multipart, atau JSON base64.
+
+    Return (payload, decode, error): decode(payload) -> frame BGR, error berupa
+    pesan untuk respons 400. Base64 langsung dibuka di sini agar payload (dan key
+    cache) sama untuk gambar yang sama lewat transport mana pun.
+    """
+    mimetype = request.mimetype
+    if mimetype in BINARY_IMAGE_TYPES:
+        return read_request_body(), decode_image_bytes, None
+    if request.files:
+        upload = request.files.get('image') or next(iter(request.files.values()))
+        return read_upload(upload), decode_image_bytes, None
+    data = request.get_json(silent=True)
+    if not data or 'image' not in data:
+        return None, None, 'No image data provided'
+    try:
+        with STAGES['base64_decode'].time():
+            return base64.b64decode(data['image']), decode_image_bytes, None
+    except (TypeError, ValueError):
+        return None, None, 'Invalid image data'
+
+class ResultCache:
+    """LRU + TTL untuk hasil deteksi, key = hash bytes gambar (JPEG/PNG) sebelum imdecode"""
+    def __init__(self, max_entries=256, ttl=30.0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(payload):
+        """Digest bytes gambar; base64 JSON sudah di-decode sehingga sama dengan body biner"""
+        # blake2b: cepat di C dan tahan kolisi sengaja dari client lain
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                RESULT_CACHE.labels(result='hit').inc()
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        RESULT_CACHE.labels(result='miss').inc()
+        return None
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses}
+
+result_cache = None  # ResultCache, dibuat oleh create_app()
+
+# Format respons yang bisa dinegosiasikan via Accept atau ?format=
+RESPONSE_FORMATS = {
+    'msgpack': ('application/msgpack', 'application/x-msgpack'),
+    'cbor': ('application/cbor',),
+}
+
+def negotiate_format():
+    """Pilih format respons: json (default), msgpack atau cbor"""
+    requested = request.args.get('format')
+    if requested is None:
+        accept = request.accept_mimetypes
+        best = accept.best_match(
+            ['application/json'] + [m for types in RESPONSE_FORMATS.values() for m in types],
+            default='application/json'
+        )
+        requested = next(
+            (name for name, types in RESPONSE_FORMATS.items() if best in types), 'json'
+        )
+    if requested == 'msgpack' and msgpack is not None:
+        return 'msgpack'
+    if requested == 'cbor' and cbor2 is not None:
+        return 'cbor'
+    return 'json'
+
+def make_payload_response(payload, status=200):
+    """Serialize payload sesuai format yang dinegosiasikan"""
+    fmt = negotiate_format()
+    with STAGES[f'{fmt}_serialize'].time():
+        if fmt == 'msgpack':
+            response = Response(msgpack.packb(payload, use_bin_type=True),
+                                mimetype=RESPONSE_FORMATS['msgpack'][0])
+        elif fmt == 'cbor':
+            response = Response(cbor2.dumps(payload), mimetype=RESPONSE_FORMATS['cbor'][0])
+        else:
+            response = jsonify(payload)
+    response.status_code = status
+    response.vary.add('Accept')
+    return response
+
+def decode_and_detect_batch(decode, payloads, backend=None):
+    """Decode paralel lalu deteksi batch; return (images, results)"""
+    images = list(decode_pool.map(decode, payloads))
+    return images, (backend or detector).detect_hands_batch(images)
+
+def decode_base64_image(encoded):
+    """Decode string base64 ke frame BGR, None jika tidak valid"""
+    try:
+        with STAGES['base64_decode'].time():
+            image_data = base64.b64decode(encoded)
+        return decode_image_bytes(image_data)
+    except Exception:
+        return None
 
 def cleanup_resources():
     """Clean up all resources"""
     print("🧹 Cleaning up resources...")
-    detector.stop_camera()
-    # Force cleanup of OpenCV resources
-    cv2.destroyAllWindows()
+    if cameras is not None:
+        cameras.close()
+    if process_pool is not None:
+        process_pool.shutdown()
+    # Unlink blok shared memory yang tersisa (juga saat SIGINT/SIGTERM)
+    if 'shared_frames' in sys.modules:
+        sys.modules['shared_frames'].close_all()
+    if decode_pool is not None:
+        decode_pool.shutdown(wait=False)
+    if cpu_pool is not None:
+        cpu_pool.shutdown()
+    # Force cleanup of OpenCV resources (tidak tersedia di opencv-headless);
+    # jangan import OpenCV hanya untuk cleanup
+    if 'cv2' in sys.modules:
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass
     # Clean up multiprocessing resources
     try:
         for child in multiprocessing.active_children():
@@ -205,137 +1422,549 @@ def signal_handler(sig, frame):
     cleanup_resources()
     sys.exit(0)
 
-# Register cleanup handlers
-atexit.register(cleanup_resources)
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+def build_app():
+    """App Flask + CORS + blueprint route + /ws (tanpa pool, warmup atau handler)"""
+    global app, sock
+    if app is not None:
+        return app
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(bp)
+    if SERVER_MODE == 'asgi':
+        app.route('/ws')(ws_unavailable)
+    elif Sock is not None:
+        sock = Sock(app)
+        sock.route('/ws')(stream_socket)
+    return app
+
+app_configured = False
+
+def create_app(warmup=None, background=True, handle_signals=True):
+    """Application factory: .env, metrik, app, pool, logging, handler shutdown dan warmup.
+
+    Import modul tidak melakukan semua ini; panggil sekali sebelum melayani
+    request. warmup di background membuat server langsung menerima koneksi
+    sementara /ready tetap 503 sampai inferensi & encode pertama selesai.
+    warmup=None mengikuti SIBI_WARMUP.
+    """
+    global app_configured, request_log, cpu_pool, decode_pool, result_cache, prediction_sessions
+    if app_configured:
+        return app
+    app_configured = True
+
+    from metrics import SampledLogger
+    from sentence_session import SessionStore
+    load_config()
+    init_metrics()
+    build_app()
+    request_log = SampledLogger(logger, LOG_SAMPLE_EVERY)
+    cpu_pool = CpuWorkerPool(CPU_WORKERS, MAX_PENDING, REQUEST_TIMEOUT)
+    decode_pool = ThreadPoolExecutor(
+        max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='decode'
+    )
+    result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+    prediction_sessions = SessionStore(new_prediction_session, ttl=SESSION_TTL, max_sessions=MAX_SESSIONS)
+
+    logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if TRACE_MALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    # Fix multiprocessing resource leak
+    try:
+        multiprocessing.set_start_method('spawn', force=True)
+    except RuntimeError:
+        pass  # Already set
 
-@app.route('/health', methods=['GET'])
+    # Register cleanup handlers (signal hanya bisa dari main thread)
+    atexit.register(cleanup_resources)
+    if handle_signals and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+    if warmup is None:
+        warmup = WARMUP_ENABLED
+    if not warmup:
+        warmup_state.done.set()
+    elif background:
+        threading.Thread(target=run_warmup, name='warmup', daemon=True).start()
+    else:
+        run_warmup()
+    return app
+
+# Endpoint yang tidak memicu init_runtime() (probe tidak boleh ikut memuat model)
+PROBE_ENDPOINTS = {'sibi.health_check', 'sibi.ready_check', 'sibi.metrics_endpoint'}
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # Runtime dimuat saat request pertama jika warmup belum/tidak dijalankan
+    if request.endpoint not in PROBE_ENDPOINTS:
+        init_runtime()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    started = getattr(g, 'request_started', None)
+    if started is not None and metrics.enabled:
+        REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - started)
+    REQUESTS.labels(endpoint=endpoint, status=response.status_code).inc()
+    return response
+
+@bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Metrik hot path dalam format teks Prometheus"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness; lihat /ready untuk kesiapan)"""
+    default_camera = cameras.get() if cameras is not None else None
     return jsonify({
         'status': 'healthy',
         'message': 'Simple Python Server is running',
-        'camera_active': detector.is_camera_active
+        'ready': warmup_state.done.is_set() and warmup_state.error is None,
+        'camera_active': default_camera is not None and default_camera.is_camera_active,
+        'cameras': {source['camera_id']: source['active'] for source in cameras.status()} if cameras is not None else {},
+        'classifier_ready': classifier is not None,
+        # Hanya model sekuens yang sudah pernah diminta (dimuat saat pertama dipakai)
+        'sequence_models': {name: engine is not None for name, engine in sequence_classifiers.items()},
+        'detector': detector.name if detector is not None else None,
+        'detect_processes': process_pool.status() if process_pool is not None else None,
+        'result_cache': result_cache.stats(),
+        'prediction_sessions': len(prediction_sessions)
     })
 
-@app.route('/start_camera', methods=['POST'])
+@bp.route('/ready', methods=['GET'])
+def ready_check():
+    """Readiness: 200 setelah warmup selesai, 503 selama masih memuat"""
+    status = warmup_state.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@bp.route('/detectors', methods=['GET'])
+def list_detectors():
+    """Backend deteksi: ketersediaan dan biaya per frame (EMA ms) untuk routing"""
+    return jsonify({'default': detectors.default, 'detectors': detectors.status()})
+
+@bp.route('/sessions/<session_id>', methods=['GET', 'DELETE'])
+def prediction_session(session_id):
+    """Status stabilisasi/kalimat sesi per sumber (GET) atau buang semuanya (DELETE)"""
+    keys = sessions_of(session_id)
+    if request.method == 'DELETE':
+        return jsonify({'success': any([prediction_sessions.discard(key) for key in keys])})
+    sessions = {key[0]: prediction_sessions.get(key, create=False) for key in keys}
+    data = {source: session.snapshot() for source, session in sessions.items() if session is not None}
+    if not data:
+        return jsonify({'success': False, 'error': f'Unknown session: {session_id}'}), 404
+    return jsonify({'success': True, 'session_id': session_id, 'data': data})
+
+def requested_camera_id():
+    """Id sumber dari ?camera= atau body {"camera_id": ...}; default 'default'"""
+    camera_id = request.args.get('camera')
+    if not camera_id and request.method == 'POST':
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            camera_id = body.get('camera_id')
+    return str(camera_id or DEFAULT_CAMERA_ID)
+
+def unknown_camera_response(camera_id):
+    return jsonify({
+        'success': False,
+        'error': f'Unknown camera: {camera_id}',
+        'cameras': cameras.ids()
+    }), 404
+
+@bp.route('/cameras', methods=['GET'])
+def list_cameras():
+    """Daftar sumber video beserta status dan profilnya"""
+    return jsonify({'cameras': cameras.status()})
+
+@bp.route('/start_camera', methods=['POST'])
 def start_camera():
     """Mulai kamera"""
+    camera_id = requested_camera_id()
     try:
-        print("🎥 Starting camera...")
-        success = detector.start_camera()
-        print(f"🎥 Camera start result: {success}")
+        logger.info("Starting camera %s...", camera_id)
+        success = cameras.start(camera_id)
+        logger.info("Camera start result: %s", success)
+        source = cameras.get(camera_id)
         return jsonify({
             'success': success,
-            'message': 'Kamera dimulai' if success else 'Gagal memulai kamera'
+            'camera_id': camera_id,
+            'message': 'Kamera dimulai' if success else (source.last_error or 'Gagal memulai kamera')
         })
+    except KeyError:
+        return unknown_camera_response(camera_id)
     except Exception as e:
-        print(f"❌ Error starting camera: {e}")
+        logger.warning("Error starting camera: %s", e)
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
         }), 500
 
-@app.route('/stop_camera', methods=['POST'])
+@bp.route('/stop_camera', methods=['POST'])
 def stop_camera():
     """Hentikan kamera"""
+    camera_id = requested_camera_id()
     try:
-        success = detector.stop_camera()
+        success = cameras.stop(camera_id)
         return jsonify({
             'success': success,
+            'camera_id': camera_id,
             'message': 'Kamera dihentikan' if success else 'Gagal menghentikan kamera'
         })
+    except KeyError:
+        return unknown_camera_response(camera_id)
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
         }), 500
 
-@app.route('/detect_hands', methods=['POST'])
+@bp.route('/detect_hands', methods=['POST'])
 def detect_hands():
-    """Deteksi tangan dari image yang dikirim"""
+    """Deteksi tangan dari image yang dikirim (raw bytes, multipart, atau JSON base64)"""
     try:
-        data = request.get_json()
-        if not data or 'image' not in data:
-            return jsonify({
+        payload, decode, error = read_request_payload()
+        if error:
+            return make_payload_response({
                 'success': False,
-                'error': 'No image data provided'
-            }), 400
-        
-        # Decode base64 image
-        image_data = base64.b64decode(data['image'])
+                'error': error
+            }, 400)
         
-        # Convert to OpenCV format
-        nparr = np.frombuffer(image_data, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Hasil tracking bergantung state sesi, jadi hanya deteksi stateless yang di-cache
+        session_id = request.args.get('session_id')
+        backend, error = requested_detector(session_id)
+        if error:
+            return error
+        tracking = bool(session_id) and tracking_requested()
+        cache_key = None
+        if result_cache.enabled and not tracking:
+            # Gambar duplikat/retry: cukup hash, tanpa decode dan deteksi (per backend)
+            cache_key = result_cache.key(payload) + backend.name.encode()
+            result = result_cache.get(cache_key)
+            if result is not None:
+                return make_payload_response({
+                    'success': True,
+                    'data': result,
+                    'cached': True
+                })
         
+        image = decode(payload)
         if image is None:
-            return jsonify({
+            return make_payload_response({
                 'success': False,
                 'error': 'Invalid image data'
-            }), 400
+            }, 400)
         
-        # Deteksi tangan
-        result = detector.detect_hands(image)
+        # Deteksi tangan di pool CPU; dengan session_id box sebelumnya dipakai sebagai ROI
+        if tracking:
+            result = cpu_pool.run(get_hand_tracker(session_id, backend).update, image)
+        else:
+            result = cpu_pool.run(backend.detect_hands, image)
+        if cache_key is not None:
+            result_cache.put(cache_key, result)
         
-        return jsonify({
+        return make_payload_response({
             'success': True,
-            'data': result
+            'data': result,
+            'cached': False
         })
         
+    except ServerBusy as e:
+        return busy_response(e)
     except Exception as e:
-        return jsonify({
+        return make_payload_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
+
+@bp.route('/detect_hands_batch', methods=['POST'])
+def detect_hands_batch():
+    """Deteksi tangan untuk beberapa image sekaligus (JSON base64 atau multipart)"""
+    try:
+        if request.files:
+            # Multipart: semua file dalam urutan upload
+            uploads = request.files.getlist('images') or list(request.files.values())
+            payloads = [read_upload(f) for f in uploads]
+            decode = decode_image_bytes
+        else:
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data.get('images'), list):
+                return make_payload_response({
+                    'success': False,
+                    'error': 'No images provided'
+                }, 400)
+            payloads = data['images']
+            decode = decode_base64_image
+        
+        if not payloads:
+            return make_payload_response({
+                'success': False,
+                'error': 'No images provided'
+            }, 400)
+        if len(payloads) > MAX_BATCH_SIZE:
+            return make_payload_response({
+                'success': False,
+                'error': f'Batch terlalu besar (maks {MAX_BATCH_SIZE})'
+            }, 413)
+        
+        backend, error = requested_detector()
+        if error:
+            return error
+        
+        # Decode paralel, urutan hasil tetap sama dengan input
+        images, results = cpu_pool.run(decode_and_detect_batch, decode, payloads, backend)
+        
+        return make_payload_response({
+            'success': True,
+            'count': len(results),
+            'invalid': [i for i, image in enumerate(images) if image is None],
+            'data': results
+        })
+        
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return make_payload_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/classify', methods=['POST'])
+def classify():
+    """Klasifikasi vektor fitur compact (satu vektor atau batch) dengan model TFLite"""
+    try:
+        if classifier is None:
+            return make_payload_response({
+                'success': False,
+                'error': 'Classifier not available'
+            }, 503)
+        
+        data = request.get_json(silent=True)
+        if not data or 'features' not in data:
+            return make_payload_response({
+                'success': False,
+                'error': 'No features provided'
+            }, 400)
+        
+        features = np.asarray(data['features'], dtype=np.float32)
+        single = features.ndim == 1
+        if not single and len(features) > MAX_CLASSIFY_BATCH:
+            return make_payload_response({
+                'success': False,
+                'error': f'Batch terlalu besar (maks {MAX_CLASSIFY_BATCH})'
+            }, 413)
+        
+        try:
+            results = cpu_pool.run(classifier.classify, features, data.get('top_k'))
+        except ValueError as e:
+            return make_payload_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+        
+        return make_payload_response({
+            'success': True,
+            'data': results[0] if single else results
+        })
+        
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return make_payload_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/landmarks', methods=['POST'])
+def landmarks():
+    """Terima paket landmark mentah per sesi, bangun fitur compact lalu klasifikasi"""
+    try:
+        data = request.get_json(silent=True)
+        if not data or 'pose' not in data:
+            return make_payload_response({
+                'success': False,
+                'error': 'No landmark packet provided'
+            }, 400)
+        
+        session_id = str(data.get('session_id') or request.remote_addr)
+        builder = get_feature_builder(session_id)
+        try:
+            builder.add_packet(
+                data['pose'],
+                data.get('left_hand', data.get('leftHand')),
+                data.get('right_hand', data.get('rightHand')),
+            )
+        except (TypeError, ValueError) as e:
+            return make_payload_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+        
+        features = builder.build_feature_vector()
+        payload = {
+            'session_id': session_id,
+            'frames': len(builder),
+        }
+        if classifier is not None:
+            prediction = cpu_pool.run(classifier.classify, features, data.get('top_k'))[0]
+            payload['prediction'] = prediction
+            payload['session'] = stabilize_for(
+                'landmarks', session_id, prediction['label'], prediction['confidence'], data)
+        if data.get('return_features'):
+            payload['features'] = features.tolist()
+        
+        return make_payload_response({
+            'success': True,
+            'data': payload
+        })
+        
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return make_payload_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/classify_sequence', methods=['POST'])
+def classify_sequence():
+    """Klasifikasi model sekuens: frame fitur per sesi (streaming) atau window lengkap"""
+    try:
+        data = request.get_json(silent=True)
+        if not data or 'features' not in data:
+            return make_payload_response({
+                'success': False,
+                'error': 'No features provided'
+            }, 400)
+        
+        name = str(data.get('model') or 'movenet')
+        try:
+            engine = get_sequence_classifier(name)
+        except KeyError:
+            from sequence_classifier import SEQUENCE_MODELS
+            return make_payload_response({
+                'success': False,
+                'error': f'Unknown sequence model: {name}',
+                'models': list(SEQUENCE_MODELS)
+            }, 404)
+        if engine is None:
+            return make_payload_response({
+                'success': False,
+                'error': f'Sequence model {name} not available'
+            }, 503)
+        
+        features = np.asarray(data['features'], dtype=np.float32)
+        top_k = data.get('top_k')
+        session_id = data.get('session_id')
+        try:
+            if session_id is None:
+                # Tanpa sesi: window lengkap [seq_len, fitur] atau batch [N, seq_len, fitur]
+                results = cpu_pool.run(engine.classify_windows, features, top_k)
+                payload = results[0] if features.ndim == 2 else results
+            else:
+                # Dengan sesi: satu frame [fitur] atau beberapa frame [M, fitur] berurutan
+                session = get_sequence_session(str(session_id), engine)
+                if data.get('reset'):
+                    session.reset()
+                frames = features[np.newaxis] if features.ndim == 1 else features
+                if frames.ndim != 2 or not 1 <= len(frames) <= engine.sequence_length:
+                    raise ValueError(f'Kirim 1-{engine.sequence_length} frame berisi {engine.feature_length} fitur')
+                payload = cpu_pool.run(lambda: [session.push(frame, top_k) for frame in frames][-1])
+                payload['session_id'] = str(session_id)
+                if payload['prediction'] is not None and payload['invoked']:
+                    # Hanya invoke baru yang dihitung sebagai suara
+                    prediction = payload['prediction']
+                    payload['session'] = stabilize_for(
+                        f'sequence:{name}', session_id, prediction['label'], prediction['confidence'], data)
+        except ValueError as e:
+            return make_payload_response({
+                'success': False,
+                'error': str(e)
+            }, 400)
+        
+        return make_payload_response({
+            'success': True,
+            'model': name,
+            'data': payload
+        })
+        
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return make_payload_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
 
-@app.route('/detect_hands_realtime', methods=['GET'])
+@bp.route('/detect_hands_realtime', methods=['GET'])
 def detect_hands_realtime():
     """Deteksi tangan real-time dari kamera"""
     try:
-        if detector._shutdown_flag:
-            return jsonify({
+        if cameras.closed:
+            return make_payload_response({
                 'success': False,
                 'error': 'Server is shutting down'
-            }), 503
+            }, 503)
+        
+        camera_id = requested_camera_id()
+        source = cameras.get(camera_id)
+        if source is None:
+            return make_payload_response({
+                'success': False,
+                'error': f'Unknown camera: {camera_id}'
+            }, 404)
         
-        print(f"🔍 Detect hands realtime - Camera active: {detector.is_camera_active}")
+        request_log.log(logging.DEBUG, "Detect hands realtime - camera %s active: %s", camera_id, source.is_camera_active)
         
-        if not detector.is_camera_active:
-            print("❌ Camera not active, returning 400")
-            return jsonify({
+        if not source.is_camera_active:
+            request_log.log(logging.INFO, "Camera not active, returning 400")
+            return make_payload_response({
                 'success': False,
                 'error': 'Camera not active'
-            }), 400
+            }, 400)
         
         # Ambil frame dari kamera
-        frame = detector.get_frame()
+        seq, frame = source.get_latest_frame()
         if frame is None:
-            print("❌ No frame available, returning 400")
-            return jsonify({
+            request_log.log(logging.INFO, "No frame available, returning 400")
+            return make_payload_response({
                 'success': False,
                 'error': 'No camera frame available'
-            }), 400
+            }, 400)
         
-        print("✅ Frame obtained, detecting hands...")
-        # Deteksi tangan
-        result = detector.detect_hands(frame)
-        print(f"🤖 Detection result: {result}")
+        session_id = request.args.get('session_id')
+        backend, error = requested_detector(session_id)
+        if error:
+            return error
+        if backend is detector:
+            # Deteksi tangan (tracking per kamera); frame statis memakai hasil sebelumnya
+            result = cpu_pool.run(source.detect, seq, frame, tracking_requested())
+        else:
+            # Backend lain: deteksi langsung pada frame terbaru (tanpa state kamera)
+            result = cpu_pool.run(backend.detect_hands, frame)
+        request_log.log(logging.DEBUG, "Detection result: %s", result)
         
-        return jsonify({
+        response = {
             'success': True,
             'data': result
-        })
+        }
+        if session_id:
+            # Hasil bisa dipakai ulang antar client, jadi status sesi di luar 'data'.
+            # Penanda 'Tangan terdeteksi' backend contour/skin masuk sebagai idle, bukan kata
+            response['session'] = stabilize_for(
+                f'detect:{backend.name}', session_id, detection_label(result), result['confidence'])
+        return make_payload_response(response)
         
+    except ServerBusy as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"❌ Exception in detect_hands_realtime: {e}")
-        return jsonify({
+        logger.warning("Exception in detect_hands_realtime: %s", e)
+        return make_payload_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
 
-@app.route('/gestures', methods=['GET'])
+@bp.route('/gestures', methods=['GET'])
 def get_gestures():
     """Dapatkan daftar gesture yang tersedia"""
     gestures = [
@@ -363,67 +1992,378 @@ def get_gestures():
         'gestures': gestures
     })
 
-@app.route('/video_feed')
+@bp.route('/video_feed')
 def video_feed():
     """Stream video dari kamera Python ke Flutter"""
+    camera_id = requested_camera_id()
+    source = cameras.get(camera_id)
+    if source is None:
+        return unknown_camera_response(camera_id)
+    broadcaster = source.broadcaster
+    profile = broadcaster.resolve_profile(request.args.get('profile', 'default'))
+    # ?fps= target FPS, ?max_kbps= batas bitrate, ?adaptive=0 untuk profil tetap
+    try:
+        target_fps = float(request.args.get('fps', STREAM_DEFAULT_FPS))
+        max_kbps = float(request.args.get('max_kbps', 0))
+    except ValueError:
+        return jsonify({'error': 'fps dan max_kbps harus berupa angka'}), 400
+    controller = StreamRateController(
+        target_fps,
+        max_bitrate=max_kbps * 1000 if max_kbps > 0 else None,
+        profile=profile,
+        ladder=ADAPTIVE_LADDER if request.args.get('adaptive', '1') != '0' else (profile,),
+        load=lambda: cpu_pool.pending / cpu_pool.max_pending,
+    )
+    
     def generate_frames():
-        while detector.is_camera_active and not detector._shutdown_flag:
-            try:
-                frame = detector.get_frame()
-                if frame is not None:
-                    # Frame sudah kecil (320x240), tidak perlu resize lagi
-                    # Encode frame sebagai JPEG dengan quality sangat rendah
-                    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 30])
-                    if ret:
-                        frame_bytes = buffer.tobytes()
+        last_seq = 0
+        active = ACTIVE_STREAMS.labels(kind='mjpeg')
+        dropped = FRAMES_DROPPED.labels(source='video_feed')
+        active.inc()
+        try:
+            while source.is_camera_active and not cameras.closed:
+                try:
+                    # Deadline per frame menggantikan sleep tetap; waktu baca/encode ikut dihitung
+                    controller.wait_deadline()
+                    # JPEG di-encode sekali per (frame, profil) dan dibagi ke semua viewer
+                    seq, frame_bytes, _ = broadcaster.wait_next(last_seq, controller.profile)
+                    if frame_bytes is not None:
+                        # Frame yang sengaja dilewati karena FPS diturunkan tidak dihitung drop
+                        if last_seq and seq - last_seq > 1 and controller.fps >= source.fps:
+                            dropped.inc(seq - last_seq - 1)
+                        last_seq = seq
+                        sent_at = time.perf_counter()
                         yield (b'--frame\r\n'
                                b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                time.sleep(0.1)  # 10 FPS untuk mengurangi beban
-            except Exception as e:
-                print(f"❌ Video stream error: {e}")
-                break
+                        controller.record(len(frame_bytes), time.perf_counter() - sent_at)
+                except Exception as e:
+                    logger.warning("Video stream error: %s", e)
+                    break
+        finally:
+            active.dec()
     
     return Response(generate_frames(),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
-@app.route('/frame')
+@bp.route('/frame')
 def get_frame():
     """Get single frame as JPEG"""
     try:
-        if not detector.is_camera_active:
+        camera_id = requested_camera_id()
+        source = cameras.get(camera_id)
+        if source is None:
+            return unknown_camera_response(camera_id)
+        if not source.is_camera_active:
             return jsonify({'error': 'Camera not active'}), 400
         
-        frame = detector.get_frame()
-        if frame is None:
+        seq, frame_bytes, reused = source.broadcaster.latest(request.args.get('profile', 'default'))
+        if seq == 0:
             return jsonify({'error': 'No frame available'}), 400
         
-        # Frame sudah kecil (320x240), tidak perlu resize lagi
-        # Encode frame sebagai JPEG dengan quality sangat rendah
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 30])
-        if ret:
-            return Response(buffer.tobytes(), mimetype='image/jpeg')
+        if frame_bytes is not None:
+            response = Response(frame_bytes, mimetype='image/jpeg')
+            response.headers['X-Frame-Seq'] = str(seq)
+            response.headers['X-Frame-Reused'] = '1' if reused else '0'
+            return response
         else:
             return jsonify({'error': 'Failed to encode frame'}), 500
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-if __name__ == '__main__':
+# Confidence minimum sebelum hasil stream dianggap gesture (sama dengan client Flutter)
+STREAM_MIN_CONFIDENCE = 0.10
+
+class StreamSession:
+    """State per koneksi streaming; hanya pesan terbaru yang menunggu diproses.
+
+    Pesan yang datang saat worker masih sibuk menimpa pesan yang belum
+    diproses (dihitung sebagai dropped), sehingga client lambat tidak pernah
+    menumpuk antrian dan hasil selalu untuk frame terbaru.
+    """
+    def __init__(self, ws, session_id, sentence=None, backend=None):
+        from compact_features import CompactFeatureBuilder
+        from hand_detector import HandTracker
+        self.ws = ws
+        self.session_id = session_id
+        self.builder = CompactFeatureBuilder()
+        self.builder_lock = threading.Lock()
+        self.detector = backend or detector
+        self.tracker = HandTracker(self.detector) if TRACKING_ENABLED else None
+        # Voting + commit kata milik koneksi ini (tidak lewat store bersama)
+        self.predictions = new_prediction_session(sentence)
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self._pending = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+
+    def add_landmarks(self, message):
+        """Semua paket landmark masuk window (O(1)); hanya klasifikasinya yang boleh di-drop"""
+        with self.builder_lock:
+            self.builder.add_packet(
+                message.get('pose'),
+                message.get('left_hand', message.get('leftHand')),
+                message.get('right_hand', message.get('rightHand')),
+            )
+
+    def reset(self):
+        with self.builder_lock:
+            self.builder.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+        self.predictions.reset()
+
+    def submit(self, message):
+        """Taruh pesan terbaru, buang pesan lama yang belum diproses"""
+        with self._cond:
+            self.received += 1
+            if self._pending is not None:
+                self.dropped += 1
+                FRAMES_DROPPED.labels(source='ws').inc()
+            self._pending = message
+            self._cond.notify()
+
+    def next_message(self):
+        """Ambil pesan berikutnya (blocking); None jika sesi ditutup"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is not None or self._closed)
+            message, self._pending = self._pending, None
+            return message
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def send(self, payload):
+        """Kirim JSON ke client (thread-safe)"""
+        with self._send_lock:
+            self.ws.send(json.dumps(payload))
+
+    def process(self, message):
+        """Jalankan deteksi/klasifikasi untuk satu pesan dan bangun payload hasil"""
+        kind = message.get('type')
+        if kind == 'frame':
+            raw = message.get('bytes')
+            image = decode_image_bytes(raw) if raw is not None else decode_base64_image(message.get('image', ''))
+            if image is None:
+                return {'type': 'error', 'error': 'Invalid image data'}
+            track = self.tracker.update if self.tracker is not None else self.detector.detect_hands
+            return self._detection_result(track(image))
+        if kind == 'camera':
+            # Pengganti polling /detect_hands_realtime: deteksi pada frame kamera server terbaru
+            source = cameras.get(message.get('camera'))
+            if source is None:
+                return {'type': 'error', 'error': f"Unknown camera: {message.get('camera')}"}
+            seq, frame = source.get_latest_frame()
+            if frame is None:
+                return {'type': 'error', 'error': 'No camera frame available'}
+            result = self._detection_result(source.detect(seq, frame, TRACKING_ENABLED))
+            result['frame_seq'] = seq
+            result['reused'] = result['data']['reused']
+            return result
+        if kind == 'landmarks':
+            # Paket sudah masuk window saat diterima; di sini hanya klasifikasi window terbaru
+            if classifier is None:
+                return {'type': 'error', 'error': 'Classifier not available'}
+            with self.builder_lock:
+                features = self.builder.build_feature_vector()
+                frames = len(self.builder)
+            prediction = classifier.classify(features)[0]
+            status = 'ok' if prediction['confidence'] >= STREAM_MIN_CONFIDENCE else 'low_confidence'
+            return {
+                'type': 'result',
+                'status': status,
+                'label': prediction['label'],
+                'confidence': prediction['confidence'],
+                'top_k': prediction['top_k'],
+                'frames': frames,
+                'session': stabilize(self.predictions, prediction['label'], prediction['confidence']),
+            }
+        return {'type': 'error', 'error': f'Unsupported message type: {kind}'}
+
+    def _detection_result(self, result):
+        detected = result['hands_detected'] > 0
+        return {
+            'type': 'result',
+            'status': 'ok' if detected else 'no_gesture',
+            'label': result['gestures'][0] if result['gestures'] else '',
+            'confidence': result['confidence'],
+            'data': result,
+        }
+
+    def run_worker(self):
+        """Loop worker: proses pesan terbaru lalu kirim hasil segera setelah selesai"""
+        while True:
+            message = self.next_message()
+            if message is None:
+                return
+            try:
+                payload = self.process(message)
+            except (TypeError, ValueError) as e:
+                payload = {'type': 'error', 'error': str(e)}
+            except Exception as e:
+                logger.warning("Stream session error: %s", e)
+                payload = {'type': 'error', 'error': str(e)}
+            self.processed += 1
+            if 'id' in message:
+                payload['id'] = message['id']
+            payload['dropped'] = self.dropped
+            try:
+                self.send(payload)
+            except Exception:
+                self.close()
+                return
+
+def parse_stream_message(data):
+    """Pesan biner = frame JPEG mentah, pesan teks = JSON"""
+    if isinstance(data, (bytes, bytearray)):
+        return {'type': 'frame', 'bytes': data}
+    message = json.loads(data)
+    if not isinstance(message, dict):
+        raise ValueError('Message must be a JSON object')
+    return message
+
+def stream_socket(ws):
+    """Sesi streaming persisten: client push frame/landmark, server push hasil"""
+    backend, error = requested_detector()
+    if error:
+        ws.send(json.dumps({'type': 'error', 'error': error.get_json()['error']}))
+        return
+    session = StreamSession(ws, request.args.get('session_id') or f'ws-{id(ws):x}', sentence_requested(), backend)
+    worker = threading.Thread(target=session.run_worker, name=f'stream-{session.session_id}', daemon=True)
+    worker.start()
+    active = ACTIVE_STREAMS.labels(kind='ws')
+    active.inc()
+    session.send({'type': 'hello', 'session_id': session.session_id,
+                  'classifier_ready': classifier is not None})
+    try:
+        while not cameras.closed:
+            data = ws.receive()
+            if data is None:
+                break
+            try:
+                message = parse_stream_message(data)
+            except ValueError as e:
+                session.send({'type': 'error', 'error': str(e)})
+                continue
+            kind = message.get('type')
+            if kind == 'ping':
+                session.send({'type': 'pong', 'processed': session.processed, 'dropped': session.dropped})
+                continue
+            if kind == 'reset':
+                session.reset()
+                session.send({'type': 'reset'})
+                continue
+            if kind == 'landmarks':
+                try:
+                    session.add_landmarks(message)
+                except (TypeError, ValueError) as e:
+                    session.send({'type': 'error', 'error': str(e), 'id': message.get('id')})
+                    continue
+                # Payload landmark tidak perlu dibawa ke worker
+                message = {key: value for key, value in message.items() if key in ('type', 'id')}
+            session.submit(message)
+    finally:
+        active.dec()
+        session.close()
+        worker.join(timeout=1)
+
+WS_ASGI_ERROR = ('/ws tidak tersedia di mode asgi (app Flask dijalankan lewat WsgiToAsgi, '
+                 'tanpa handler WebSocket); jalankan dengan SIBI_SERVER_MODE=dev')
+
+def ws_unavailable():
+    """/ws di mode asgi: error jelas alih-alih 404/500"""
+    return make_payload_response({'success': False, 'error': WS_ASGI_ERROR}, 501)
+
+def reject_websockets(http_app):
+    """ASGI app: HTTP ke Flask, koneksi WebSocket ditutup dengan pesan error"""
+    async def asgi_app(scope, receive, send):
+        if scope['type'] == 'websocket':
+            # WsgiToAsgi hanya menerima scope http; tanpa ini handshake gagal tanpa pesan
+            await receive()  # websocket.connect
+            await send({'type': 'websocket.accept'})
+            await send({'type': 'websocket.send', 'text': json.dumps({'type': 'error', 'error': WS_ASGI_ERROR})})
+            await send({'type': 'websocket.close', 'code': 1011})
+            return
+        await http_app(scope, receive, send)
+    return asgi_app
+
+def run_asgi():
+    """Mode produksi: uvicorn di depan app Flask (WsgiToAsgi), debug/reloader mati.
+
+    Setiap request tetap handler Flask sinkron di thread executor asgiref;
+    tidak ada handler async dan /ws tidak tersedia (lihat ws_unavailable).
+    """
+    import uvicorn
+    from asgiref.wsgi import WsgiToAsgi
+    
+    uvicorn.run(
+        reject_websockets(WsgiToAsgi(app)),
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        # Koneksi berlebih langsung 503 dari uvicorn, kerja CPU dibatasi cpu_pool
+        limit_concurrency=MAX_PENDING + CPU_WORKERS * 2,
+        timeout_keep_alive=5,
+        log_level='warning',
+    )
+
+def print_banner():
     print("🚀 Starting Simple Python Server...")
-    print("📱 Server akan berjalan di http://localhost:5001")
-    print("🤖 Endpoint deteksi: http://localhost:5001/detect_hands")
-    print("🎥 Video stream: http://localhost:5001/video_feed")
-    print("📸 Single frame: http://localhost:5001/frame")
+    print(f"📱 Server akan berjalan di http://localhost:{SERVER_PORT} (mode: {SERVER_MODE}, debug: {SERVER_DEBUG})")
+    print(f"🤖 Endpoint deteksi: http://localhost:{SERVER_PORT}/detect_hands")
+    print(f"🎥 Video stream: http://localhost:{SERVER_PORT}/video_feed")
+    print(f"📸 Single frame: http://localhost:{SERVER_PORT}/frame")
+    print(f"🧠 Klasifikasi fitur: http://localhost:{SERVER_PORT}/classify")
+    print(f"🖐️ Detector (?detector=...): {DETECTOR_BACKEND}, daftar: http://localhost:{SERVER_PORT}/detectors")
+    print(f"🎬 Klasifikasi sekuens: http://localhost:{SERVER_PORT}/classify_sequence (stride {SEQUENCE_STRIDE})")
+    print(f"🗳️ Stabilisasi sesi (?session_id=): {STABLE_VOTES}/{STABLE_WINDOW} frame, "
+          f"kalimat lokal: {SENTENCE_ENABLED}, status: http://localhost:{SERVER_PORT}/sessions/<id>")
+    if sock is not None and SERVER_MODE == 'dev':
+        print(f"🔌 Streaming WebSocket: ws://localhost:{SERVER_PORT}/ws")
+    elif SERVER_MODE == 'asgi':
+        print("⚠️ WebSocket /ws tidak tersedia di mode asgi (gunakan SIBI_SERVER_MODE=dev)")
+    print(f"📷 Kamera (?camera=...): {', '.join(map(str, load_camera_config(CAMERA_CONFIG)))}")
+    print(f"🎞️ Stream profiles (?profile=...): {', '.join(STREAM_PROFILES)}")
+    print(f"📊 Metrics: http://localhost:{SERVER_PORT}/metrics")
+    print(f"⚙️ CPU workers: {CPU_WORKERS}, max pending: {MAX_PENDING}, timeout: {REQUEST_TIMEOUT}s")
+    if DETECT_PROCESSES > 0:
+        print(f"🧩 Proses deteksi (shared memory): {DETECT_PROCESSES}")
+    print(f"🧠 Buffer scratch deteksi: {DETECT_SCRATCH}, tracemalloc: {TRACE_MALLOC}")
+    print(f"🔥 Readiness: http://localhost:{SERVER_PORT}/ready (warmup: {WARMUP_ENABLED})")
     print("")
     print("Tekan Ctrl+C untuk menghentikan server")
     print("")
+
+def reloader_child():
+    """True di proses anak reloader Werkzeug (proses yang benar-benar melayani request)"""
+    return os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
+if __name__ == '__main__':
+    # Dengan reloader (debug), proses induk hanya mengawasi file dan menjalankan ulang
+    # proses anak: warmup, pool, atexit dan signal handler hanya dibuat di proses anak
+    load_config()
+    serving = not SERVER_DEBUG or reloader_child()
+    if serving:
+        create_app()
+    else:
+        build_app()
+    if not reloader_child():
+        print_banner()
     
     try:
-        app.run(host='0.0.0.0', port=5001, debug=True, threaded=True)
+        if SERVER_MODE == 'asgi':
+            run_asgi()
+        else:
+            app.run(host=SERVER_HOST, port=SERVER_PORT, debug=SERVER_DEBUG, threaded=True)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
         print(f"❌ Server error: {e}")
     finally:
-        cleanup_resources()
+        if serving:
+            cleanup_resources()
         print("✅ Server shutdown complete")
@@ -0,0 +1,202 @@
+"""Paritas CompactFeatureBuilder dengan lib/services/compact_feature_builder.dart"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from compact_features import FEATURE_LENGTH, CompactFeatureBuilder
+
+# Port baris-per-baris dari compact_feature_builder.dart (double Dart = float Python),
+# sengaja tanpa NumPy supaya urutan operasinya persis sama dengan versi Dart.
+HAND_POINTS = [0, 1, 4, 5, 8, 9, 12, 13, 16, 20]
+TIP_POINTS = [4, 8, 12, 16, 20]
+RATIO_POINTS = [8, 12, 16, 20]
+
+
+def _norm3(x, y, z):
+    return math.sqrt(x * x + y * y + z * z)
+
+
+def _coords(flat, index):
+    base = index * 4
+    return [flat[base], flat[base + 1], flat[base + 2]]
+
+
+def _dart_hand_features(hand, pose):
+    flat_xy, tip_dists, ratios = [], [], []
+    for f in range(len(hand)):
+        wrist = _coords(hand[f], 0)
+        left_shoulder = _coords(pose[f], 5)
+        right_shoulder = _coords(pose[f], 6)
+        shoulder_dist = _norm3(left_shoulder[0] - right_shoulder[0],
+                               left_shoulder[1] - right_shoulder[1],
+                               left_shoulder[2] - right_shoulder[2])
+        tip_offsets = []
+        for idx in TIP_POINTS:
+            pt = _coords(hand[f], idx)
+            tip_offsets.append(_norm3(pt[0] - wrist[0], pt[1] - wrist[1], pt[2] - wrist[2]))
+        span = max(tip_offsets)
+        scale = max(max(shoulder_dist, span), 1e-4)
+        selected = []
+        for idx in HAND_POINTS:
+            pt = _coords(hand[f], idx)
+            selected += [(pt[0] - wrist[0]) / scale, (pt[1] - wrist[1]) / scale]
+        flat_xy.append(selected)
+        tip_dists.append([v / scale for v in tip_offsets])
+        thumb_tip = _coords(hand[f], 4)
+        thumb_cmc = _coords(hand[f], 1)
+        thumb_len = max(_norm3(thumb_tip[0] - thumb_cmc[0], thumb_tip[1] - thumb_cmc[1],
+                               thumb_tip[2] - thumb_cmc[2]), 1e-4)
+        values = []
+        for idx in RATIO_POINTS:
+            pt = _coords(hand[f], idx)
+            values.append(_norm3(pt[0] - thumb_tip[0], pt[1] - thumb_tip[1],
+                                 pt[2] - thumb_tip[2]) / thumb_len)
+        ratios.append(values)
+    return flat_xy, tip_dists, ratios
+
+
+def _dart_shoulders(pose):
+    left = _coords(pose, 5)
+    right = _coords(pose, 6)
+    if not (pose[5 * 4 + 3] > 0.1 and pose[6 * 4 + 3] > 0.1):
+        return [0.0] * 4
+    center = [(left[0] + right[0]) / 2.0, (left[1] + right[1]) / 2.0, (left[2] + right[2]) / 2.0]
+    scale = max(_norm3(left[0] - right[0], left[1] - right[1], left[2] - right[2]), 1e-4)
+    return [(left[0] - center[0]) / scale, (left[1] - center[1]) / scale,
+            (right[0] - center[0]) / scale, (right[1] - center[1]) / scale]
+
+
+def _dart_mean_visibility(flat):
+    vis = [flat[i * 4 + 3] for i in range(len(flat) // 4)]
+    total = vis[0]
+    for v in vis[1:]:
+        total = total + v
+    return total / len(vis)
+
+
+def _dart_temporal_stats(series, threshold):
+    rows, cols = len(series), len(series[0])
+    means, stds, max_delta, active = [], [], [], []
+    for c in range(cols):
+        total = 0.0
+        for r in range(rows):
+            total += series[r][c]
+        mean = total / rows
+        variance = 0.0
+        for r in range(rows):
+            diff = series[r][c] - mean
+            variance += diff * diff
+        max_abs = 0.0
+        for r in range(1, rows):
+            delta = abs(series[r][c] - series[r - 1][c])
+            if delta > max_abs:
+                max_abs = delta
+        count = sum(1 for r in range(rows) if series[r][c] > threshold)
+        means.append(mean)
+        stds.append(math.sqrt(variance / rows))
+        max_delta.append(max_abs)
+        active.append(count / rows)
+    return means + stds + max_delta + active
+
+
+def dart_feature_vector(packets, sequence_length=24, threshold=0.12, mean=None, std=None):
+    """buildFeatureVector() Dart untuk paket (pose, left, right) terakhir di buffer"""
+    window = packets[-sequence_length:]
+    pose = [p[0] for p in window]
+    left = [p[1] for p in window]
+    right = [p[2] for p in window]
+    left_xy, left_tips, left_ratios = _dart_hand_features(left, pose)
+    right_xy, right_tips, right_ratios = _dart_hand_features(right, pose)
+    series = [l + r for l, r in zip(left_tips, right_tips)]
+    vector = (left_xy[-1] + right_xy[-1] + left_tips[-1] + right_tips[-1]
+              + left_ratios[-1] + right_ratios[-1] + _dart_shoulders(pose[-1])
+              + [_dart_mean_visibility(left[-1]), _dart_mean_visibility(right[-1])]
+              + _dart_temporal_stats(series, threshold))
+    if mean is None or std is None:
+        return vector
+    return [(v - m) / (1.0 if abs(s) < 1e-6 else s) for v, m, s in zip(vector, mean, std)]
+
+
+def random_packet(rng, t):
+    """Paket MoveNet/hand landmark sintetis yang bergerak halus terhadap waktu t"""
+    pose = []
+    for i in range(17):
+        pose += [0.5 + 0.1 * math.sin(t * 0.1 + i), 0.4 + 0.05 * i / 17, rng.uniform(-0.1, 0.1), rng.random()]
+    hands = []
+    for side in (0.35, 0.65):
+        hand = []
+        for i in range(21):
+            hand += [side + 0.08 * math.cos(t * 0.3 + i) + rng.gauss(0, 0.005),
+                     0.6 + 0.08 * math.sin(t * 0.2 + i * 0.5) + rng.gauss(0, 0.005),
+                     rng.uniform(-0.05, 0.05), rng.random()]
+        hands.append(hand)
+    return pose, hands[0], hands[1]
+
+
+def hand_packet(wrist_vis=1.0, index_tip=(-0.06, -0.08)):
+    """Tangan di (0.5, 0.8): jempol (0.03, 0.04) dari pergelangan, telunjuk index_tip, sisanya di pergelangan"""
+    hand = []
+    for i in range(21):
+        dx, dy = {4: (0.03, 0.04), 8: index_tip}.get(i, (0.0, 0.0))
+        hand += [0.5 + dx, 0.8 + dy, 0.0, wrist_vis]
+    return hand
+
+
+SHOULDER_POSE = [0.0] * 20 + [0.4, 0.5, 0.0, 1.0, 0.6, 0.5, 0.0, 1.0]
+
+
+def test_matches_dart_port_bit_for_bit_across_window_eviction():
+    rng = random.Random(7)
+    builder = CompactFeatureBuilder(sequence_length=24)
+    packets = []
+    for t in range(60):
+        packets.append(random_packet(rng, t))
+        builder.add_packet(*packets[-1])
+        vector = builder.build_feature_vector()
+        assert vector.shape == (FEATURE_LENGTH,)
+        # Bit-identik, bukan sekadar mendekati
+        assert vector.tolist() == dart_feature_vector(packets), f'frame {t}'
+
+
+def test_matches_dart_port_with_scaler():
+    rng = random.Random(11)
+    mean = [rng.uniform(-1, 1) for _ in range(FEATURE_LENGTH)]
+    std = [rng.uniform(0.1, 2.0) for _ in range(FEATURE_LENGTH)]
+    std[3] = 0.0  # std ~0 dibagi 1.0 seperti di Dart
+    builder = CompactFeatureBuilder(sequence_length=8, scaler_mean=mean, scaler_std=std)
+    packets = [random_packet(rng, t) for t in range(12)]
+    for packet in packets:
+        builder.add_packet(*packet)
+    expected = dart_feature_vector(packets, sequence_length=8, mean=mean, std=std)
+    assert builder.build_feature_vector().tolist() == expected
+
+
+def test_hand_computed_values():
+    builder = CompactFeatureBuilder()
+    # Frame 1: telunjuk terentang; frame 2: telunjuk kembali ke pergelangan
+    builder.add_packet(SHOULDER_POSE, hand_packet(1.0), hand_packet(0.5))
+    builder.add_packet(SHOULDER_POSE, hand_packet(1.0, (0.0, 0.0)), hand_packet(0.5, (0.0, 0.0)))
+    vector = builder.build_feature_vector()
+
+    # Skala = jarak bahu 0.2 (lebih besar dari bentang tangan)
+    left_tips = vector[40:45]
+    assert left_tips == pytest.approx([0.25, 0.0, 0.0, 0.0, 0.0])
+    # Rasio terhadap panjang jempol 0.05: semua titik ada di pergelangan
+    assert vector[50:54] == pytest.approx([1.0, 1.0, 1.0, 1.0])
+    assert vector[58:62] == pytest.approx([-0.5, 0.0, 0.5, 0.0])  # bahu
+    assert vector[62:64] == pytest.approx([1.0, 0.5])  # confidence
+
+    stats = vector[64:].reshape(4, 10)  # mean, std, max delta, fraksi aktif
+    assert stats[0, :2] == pytest.approx([0.25, 0.25])
+    assert stats[1, :2] == pytest.approx([0.0, 0.25])
+    assert stats[2, :2] == pytest.approx([0.0, 0.5])
+    assert stats[3, :2] == pytest.approx([1.0, 0.5])
+    # Tangan kanan punya geometri yang sama
+    np.testing.assert_allclose(stats[:, 5:7], stats[:, :2])
+
+
+def test_empty_builder_returns_none():
+    assert CompactFeatureBuilder().build_feature_vector() is None
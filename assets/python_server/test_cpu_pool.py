@@ -0,0 +1,98 @@
+"""Admisi CpuWorkerPool: 503 saat antrian penuh, 504 saat timeout, hitungan abandoned"""
+
+import threading
+import time
+
+import pytest
+
+from simple_server import CpuWorkerPool, RequestTimedOut, ServerBusy, busy_response
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'kondisi tidak tercapai'
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def run_in_background(pool, fn):
+    thread = threading.Thread(target=pool.run, args=(fn,), kwargs={'timeout': 5.0}, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_rejects_when_pending_is_full(release):
+    pool = CpuWorkerPool(workers=1, max_pending=1, timeout=5.0)
+    try:
+        thread = run_in_background(pool, release.wait)
+        wait_until(lambda: pool.pending == 1)
+
+        with pytest.raises(ServerBusy) as info:
+            pool.run(lambda: 'tidak dijalankan')
+        assert info.value.status == 503
+        assert pool.rejected == 1
+
+        release.set()
+        thread.join(timeout=2)
+        assert pool.pending == 0
+        assert pool.run(lambda: 'ok') == 'ok'
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_of_running_work_is_counted_as_abandoned(release):
+    pool = CpuWorkerPool(workers=1, max_pending=4, timeout=0.05)
+    try:
+        with pytest.raises(RequestTimedOut) as info:
+            pool.run(release.wait)
+        assert info.value.status == 504
+        assert pool.timeouts == 1
+        # Pekerjaan masih berjalan: tidak memakan slot admisi, tapi tercatat abandoned
+        assert pool.pending == 0
+        assert pool.abandoned == 1
+
+        release.set()
+        wait_until(lambda: pool.abandoned == 0)
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_of_queued_work_is_cancelled(release):
+    pool = CpuWorkerPool(workers=1, max_pending=4, timeout=5.0)
+    try:
+        thread = run_in_background(pool, release.wait)
+        wait_until(lambda: pool.pending == 1)
+
+        ran = threading.Event()
+        with pytest.raises(RequestTimedOut):
+            pool.run(ran.set, timeout=0.05)
+        # Belum sempat mulai: dibatalkan, bukan abandoned
+        assert pool.abandoned == 0
+        assert pool.pending == 1
+
+        release.set()
+        thread.join(timeout=2)
+        assert pool.pending == 0
+        assert not ran.is_set()
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize('error, status', [
+    (ServerBusy('Server sibuk, coba lagi'), 503),
+    (RequestTimedOut('Request timeout'), 504),
+])
+def test_busy_response_status(app, error, status):
+    with app.test_request_context('/detect_hands', method='POST'):
+        response = busy_response(error)
+    assert response.status_code == status
+    assert response.get_json() == {'success': False, 'error': str(error)}
+    assert ('Retry-After' in response.headers) == (status == 503)
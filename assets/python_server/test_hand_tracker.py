@@ -0,0 +1,74 @@
+"""HandTracker: pencarian ROI, smoothing EMA dan reset saat IoU turun"""
+
+import numpy as np
+import pytest
+
+from hand_detector import HandTracker, SimpleDetector
+
+BLOB = 30  # sisi blob terang (piksel DETECT_SIZE 160x120)
+
+
+def blank_frame():
+    width, height = SimpleDetector.DETECT_SIZE
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+def frame_with_blob(x, y):
+    frame = blank_frame()
+    frame[y:y + BLOB, x:x + BLOB] = 255
+    return frame
+
+
+@pytest.fixture
+def tracker():
+    return HandTracker(SimpleDetector(verbose=False))
+
+
+def test_first_frame_uses_full_search(tracker):
+    result = tracker.update(frame_with_blob(40, 30))
+    assert result['hands_detected'] == 1
+    assert result['search'] == 'full'
+    assert result['tracking_quality'] == 'fair'
+    assert tracker.box.tolist() == [40, 30, BLOB, BLOB]
+
+
+def test_small_motion_is_tracked_in_roi_and_smoothed(tracker):
+    tracker.update(frame_with_blob(40, 30))
+    result = tracker.update(frame_with_blob(44, 30))
+    assert result['search'] == 'roi'
+    # EMA 0.5 antara box lama dan box baru
+    assert tracker.box.tolist() == [42, 30, BLOB, BLOB]
+    assert result['bounding_box']['left'] == pytest.approx(42 / 160)
+
+    for _ in range(HandTracker.GOOD_AFTER - 1):
+        result = tracker.update(frame_with_blob(44, 30))
+    assert result['tracking_quality'] == 'good'
+    assert (tracker.full_searches, tracker.roi_searches) == (1, HandTracker.GOOD_AFTER)
+
+
+def test_jump_with_low_iou_resets_box_instead_of_smoothing(tracker):
+    for _ in range(HandTracker.GOOD_AFTER + 1):
+        tracker.update(frame_with_blob(10, 10))
+    result = tracker.update(frame_with_blob(110, 80))
+    # Di luar ROI: track hilang, cari ulang full frame, box baru tidak dirata-rata
+    assert result['search'] == 'full'
+    assert result['tracking_quality'] == 'fair'
+    assert tracker.box.tolist() == [110, 80, BLOB, BLOB]
+    assert tracker.tracked_frames == 0
+
+
+def test_lost_track_clears_box_and_searches_full_frame_again(tracker):
+    tracker.update(frame_with_blob(40, 30))
+    assert tracker.update(blank_frame())['hands_detected'] == 0
+    assert tracker.box is None
+    assert tracker.update(frame_with_blob(42, 30))['search'] == 'full'
+
+
+def test_untrackable_backend_passes_through():
+    class Backend:
+        TRACKABLE = False
+
+        def detect_hands(self, image):
+            return {'hands_detected': 0, 'backend': 'stub'}
+
+    assert HandTracker(Backend()).update(None) == {'hands_detected': 0, 'backend': 'stub'}
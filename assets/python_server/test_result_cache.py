@@ -0,0 +1,82 @@
+"""ResultCache: eviction LRU/TTL dan key dari bytes gambar yang sudah di-decode base64"""
+
+import base64
+import io
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import simple_server
+from simple_server import ResultCache, read_request_payload
+
+
+# get() mencatat hit/miss di metrik yang dibuat create_app()
+pytestmark = pytest.mark.usefixtures('app')
+
+
+@pytest.fixture(scope='module')
+def jpeg_bytes():
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    frame[40:80, 60:100] = 200
+    ok, encoded = cv2.imencode('.jpg', frame)
+    assert ok
+    return encoded.tobytes()
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl=60.0)
+    cache.put(b'a', 'A')
+    cache.put(b'b', 'B')
+    assert cache.get(b'a') == 'A'  # a jadi paling baru dipakai
+    cache.put(b'c', 'C')
+
+    assert len(cache) == 2
+    assert cache.get(b'b') is None
+    assert cache.get(b'a') == 'A'
+    assert cache.get(b'c') == 'C'
+    assert cache.stats() == {'size': 2, 'hits': 3, 'misses': 1}
+
+
+def test_expired_entries_miss_and_are_dropped():
+    cache = ResultCache(max_entries=4, ttl=0.05)
+    cache.put(b'a', 'A')
+    assert cache.get(b'a') == 'A'
+    time.sleep(0.1)
+    assert cache.get(b'a') is None
+    assert len(cache) == 0
+
+
+def test_zero_size_disables_cache():
+    assert not ResultCache(max_entries=0).enabled
+    assert ResultCache(max_entries=1).enabled
+
+
+def test_key_is_same_for_binary_json_and_multipart(app, jpeg_bytes):
+    requests = [
+        dict(data=jpeg_bytes, content_type='image/jpeg'),
+        dict(json={'image': base64.b64encode(jpeg_bytes).decode()}),
+        dict(data={'image': (io.BytesIO(jpeg_bytes), 'frame.jpg')}, content_type='multipart/form-data'),
+    ]
+    keys = set()
+    for kwargs in requests:
+        with app.test_request_context('/detect_hands', method='POST', **kwargs):
+            payload, decode, error = read_request_payload()
+            assert error is None
+            assert bytes(payload) == jpeg_bytes
+            keys.add(ResultCache.key(payload))
+    assert len(keys) == 1
+
+
+def test_json_retry_of_binary_upload_is_a_hit(app, jpeg_bytes, monkeypatch):
+    monkeypatch.setattr(simple_server, 'result_cache', ResultCache(max_entries=8, ttl=60.0))
+    client = app.test_client()
+
+    first = client.post('/detect_hands', data=jpeg_bytes, content_type='image/jpeg')
+    retry = client.post('/detect_hands', json={'image': base64.b64encode(jpeg_bytes).decode()})
+
+    assert first.get_json()['cached'] is False
+    assert retry.get_json()['cached'] is True
+    assert retry.get_json()['data'] == first.get_json()['data']
+    assert simple_server.result_cache.stats()['hits'] == 1
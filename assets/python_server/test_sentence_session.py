@@ -0,0 +1,99 @@
+"""Voting PredictionSession, event commit kata dan SentenceAssembler"""
+
+import time
+
+from sentence_session import PredictionSession, SentenceAssembler, SessionStore
+
+
+def push_all(session, labels, confidence=0.9, now=0.0):
+    return [session.push(label, confidence, now=now) for label in labels]
+
+
+def commits(states):
+    return [event['word'] for state in states for event in state['events']]
+
+
+def test_commits_after_enough_votes():
+    session = PredictionSession(window=4, votes=3, min_confidence=0.5, repeat_after=0)
+    states = push_all(session, ['halo', 'halo'])
+    assert [s['stable_label'] for s in states] == [None, None]
+
+    state = session.push('halo', 0.6, now=0.0)
+    assert state['stable_label'] == 'halo'
+    assert state['events'] == [{'type': 'commit', 'word': 'halo', 'confidence': 0.8, 'seq': 1, 'frame': 3}]
+    assert state['words'] == ['halo']
+    # Voting dimulai ulang setelah commit
+    assert session.push('halo', 0.9, now=0.0)['stable_label'] is None
+
+
+def test_low_confidence_and_idle_frames_abstain():
+    session = PredictionSession(window=4, votes=3, min_confidence=0.5, repeat_after=0)
+    states = push_all(session, ['makan', 'makan'], confidence=0.3)
+    states += push_all(session, ['idle', ''])
+    assert commits(states) == []
+    # Window berisi 2 abstain + 2 suara: belum cukup
+    states = push_all(session, ['makan', 'makan'])
+    assert commits(states) == []
+    assert commits([session.push('makan', 0.9, now=0.0)]) == ['makan']
+
+
+def test_majority_label_wins_within_window():
+    session = PredictionSession(window=5, votes=3, min_confidence=0.5, repeat_after=0)
+    states = push_all(session, ['a', 'b', 'a', 'b', 'a'])
+    assert commits(states) == ['a']
+    assert states[-1]['stability'] == 0.6
+
+
+def test_same_word_needs_a_pause_to_repeat():
+    session = PredictionSession(window=3, votes=2, min_confidence=0.5, repeat_after=0)
+    assert commits(push_all(session, ['saya'] * 2)) == ['saya']
+    # Tanpa jeda: kata sama tidak di-commit ulang
+    assert commits(push_all(session, ['saya'] * 6)) == []
+    # Satu window penuh idle memutus kata, lalu boleh di-commit lagi
+    push_all(session, ['idle'] * 3)
+    assert commits(push_all(session, ['saya'] * 2)) == ['saya']
+
+
+def test_same_word_repeats_after_repeat_after_seconds():
+    session = PredictionSession(window=3, votes=2, min_confidence=0.5, repeat_after=2.0)
+    assert commits(push_all(session, ['ya'] * 2, now=0.0)) == ['ya']
+    assert commits(push_all(session, ['ya'] * 3, now=1.0)) == []
+    # Window penuh suara 'ya' dan jeda repeat_after terlewati
+    assert commits(push_all(session, ['ya'] * 3, now=2.5)) == ['ya']
+
+
+def test_assembler_builds_sentence_from_commits():
+    session = PredictionSession(window=2, votes=2, min_confidence=0.5, repeat_after=0,
+                                assembler=SentenceAssembler(max_words=5, timeout=3.0))
+    push_all(session, ['apa'] * 2, now=0.0)
+    state = push_all(session, ['nama_kamu'] * 2, now=1.0)[-1]
+    assert state['sentence'] == 'Apa nama kamu?'
+    # Tanpa kata baru melewati timeout: kalimat direset
+    assert session.push('idle', 0.9, now=5.0)['sentence'] == ''
+
+
+def test_sentence_assembler_rules():
+    assembler = SentenceAssembler(max_words=3, timeout=3.0)
+    for i, word in enumerate(['saya', 'mau', 'makan', 'mau', 'minum']):
+        assembler.add(word, now=float(i))
+    # 'mau' pindah ke akhir, kata tertua dibuang setelah max_words
+    assert assembler.words == ['makan', 'mau', 'minum']
+    assert assembler.text() == 'Makan mau minum.'
+    assembler.tick(now=10.0)
+    assert assembler.text() == ''
+
+
+def test_store_evicts_idle_and_least_recently_used_sessions():
+    store = SessionStore(PredictionSession, ttl=60.0, max_sessions=2)
+    first = store.get('a')
+    store.get('b')
+    assert store.get('a') is first
+    store.get('c')
+    assert store.keys() == ['a', 'c']
+    assert store.evicted == 1
+
+    idle = SessionStore(PredictionSession, ttl=0.05, max_sessions=10)
+    idle.get('a')
+    time.sleep(0.1)
+    assert len(idle) == 0
+    assert idle.get('a', create=False) is None
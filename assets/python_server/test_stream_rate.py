@@ -0,0 +1,77 @@
+"""StreamRateController /video_feed: turun saat lambat/sibuk/lewat budget, naik setelah stabil"""
+
+from simple_server import STREAM_MAX_FPS, STREAM_MIN_FPS, StreamRateController
+
+
+def record_many(controller, count, size=1000, send_seconds=0.0):
+    for _ in range(count):
+        controller.record(size, send_seconds)
+
+
+def test_busy_server_steps_profile_down_then_fps():
+    load = [0.9]
+    controller = StreamRateController(target_fps=10, profile='medium', load=lambda: load[0])
+    assert controller.profile == 'medium'
+
+    controller.record(1000, 0.0)
+    assert controller.profile == 'default'
+    # Cooldown: tidak turun lagi di frame berikutnya
+    record_many(controller, StreamRateController.DOWNGRADE_COOLDOWN - 1)
+    assert controller.profile == 'default'
+    controller.record(1000, 0.0)
+    assert controller.profile == 'low'
+    # Sudah di profil terendah: FPS yang diturunkan
+    record_many(controller, StreamRateController.DOWNGRADE_COOLDOWN)
+    assert controller.profile == 'low'
+    assert controller.fps == 7.5
+
+
+def test_recovers_fps_first_then_profile_up_to_requested():
+    load = [0.9]
+    controller = StreamRateController(target_fps=10, profile='default', load=lambda: load[0])
+    record_many(controller, 1 + StreamRateController.DOWNGRADE_COOLDOWN)
+    assert (controller.profile, controller.fps) == ('low', 7.5)
+
+    load[0] = 0.0
+    steps = StreamRateController.UPGRADE_AFTER
+    record_many(controller, steps)
+    assert (controller.profile, controller.fps) == ('low', 9.375)
+    record_many(controller, steps)
+    assert (controller.profile, controller.fps) == ('low', 10.0)
+    record_many(controller, steps)
+    assert controller.profile == 'default'
+    # Tidak pernah melewati profil yang diminta client
+    record_many(controller, steps * 3)
+    assert (controller.profile, controller.fps) == ('default', 10.0)
+
+
+def test_slow_client_steps_down():
+    controller = StreamRateController(target_fps=10, profile='default')
+    controller.record(1000, controller.interval * 2)
+    assert controller.profile == 'low'
+
+
+def test_over_bitrate_budget_limits_fps_at_lowest_profile():
+    # 8000 bit/s = 1000 byte/s; frame 500 byte @ 10 FPS jauh di atas budget
+    controller = StreamRateController(target_fps=10, max_bitrate=8000, profile='low')
+    controller.record(500, 0.0)
+    assert controller.profile == 'low'
+    assert controller.fps == 2.0
+    assert controller.budget() == 1000.0
+
+
+def test_profile_upgrade_waits_for_budget():
+    controller = StreamRateController(target_fps=10, max_bitrate=8000 * 100, profile='default')
+    controller.level = 0
+    controller.frame_sizes['default'] = 20000  # 20 KB @ 10 FPS > 0.9 x 100 KB/s
+    record_many(controller, StreamRateController.UPGRADE_AFTER * 3, size=5000)
+    assert controller.profile == 'low'
+
+    controller.frame_sizes['default'] = 8000
+    record_many(controller, StreamRateController.UPGRADE_AFTER, size=5000)
+    assert controller.profile == 'default'
+
+
+def test_target_fps_is_clamped():
+    assert StreamRateController(target_fps=1000).target_fps == STREAM_MAX_FPS
+    assert StreamRateController(target_fps=0).target_fps == STREAM_MIN_FPS
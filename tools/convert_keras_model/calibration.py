@@ -0,0 +1,285 @@
+"""Calibration data and accuracy-drift checks for quantized TFLite models.
+
+Builds a `representative_dataset()` generator straight from an `.npz` dataset
+(`X`, `y`, optional `labels`) and its scaler, sampling evenly across labels.
+A stratified held-out split is kept out of calibration and used afterwards to
+compare the quantized model against the float model.
+
+Only NumPy is needed here; evaluation uses `tflite_bench.load_interpreter_class()`.
+
+Usage (run from repository root):
+    python tools/convert_keras_model/calibration.py \\
+        assets/models/sibi_compact_mlp.tflite \\
+        --dataset assets/models/compact_sequence_dataset.npz \\
+        --scaler assets/models/compact_scaler.json \\
+        --labels assets/models/sibi_compact_labels.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from tflite_bench import load_interpreter_class
+
+EVAL_BATCH_SIZE = 256
+
+
+@dataclass
+class CalibrationData:
+    """Scaled features plus the stratified calibration/held-out split."""
+
+    features: np.ndarray
+    targets: np.ndarray
+    labels: list[str]
+    calibration_indices: np.ndarray
+    holdout_indices: np.ndarray
+
+    @property
+    def holdout(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.features[self.holdout_indices], self.targets[self.holdout_indices]
+
+    def representative_dataset(self, samples: int, seed: int = 0) -> Callable[[], Iterator[list[np.ndarray]]]:
+        """Generator for `converter.representative_dataset`, balanced across labels."""
+        pool = self.calibration_indices
+        chosen = pool[stratified_sample(self.targets[pool], samples, seed)]
+        features = self.features
+
+        def representative_dataset():
+            for index in chosen:
+                yield [features[index : index + 1]]
+
+        return representative_dataset
+
+
+def load_scaler(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    """`(mean, std)` from `.json` ({mean, std}) or `.npz`; near-zero std becomes 1 like the app."""
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            mean, std = data["mean"], data["std"]
+    else:
+        data = json.loads(path.read_text())
+        mean, std = data["mean"], data["std"]
+    mean = np.asarray(mean, dtype=np.float32)
+    std = np.asarray(std, dtype=np.float32)
+    return mean, np.where(np.abs(std) < 1e-6, 1.0, std).astype(np.float32)
+
+
+def load_label_names(path: Path) -> list[str]:
+    decoded = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(decoded, dict):
+        return [str(decoded[key]) for key in sorted(decoded, key=int)]
+    return [str(value) for value in decoded]
+
+
+def stratified_split(targets: np.ndarray, holdout_fraction: float, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Per-label shuffle and split; every label with 2+ samples lands in both parts."""
+    rng = np.random.default_rng(seed)
+    calibration, holdout = [], []
+    for label in np.unique(targets):
+        indices = rng.permutation(np.flatnonzero(targets == label))
+        count = int(round(len(indices) * holdout_fraction))
+        if holdout_fraction > 0 and len(indices) > 1:
+            count = min(max(count, 1), len(indices) - 1)
+        holdout.append(indices[:count])
+        calibration.append(indices[count:])
+    return np.sort(np.concatenate(calibration)), np.sort(np.concatenate(holdout))
+
+
+def stratified_sample(targets: np.ndarray, count: int, seed: int = 0) -> np.ndarray:
+    """Positions into `targets`, taken round-robin per label so rare labels are not drowned out."""
+    rng = np.random.default_rng(seed)
+    groups = [rng.permutation(np.flatnonzero(targets == label)) for label in np.unique(targets)]
+    count = min(count, len(targets))
+    chosen = []
+    depth = 0
+    while len(chosen) < count:
+        for group in groups:
+            if depth < len(group):
+                chosen.append(group[depth])
+                if len(chosen) == count:
+                    break
+        depth += 1
+    return rng.permutation(np.asarray(chosen, dtype=np.int64))
+
+
+def load_calibration_data(
+    dataset_path: Path,
+    scaler_path: Optional[Path] = None,
+    labels_path: Optional[Path] = None,
+    holdout_fraction: float = 0.2,
+    seed: int = 0,
+) -> CalibrationData:
+    """Load `X`/`y` from `.npz`, apply the scaler and align targets to the labels file order."""
+    with np.load(dataset_path, allow_pickle=True) as data:
+        features = np.asarray(data["X"], dtype=np.float32)
+        targets = np.asarray(data["y"], dtype=np.int64)
+        dataset_labels = [str(value) for value in data["labels"]] if "labels" in data.files else None
+
+    if scaler_path is not None:
+        mean, std = load_scaler(scaler_path)
+        if mean.shape[-1] != features.shape[-1]:
+            raise ValueError(
+                f"Scaler has {mean.shape[-1]} features but {dataset_path} has {features.shape[-1]}."
+            )
+        features = (features - mean) / std
+
+    labels = dataset_labels or [f"Class {i + 1}" for i in range(int(targets.max()) + 1)]
+    if labels_path is not None:
+        model_labels = load_label_names(labels_path)
+        if dataset_labels is not None and dataset_labels != model_labels:
+            # Dataset stored its own label order: remap targets to the model's order.
+            missing = sorted(set(dataset_labels) - set(model_labels))
+            if missing:
+                raise ValueError(f"Labels missing from {labels_path}: {', '.join(missing)}")
+            remap = np.array([model_labels.index(name) for name in dataset_labels], dtype=np.int64)
+            targets = remap[targets]
+        labels = model_labels
+
+    calibration, holdout = stratified_split(targets, holdout_fraction, seed)
+    return CalibrationData(features, targets, labels, calibration, holdout)
+
+
+class BatchPredictor:
+    """One interpreter resized once to a fixed batch; feeds float inputs of any rank.
+
+    Inputs are quantized and outputs dequantized for int8 models, and a short
+    final batch is zero-padded so the tensor never has to be reallocated.
+    """
+
+    def __init__(self, model_path: Path, sample_shape: tuple, batch_size: int = EVAL_BATCH_SIZE,
+                 num_threads: int = 1, interpreter_class=None):
+        Interpreter = interpreter_class or load_interpreter_class()
+        self.interpreter = Interpreter(model_path=str(model_path), num_threads=num_threads)
+        detail = self.interpreter.get_input_details()[0]
+        signature = detail.get("shape_signature", detail["shape"])
+        self.sample_shape = tuple(int(v) for v in sample_shape)
+        expected = tuple(int(v) for v in signature[1:])
+        if len(expected) != len(self.sample_shape) or any(
+            e not in (-1, f) for e, f in zip(expected, self.sample_shape)
+        ):
+            raise ValueError(f"{model_path} expects inputs of shape {list(signature)}, got samples of {list(self.sample_shape)}.")
+        if int(signature[0]) == -1:
+            self.interpreter.resize_tensor_input(detail["index"], [batch_size, *self.sample_shape])
+        else:
+            batch_size = int(detail["shape"][0])
+        self.batch_size = batch_size
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.input_dtype = np.dtype(self.input_detail["dtype"])
+        self._padded = np.zeros((batch_size, *self.sample_shape), dtype=np.float32)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Float outputs for `features` ([N, *sample_shape]), `batch_size` rows per invoke."""
+        in_scale, in_zero = self.input_detail["quantization"]
+        out_scale, out_zero = self.output_detail["quantization"]
+        outputs = []
+        for start in range(0, len(features), self.batch_size):
+            chunk = features[start : start + self.batch_size]
+            rows = len(chunk)
+            if rows < self.batch_size:
+                self._padded[:rows] = chunk
+                self._padded[rows:] = 0.0
+                chunk = self._padded
+            if np.issubdtype(self.input_dtype, np.integer) and in_scale:
+                info = np.iinfo(self.input_dtype)
+                chunk = np.clip(np.round(chunk / in_scale + in_zero), info.min, info.max)
+            self.interpreter.set_tensor(self.input_detail["index"], np.asarray(chunk, dtype=self.input_dtype))
+            self.interpreter.invoke()
+            scores = self.interpreter.get_tensor(self.output_detail["index"])[:rows].astype(np.float32)
+            if out_scale:
+                scores = (scores - out_zero) * out_scale
+            outputs.append(scores)
+        return np.concatenate(outputs)
+
+
+def predict_tflite(
+    model_path: Path,
+    features: np.ndarray,
+    batch_size: int = EVAL_BATCH_SIZE,
+    interpreter_class=None,
+) -> np.ndarray:
+    """Float outputs for `features` ([N, ...]), quantizing inputs/dequantizing outputs for int8 models."""
+    predictor = BatchPredictor(model_path, features.shape[1:], batch_size, interpreter_class=interpreter_class)
+    return predictor.predict(features)
+
+
+def accuracy_drift(
+    reference_scores: np.ndarray,
+    candidate_scores: np.ndarray,
+    targets: np.ndarray,
+    labels: list[str],
+) -> dict:
+    """Compare a quantized model's scores with the float model's on the same samples."""
+    if reference_scores.shape != candidate_scores.shape:
+        raise ValueError(
+            f"Reference outputs {list(reference_scores.shape[1:])} do not match candidate outputs "
+            f"{list(candidate_scores.shape[1:])}; compare models trained on the same labels."
+        )
+    reference_pred = reference_scores.argmax(axis=1)
+    candidate_pred = candidate_scores.argmax(axis=1)
+    reference_accuracy = float((reference_pred == targets).mean())
+    candidate_accuracy = float((candidate_pred == targets).mean())
+    delta = np.abs(reference_scores - candidate_scores)
+
+    per_label = []
+    for index, name in enumerate(labels):
+        mask = targets == index
+        if not mask.any():
+            continue
+        drop = float((reference_pred[mask] == index).mean() - (candidate_pred[mask] == index).mean())
+        per_label.append({"label": name, "samples": int(mask.sum()), "accuracy_drop": round(drop, 4)})
+    per_label.sort(key=lambda item: item["accuracy_drop"], reverse=True)
+
+    return {
+        "samples": int(len(targets)),
+        "float_accuracy": round(reference_accuracy, 4),
+        "quantized_accuracy": round(candidate_accuracy, 4),
+        "accuracy_drop": round(reference_accuracy - candidate_accuracy, 4),
+        "top1_agreement": round(float((reference_pred == candidate_pred).mean()), 4),
+        "mean_abs_score_delta": round(float(delta.mean()), 6),
+        "max_abs_score_delta": round(float(delta.max()), 6),
+        "worst_labels": per_label[:5],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare a quantized `.tflite` model against a float `.tflite` model on held-out data.",
+    )
+    parser.add_argument("model", type=Path, help="Quantized `.tflite` file to check.")
+    parser.add_argument("--reference", type=Path, default=None, help="Float `.tflite` model (default: only report accuracy).")
+    parser.add_argument("--dataset", type=Path, required=True, help="`.npz` with `X`, `y` and optional `labels`.")
+    parser.add_argument("--scaler", type=Path, default=None, help="Scaler `.json`/`.npz` applied to `X`.")
+    parser.add_argument("--labels", type=Path, default=None, help="Label list the model was trained with.")
+    parser.add_argument("--holdout-fraction", type=float, default=0.2, help="Share of each label held out.")
+    parser.add_argument("--seed", type=int, default=0, help="Split/sampling seed.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    data = load_calibration_data(args.dataset, args.scaler, args.labels, args.holdout_fraction, args.seed)
+    features, targets = data.holdout
+    scores = predict_tflite(args.model, features)
+    if args.reference is None:
+        accuracy = float((scores.argmax(axis=1) == targets).mean())
+        print(json.dumps({"samples": int(len(targets)), "accuracy": round(accuracy, 4)}, indent=2))
+        return
+    reference = predict_tflite(args.reference, features)
+    if reference.shape != scores.shape:
+        raise SystemExit(
+            f"{args.reference} outputs {reference.shape[-1]} classes but {args.model} outputs "
+            f"{scores.shape[-1]}; --reference must be the float build of the same model."
+        )
+    print(json.dumps(accuracy_drift(reference, scores, targets, data.labels), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,39 @@ Usage (run from repository root):
     python tools/convert_keras_model/convert.py \
         --input assets/models/bima_model.keras \
         --output assets/models/bima_model.tflite
+
+Batch mode (parallel, skips unchanged models; copy models.example.json and
+point its `input` paths at your `.keras` exports first):
+    python tools/convert_keras_model/convert.py \
+        --manifest tools/convert_keras_model/models.json
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import multiprocessing
+import os
+import shutil
+import sys
 import tempfile
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
 from importlib import util as importlib_util
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 import tensorflow as tf
 
+from calibration import CalibrationData, accuracy_drift, load_calibration_data, predict_tflite
+from tflite_bench import benchmark_isolated
+from validate import choose_variant, print_report, validate
+
+HASH_CHUNK_SIZE = 1 << 20
+
 
 class LegacyInputLayer(tf.keras.layers.InputLayer):
     """Backcompat layer that tolerates `batch_shape` configs."""
@@ -46,27 +65,89 @@ def parse_args() -> argparse.Namespace:
         "--input",
         "-i",
         type=Path,
-        required=True,
+        default=None,
         help="Path to the source `.keras` file or SavedModel directory.",
     )
     parser.add_argument(
         "--output",
         "-o",
         type=Path,
-        required=True,
+        default=None,
         help="Destination path for the generated `.tflite` file.",
     )
     parser.add_argument(
         "--optimize",
-        choices=["default", "size", "latency", "none"],
+        choices=["default", "size", "latency", "dynamic", "float16", "int8", "none"],
         default="default",
-        help="Optional optimization strategy to apply during conversion.",
+        help=(
+            "Optimization strategy: dynamic-range weights (default/latency/dynamic), "
+            "float16 weights, full int8 (needs --representative-dataset), or none. "
+            "`size` is int8 when a representative dataset is given, dynamic otherwise."
+        ),
     )
     parser.add_argument(
         "--representative-dataset",
         type=Path,
         default=None,
-        help="Optional path to a Python module exposing `representative_dataset()`.",
+        help=(
+            "Python module exposing `representative_dataset()`, or an `.npz` dataset "
+            "(`X`, `y`, optional `labels`) to calibrate from and check accuracy drift on."
+        ),
+    )
+    parser.add_argument(
+        "--scaler",
+        type=Path,
+        default=None,
+        help="Scaler `.json`/`.npz` ({mean, std}) applied to an `.npz` dataset, as the app does.",
+    )
+    parser.add_argument(
+        "--labels",
+        type=Path,
+        default=None,
+        help="Label list of the model; `.npz` targets are remapped to its order.",
+    )
+    parser.add_argument(
+        "--calibration-samples",
+        type=int,
+        default=300,
+        help="Samples drawn (evenly per label) from an `.npz` dataset for calibration.",
+    )
+    parser.add_argument(
+        "--holdout-fraction",
+        type=float,
+        default=0.2,
+        help="Share of each label kept out of calibration for the accuracy-drift check.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for the held-out split and calibration sampling.",
+    )
+    parser.add_argument(
+        "--max-accuracy-drop",
+        type=float,
+        default=None,
+        help="Fail (and delete the output) if held-out accuracy drops more than this, e.g. 0.02.",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Compare TFLite outputs with Keras, list Flex ops and profile latency after conversion.",
+    )
+    parser.add_argument(
+        "--validation-report",
+        type=Path,
+        default=None,
+        help="Write the validation report as JSON (implies --validate).",
+    )
+    parser.add_argument(
+        "--auto-legacy-ops",
+        action="store_true",
+        help=(
+            "Convert with and without --legacy-ops, validate both and keep the one that "
+            "avoids Flex ops (or is faster) while matching Keras outputs."
+        ),
     )
     parser.add_argument(
         "--safe-mode",
@@ -81,10 +162,51 @@ def parse_args() -> argparse.Namespace:
             "tflite_flutter 0.11.0 / TFLite 2.11)."
         ),
     )
-    return parser.parse_args()
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help="JSON manifest listing models to convert (replaces --input/--output).",
+    )
+    batch.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=0,
+        help="Parallel conversion processes (default: half the CPUs, at most one per model).",
+    )
+    batch.add_argument(
+        "--force",
+        action="store_true",
+        help="Reconvert every model even if its inputs are unchanged.",
+    )
+    batch.add_argument(
+        "--state",
+        type=Path,
+        default=None,
+        help="Content-hash state file (default: <manifest>.state.json next to the manifest).",
+    )
+    batch.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="Write the batch results (status, timings, benchmarks) as JSON.",
+    )
+    parser.add_argument(
+        "--benchmark-runs",
+        type=int,
+        default=50,
+        help="Timed TFLite invocations per converted model (0 disables benchmarking).",
+    )
+    args = parser.parse_args()
+    if args.manifest is None and (args.input is None or args.output is None):
+        parser.error("--input and --output are required unless --manifest is given.")
+    return args
 
 
 def load_representative_dataset(module_path: Optional[Path]):
+    """`representative_dataset()` from a user module (see `calibration.py` for `.npz` data)."""
     if module_path is None:
         return None
 
@@ -107,6 +229,24 @@ def load_representative_dataset(module_path: Optional[Path]):
     return module.representative_dataset
 
 
+def _patch_config(config) -> bool:
+    """Rewrite legacy InputLayer/dtype entries in place; return True if anything changed."""
+    changed = False
+    if isinstance(config, dict):
+        if "batch_shape" in config and "batch_input_shape" not in config:
+            config["batch_input_shape"] = config.pop("batch_shape")
+            changed = True
+        if "dtype" in config:
+            config.pop("dtype")
+            changed = True
+        for value in list(config.values()):
+            changed = _patch_config(value) or changed
+    elif isinstance(config, list):
+        for item in config:
+            changed = _patch_config(item) or changed
+    return changed
+
+
 def load_model(input_path: Path, safe_mode: bool) -> tf.keras.Model:
     if input_path.is_dir():
         return tf.keras.models.load_model(
@@ -118,49 +258,37 @@ def load_model(input_path: Path, safe_mode: bool) -> tf.keras.Model:
     if input_path.suffix != ".keras":
         raise ValueError("Only `.keras` archives or SavedModel directories are supported.")
 
-    def _patch_config(config: dict):
-        if isinstance(config, dict):
-            if "batch_shape" in config and "batch_input_shape" not in config:
-                config["batch_input_shape"] = config.pop("batch_shape")
-            if "dtype" in config:
-                config.pop("dtype")
-            for value in list(config.values()):
-                _patch_config(value)
-        elif isinstance(config, list):
-            for item in config:
-                _patch_config(item)
-
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        tmp_path = Path(tmp_dir)
-        with zipfile.ZipFile(input_path, "r") as archive:
-            archive.extractall(tmp_path)
-
-        config_path = tmp_path / "config.json"
-        if config_path.exists():
-            config_data = json.loads(config_path.read_text())
-            _patch_config(config_data)
-            config_path.write_text(json.dumps(config_data, indent=2))
-
-        patched_path = tmp_path / "patched.keras"
-        with zipfile.ZipFile(patched_path, "w") as archive:
-            for file in tmp_path.rglob("*"):
-                if file == patched_path:
-                    continue
-                archive.write(file, file.relative_to(tmp_path))
+    with zipfile.ZipFile(input_path, "r") as archive:
+        config_data = None
+        if "config.json" in archive.namelist():
+            config_data = json.loads(archive.read("config.json"))
 
+    if config_data is None or not _patch_config(config_data):
+        # Nothing to patch: load the original archive as-is.
         return tf.keras.models.load_model(
-            str(patched_path),
+            str(input_path),
             compile=False,
             safe_mode=safe_mode,
             custom_objects=CUSTOM_OBJECTS,
         )
 
+    # Rebuild the model from the patched config, then load the weights from the
+    # archive itself: Keras reads the `model.weights.h5` entry inside the zip, so
+    # nothing is extracted or re-zipped.
+    model = tf.keras.saving.deserialize_keras_object(
+        config_data,
+        custom_objects=CUSTOM_OBJECTS,
+        safe_mode=safe_mode,
+    )
+    model.load_weights(str(input_path))
+    return model
+
 
 def convert_with_converter(
     converter: tf.lite.TFLiteConverter,
     output_path: Path,
     optimize: str,
-    representative_dataset: Optional[Path],
+    representative_dataset: Optional[Callable],
     legacy_ops: bool,
 ) -> None:
     converter.experimental_enable_resource_variables = True
@@ -179,8 +307,14 @@ def convert_with_converter(
     if optimize != "none":
         converter.optimizations = [tf.lite.Optimize.DEFAULT]
 
-    if optimize == "size" and representative_dataset:
-        converter.representative_dataset = load_representative_dataset(representative_dataset)
+    if optimize == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+
+    if optimize == "int8" and representative_dataset is None:
+        raise ValueError("--optimize int8 needs --representative-dataset (module or `.npz`).")
+
+    if optimize in ("size", "int8") and representative_dataset:
+        converter.representative_dataset = representative_dataset
         converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
         converter.inference_input_type = tf.int8
         converter.inference_output_type = tf.int8
@@ -197,28 +331,346 @@ def convert_model(
     representative_dataset: Optional[Path] = None,
     safe_mode: bool = False,
     legacy_ops: bool = False,
-) -> None:
+    scaler: Optional[Path] = None,
+    labels: Optional[Path] = None,
+    calibration_samples: int = 300,
+    holdout_fraction: float = 0.2,
+    seed: int = 0,
+    max_accuracy_drop: Optional[float] = None,
+    validate_output: bool = False,
+    auto_legacy_ops: bool = False,
+) -> dict:
+    """Convert one model; returns drift/validation reports for the checks that ran."""
     model = load_model(input_path, safe_mode=safe_mode)
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    convert_with_converter(
-        converter,
-        output_path,
-        optimize,
-        representative_dataset,
-        legacy_ops,
+    calibration = None
+    if representative_dataset is not None and representative_dataset.suffix == ".npz":
+        calibration = load_calibration_data(representative_dataset, scaler, labels, holdout_fraction, seed)
+        dataset_fn = calibration.representative_dataset(calibration_samples, seed)
+    else:
+        dataset_fn = load_representative_dataset(representative_dataset)
+    validation_inputs = calibration.holdout[0] if calibration is not None else None
+
+    report: dict = {}
+    if auto_legacy_ops:
+        report["legacy_ops"] = choose_legacy_ops(model, output_path, optimize, dataset_fn, validation_inputs)
+        report["validation"] = report["legacy_ops"]["variants"][report["legacy_ops"]["choice"]]
+    else:
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        convert_with_converter(
+            converter,
+            output_path,
+            optimize,
+            dataset_fn,
+            legacy_ops,
+        )
+        if validate_output:
+            report["validation"] = validate(
+                output_path, model, inputs=validation_inputs, interpreter_class=tf.lite.Interpreter
+            )
+    if "validation" in report:
+        print_report(report["validation"])
+
+    if calibration is None or optimize == "none":
+        return report
+
+    drift = evaluate_drift(model, output_path, calibration)
+    report["drift"] = drift
+    print(
+        f"Held-out accuracy {drift['float_accuracy']:.4f} (float) -> {drift['quantized_accuracy']:.4f} "
+        f"({optimize}), top-1 agreement {drift['top1_agreement']:.4f} on {drift['samples']} samples"
+    )
+    if max_accuracy_drop is not None and drift["accuracy_drop"] > max_accuracy_drop:
+        output_path.unlink(missing_ok=True)
+        raise RuntimeError(
+            f"Accuracy dropped by {drift['accuracy_drop']:.4f} (limit {max_accuracy_drop}); "
+            f"{output_path} was removed."
+        )
+    return report
+
+
+def choose_legacy_ops(
+    model: tf.keras.Model,
+    output_path: Path,
+    optimize: str,
+    dataset_fn: Optional[Callable],
+    inputs,
+) -> dict:
+    """Convert with select and legacy ops, validate both and keep the measured winner."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    variants: dict[str, dict] = {}
+    paths: dict[str, Path] = {}
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as tmp_dir:
+        for name, legacy in (("select", False), ("legacy", True)):
+            paths[name] = Path(tmp_dir) / f"{name}.tflite"
+            try:
+                convert_with_converter(
+                    tf.lite.TFLiteConverter.from_keras_model(model),
+                    paths[name],
+                    optimize,
+                    dataset_fn,
+                    legacy,
+                )
+            except Exception as exc:  # legacy lowering can fail for some layers
+                variants[name] = {"error": f"{type(exc).__name__}: {exc}"}
+                continue
+            variants[name] = validate(paths[name], model, inputs=inputs, interpreter_class=tf.lite.Interpreter)
+
+        decision = choose_variant(variants)
+        if decision["choice"] is None:
+            raise RuntimeError(f"No usable conversion: {json.dumps(variants)[:500]}")
+        shutil.move(str(paths[decision["choice"]]), output_path)
+    variants[decision["choice"]]["model"] = str(output_path)
+    print(f"Ops: kept `{decision['choice']}` ({decision['reason']})")
+    return {**decision, "variants": variants}
+
+
+def evaluate_drift(model: tf.keras.Model, tflite_path: Path, calibration: CalibrationData) -> dict:
+    """Float Keras model vs converted model on the held-out split."""
+    features, targets = calibration.holdout
+    reference = model.predict(features, batch_size=256, verbose=0)
+    # tf.lite.Interpreter (not tflite_runtime) so models with Flex ops can be evaluated.
+    candidate = predict_tflite(tflite_path, features, interpreter_class=tf.lite.Interpreter)
+    return accuracy_drift(reference, candidate, targets, calibration.labels)
+
+
+@dataclass
+class ModelJob:
+    """One manifest entry: a model plus the conversion options used for it."""
+
+    name: str
+    input: Path
+    output: Path
+    optimize: str = "default"
+    representative_dataset: Optional[Path] = None
+    safe_mode: bool = False
+    legacy_ops: bool = False
+    scaler: Optional[Path] = None
+    labels: Optional[Path] = None
+    calibration_samples: int = 300
+    holdout_fraction: float = 0.2
+    seed: int = 0
+    max_accuracy_drop: Optional[float] = None
+    validate: bool = False
+    auto_legacy_ops: bool = False
+
+    def options(self) -> dict:
+        options = asdict(self)
+        for key in ("name", "input", "output"):
+            options.pop(key)
+        return {key: str(value) if isinstance(value, Path) else value for key, value in options.items()}
+
+
+def _optional_path(entry: dict, key: str) -> Optional[Path]:
+    return Path(entry[key]) if entry.get(key) else None
+
+
+def load_manifest(manifest_path: Path) -> list[ModelJob]:
+    """Read `{"defaults": {...}, "models": [{"name", "input", "output", ...}]}`.
+
+    Paths are relative to the current directory, like the single-model flags.
+    """
+    data = json.loads(manifest_path.read_text())
+    defaults = data.get("defaults", {})
+    jobs = []
+    for entry in data.get("models", []):
+        merged = {**defaults, **entry}
+        input_path = Path(merged["input"])
+        max_drop = merged.get("max_accuracy_drop")
+        jobs.append(
+            ModelJob(
+                name=merged.get("name") or input_path.stem,
+                input=input_path,
+                output=Path(merged["output"]),
+                optimize=merged.get("optimize", "default"),
+                representative_dataset=_optional_path(merged, "representative_dataset"),
+                safe_mode=bool(merged.get("safe_mode", False)),
+                legacy_ops=bool(merged.get("legacy_ops", False)),
+                scaler=_optional_path(merged, "scaler"),
+                labels=_optional_path(merged, "labels"),
+                calibration_samples=int(merged.get("calibration_samples", 300)),
+                holdout_fraction=float(merged.get("holdout_fraction", 0.2)),
+                seed=int(merged.get("seed", 0)),
+                max_accuracy_drop=None if max_drop is None else float(max_drop),
+                validate=bool(merged.get("validate", False)),
+                auto_legacy_ops=bool(merged.get("auto_legacy_ops", False)),
+            )
+        )
+    names = [job.name for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate model names in manifest: {', '.join(duplicates)}")
+    return jobs
+
+
+def _hash_file(digest, path: Path) -> None:
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+def job_hash(job: ModelJob) -> str:
+    """SHA-256 over the model files, calibration inputs, options and TF version."""
+    digest = hashlib.sha256()
+    if job.input.is_dir():
+        files = [(p.relative_to(job.input).as_posix(), p) for p in sorted(job.input.rglob("*")) if p.is_file()]
+    else:
+        files = [(job.input.name, job.input)]
+    for key in ("representative_dataset", "scaler", "labels"):
+        path = getattr(job, key)
+        if path is not None:
+            files.append((f"<{key}>", path))
+    for label, path in files:
+        digest.update(label.encode())
+        _hash_file(digest, path)
+    digest.update(json.dumps(job.options(), sort_keys=True).encode())
+    digest.update(tf.__version__.encode())
+    return digest.hexdigest()
+
+
+def run_job(job: ModelJob, benchmark_runs: int) -> dict:
+    """Convert one model (inside a worker process) and benchmark the result."""
+    started = time.perf_counter()
+    checks = convert_model(
+        input_path=job.input,
+        output_path=job.output,
+        optimize=job.optimize,
+        representative_dataset=job.representative_dataset,
+        safe_mode=job.safe_mode,
+        legacy_ops=job.legacy_ops,
+        scaler=job.scaler,
+        labels=job.labels,
+        calibration_samples=job.calibration_samples,
+        holdout_fraction=job.holdout_fraction,
+        seed=job.seed,
+        max_accuracy_drop=job.max_accuracy_drop,
+        validate_output=job.validate,
+        auto_legacy_ops=job.auto_legacy_ops,
     )
+    result = {
+        "name": job.name,
+        "status": "converted",
+        "output": str(job.output),
+        "convert_seconds": round(time.perf_counter() - started, 2),
+        **checks,
+    }
+    if benchmark_runs > 0:
+        # Separate process: peak memory must not include this worker's TensorFlow.
+        result["benchmark"] = benchmark_isolated(job.output, runs=benchmark_runs)
+    return result
+
+
+def _load_state(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text())
+    return {}
+
+
+def run_manifest(args: argparse.Namespace) -> int:
+    jobs = load_manifest(args.manifest)
+    state_path = args.state or args.manifest.with_name(f"{args.manifest.stem}.state.json")
+    state = _load_state(state_path)
+
+    results: list[dict] = []
+    pending: list[tuple[ModelJob, str]] = []
+    for job in jobs:
+        if not job.input.exists():
+            results.append({"name": job.name, "status": "failed", "error": f"Input not found: {job.input}"})
+            continue
+        digest = job_hash(job)
+        previous = state.get(job.name, {})
+        if not args.force and previous.get("hash") == digest and job.output.exists():
+            results.append({**previous.get("result", {}), "name": job.name, "status": "skipped"})
+            print(f"[skip] {job.name}: inputs unchanged")
+            continue
+        pending.append((job, digest))
+
+    workers = args.jobs or max(1, (os.cpu_count() or 2) // 2)
+    workers = max(1, min(workers, len(pending) or 1))
+    if pending:
+        # spawn: TensorFlow is not fork-safe once initialised.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(run_job, job, args.benchmark_runs): (job, digest)
+                for job, digest in pending
+            }
+            for future in as_completed(futures):
+                job, digest = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:  # keep converting the other models
+                    result = {"name": job.name, "status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+                    print(f"[fail] {job.name}: {result['error']}")
+                else:
+                    state[job.name] = {"hash": digest, "result": result}
+                    latency = result.get("benchmark", {}).get("latency", {})
+                    print(f"[done] {job.name} in {result['convert_seconds']}s -> {job.output}"
+                          + (f" (p50 {latency['p50_ms']} ms)" if latency else ""))
+                results.append(result)
+        state_path.write_text(json.dumps(state, indent=2))
+
+    order = {job.name: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda item: order.get(item["name"], len(order)))
+    print_batch_summary(results)
+    if args.report is not None:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps({"tensorflow": tf.__version__, "models": results}, indent=2))
+        print(f"Report saved to {args.report}")
+    return 1 if any(item["status"] == "failed" for item in results) else 0
+
+
+def print_batch_summary(results: list[dict]) -> None:
+    print(f"\n{'model':<28}{'status':<11}{'size KB':>9}{'p50 ms':>9}{'p95 ms':>9}{'peak MB':>9}")
+    for item in results:
+        bench = item.get("benchmark", {})
+        latency = bench.get("latency", {})
+        size = bench.get("size_bytes")
+        print(
+            f"{item['name']:<28}{item['status']:<11}"
+            f"{(f'{size / 1024:.1f}' if size else '-'):>9}"
+            f"{latency.get('p50_ms', '-'):>9}{latency.get('p95_ms', '-'):>9}"
+            f"{bench.get('peak_rss_mb', '-'):>9}"
+        )
+        if bench.get("error"):
+            print(f"    benchmark: {bench['error'][:120]}")
+        ops = item.get("validation", {}).get("ops", {})
+        if ops.get("flex_ops"):
+            print(f"    Flex ops: {', '.join(ops['flex_ops'])}")
+        if item.get("legacy_ops"):
+            print(f"    ops variant: {item['legacy_ops']['choice']} ({item['legacy_ops']['reason']})")
+        drift = item.get("drift")
+        if drift:
+            print(
+                f"    held-out accuracy {drift['float_accuracy']} -> {drift['quantized_accuracy']}"
+                f" (drop {drift['accuracy_drop']}, agreement {drift['top1_agreement']})"
+            )
 
 
 def main() -> None:
     args = parse_args()
-    convert_model(
+    if args.manifest is not None:
+        sys.exit(run_manifest(args))
+
+    report = convert_model(
         input_path=args.input,
         output_path=args.output,
         optimize=args.optimize,
         representative_dataset=args.representative_dataset,
         safe_mode=args.safe_mode,
         legacy_ops=args.legacy_ops,
+        scaler=args.scaler,
+        labels=args.labels,
+        calibration_samples=args.calibration_samples,
+        holdout_fraction=args.holdout_fraction,
+        seed=args.seed,
+        max_accuracy_drop=args.max_accuracy_drop,
+        validate_output=args.validate or args.validation_report is not None,
+        auto_legacy_ops=args.auto_legacy_ops,
     )
+    if args.validation_report is not None and "validation" in report:
+        args.validation_report.parent.mkdir(parents=True, exist_ok=True)
+        args.validation_report.write_text(json.dumps(report, indent=2))
+        print(f"Validation report saved to {args.validation_report}")
     print(f"Converted model saved to {args.output}")
 
 
@@ -0,0 +1,309 @@
+"""Score `.tflite` models against a labelled `.npz` dataset in bulk.
+
+Each worker process opens the dataset arrays once (memory-mapped when the
+`.npz` members are stored uncompressed, e.g. written with `np.savez`), builds
+one interpreter with its input resized to `--batch-size`, and scores contiguous
+sample ranges. Startup is excluded from the reported throughput.
+
+A bundle directory holds the files the app ships together:
+`sibi_compact_mlp.tflite`, `compact_scaler.json`, `sibi_compact_labels.json`
+and `compact_sequence_dataset.npz`. Pass `--bundle` more than once to compare.
+
+Usage (run from repository root):
+    python tools/convert_keras_model/evaluate.py \\
+        --bundle assets/currently_use --bundle assets/currently_used_old \\
+        --workers 2 --report build/compact_eval.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from calibration import BatchPredictor, load_label_names, load_scaler
+
+BUNDLE_FILES = {
+    "model": "sibi_compact_mlp.tflite",
+    "scaler": "compact_scaler.json",
+    "labels": "sibi_compact_labels.json",
+    "dataset": "compact_sequence_dataset.npz",
+}
+DEFAULT_BATCH_SIZE = 512
+CHUNKS_PER_WORKER = 4
+
+
+@dataclass
+class EvalJob:
+    """One model scored against one dataset."""
+
+    name: str
+    model: Path
+    dataset: Path
+    scaler: Optional[Path] = None
+    labels: Optional[Path] = None
+
+
+def open_npz_array(path: Path, key: str) -> tuple[np.ndarray, bool]:
+    """`(array, memory_mapped)` for one `.npz` member.
+
+    Stored (uncompressed) members are mapped read-only straight out of the
+    archive; deflated members and object arrays are loaded into memory.
+    """
+    member = f"{key}.npy"
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(member)
+        if info.compress_type == zipfile.ZIP_STORED:
+            with archive.open(member) as stream:
+                version = np.lib.format.read_magic(stream)
+                if version == (1, 0):
+                    shape, fortran, dtype = np.lib.format.read_array_header_1_0(stream)
+                else:
+                    shape, fortran, dtype = np.lib.format.read_array_header_2_0(stream)
+                header_size = stream.tell()
+            if not dtype.hasobject:
+                with open(path, "rb") as raw:
+                    # Local file header: 30 fixed bytes + file name + extra field.
+                    raw.seek(info.header_offset + 26)
+                    name_length, extra_length = np.frombuffer(raw.read(4), dtype="<u2")
+                offset = info.header_offset + 30 + int(name_length) + int(extra_length) + header_size
+                array = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                                  order="F" if fortran else "C")
+                return array, True
+    with np.load(path, allow_pickle=True) as data:
+        return np.asarray(data[key]), False
+
+
+def label_remap(dataset_labels: Optional[list[str]], model_labels: list[str]) -> np.ndarray:
+    """Dataset target index -> model label index (-1 when the model lacks that label)."""
+    if dataset_labels is None:
+        return np.arange(len(model_labels), dtype=np.int64)
+    position = {name: index for index, name in enumerate(model_labels)}
+    return np.array([position.get(name, -1) for name in dataset_labels], dtype=np.int64)
+
+
+# Per-process state, filled once by `_init_worker`.
+_worker: dict = {}
+
+
+def _init_worker(job: EvalJob, batch_size: int, num_threads: int) -> None:
+    features, mapped = open_npz_array(job.dataset, "X")
+    mean = std = None
+    if job.scaler is not None:
+        mean, std = load_scaler(job.scaler)
+        if mean.shape[-1] != features.shape[-1]:
+            raise ValueError(f"Scaler has {mean.shape[-1]} features but {job.dataset} has {features.shape[-1]}.")
+    _worker.update(
+        features=features,
+        mapped=mapped,
+        mean=mean,
+        std=std,
+        predictor=BatchPredictor(job.model, features.shape[1:], batch_size, num_threads),
+    )
+
+
+def _ping() -> bool:
+    return _worker["mapped"]
+
+
+def _predict_range(start: int, stop: int) -> np.ndarray:
+    """Predicted class per sample in `[start, stop)`, scaled one batch-sized slice at a time."""
+    features = _worker["features"]
+    predictor = _worker["predictor"]
+    predictions = []
+    for begin in range(start, stop, predictor.batch_size):
+        chunk = np.asarray(features[begin : min(begin + predictor.batch_size, stop)], dtype=np.float32)
+        if _worker["mean"] is not None:
+            chunk = (chunk - _worker["mean"]) / _worker["std"]
+        predictions.append(predictor.predict(chunk).argmax(axis=1))
+    return np.concatenate(predictions) if predictions else np.empty(0, dtype=np.int64)
+
+
+def _ranges(total: int, count: int, batch_size: int) -> list[tuple[int, int]]:
+    """Contiguous ranges of whole batches, about `count` of them."""
+    batches = -(-total // batch_size)
+    per_range = max(1, -(-batches // max(count, 1))) * batch_size
+    return [(start, min(start + per_range, total)) for start in range(0, total, per_range)]
+
+
+def confusion_report(predicted: np.ndarray, targets: np.ndarray, labels: list[str]) -> dict:
+    """Accuracy, per-label precision/recall and the confusion matrix (rows = true label)."""
+    size = len(labels)
+    matrix = np.bincount(targets * size + predicted, minlength=size * size).reshape(size, size)
+    support = matrix.sum(axis=1)
+    predicted_count = matrix.sum(axis=0)
+    hits = np.diag(matrix)
+    per_label = []
+    for index, name in enumerate(labels):
+        if not support[index] and not predicted_count[index]:
+            continue
+        per_label.append({
+            "label": name,
+            "support": int(support[index]),
+            "recall": round(float(hits[index] / support[index]), 4) if support[index] else None,
+            "precision": round(float(hits[index] / predicted_count[index]), 4) if predicted_count[index] else None,
+        })
+    return {
+        "samples": int(len(targets)),
+        "accuracy": round(float(hits.sum() / max(len(targets), 1)), 4),
+        "per_label": per_label,
+        "confusion_matrix": {"labels": labels, "rows": matrix.tolist()},
+    }
+
+
+def evaluate(job: EvalJob, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1, num_threads: int = 1) -> dict:
+    """Score one job; `workers=0` runs in this process."""
+    targets, _ = open_npz_array(job.dataset, "y")
+    targets = np.asarray(targets, dtype=np.int64)
+    try:
+        raw_labels, _ = open_npz_array(job.dataset, "labels")
+        dataset_labels = [str(value) for value in raw_labels]
+    except KeyError:
+        dataset_labels = None
+    if job.labels is not None:
+        labels = load_label_names(job.labels)
+    else:
+        labels = dataset_labels or [f"Class {i + 1}" for i in range(int(targets.max()) + 1)]
+
+    remap = label_remap(dataset_labels, labels)
+    mapped_targets = remap[targets]
+    known = mapped_targets >= 0
+    total = len(targets)
+
+    if workers <= 0:
+        _init_worker(job, batch_size, num_threads)
+        mapped = _worker["mapped"]
+        started = time.perf_counter()
+        predicted = _predict_range(0, total)
+        elapsed = time.perf_counter() - started
+    else:
+        context = get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(job, batch_size, num_threads),
+        ) as pool:
+            # Start every worker (dataset + interpreter) before the clock starts.
+            mapped = all(future.result() for future in [pool.submit(_ping) for _ in range(workers)])
+            ranges = _ranges(total, workers * CHUNKS_PER_WORKER, batch_size)
+            started = time.perf_counter()
+            predicted = np.concatenate(list(pool.map(_predict_range, *zip(*ranges))))
+            elapsed = time.perf_counter() - started
+
+    if len(predicted) and int(predicted.max()) >= len(labels):
+        raise ValueError(f"{job.model} predicts {int(predicted.max()) + 1}+ classes but only {len(labels)} labels are known.")
+
+    report = {
+        "name": job.name,
+        "model": str(job.model),
+        "dataset": str(job.dataset),
+        "scaler": str(job.scaler) if job.scaler else None,
+        "memory_mapped": mapped,
+        "batch_size": batch_size,
+        "workers": workers,
+        "wall_seconds": round(elapsed, 4),
+        "samples_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+        "skipped_unknown_labels": sorted({dataset_labels[t] for t in np.unique(targets[~known])}) if dataset_labels else [],
+    }
+    report.update(confusion_report(predicted[known], mapped_targets[known], labels))
+    return report
+
+
+def print_summary(reports: list[dict]) -> None:
+    print(f"{'name':<28} {'samples':>7} {'accuracy':>8} {'samples/s':>11} {'mmap':>5}")
+    for report in reports:
+        print(
+            f"{report['name']:<28} {report['samples']:>7} {report['accuracy']:>8.4f} "
+            f"{report['samples_per_second']:>11,.0f} {'yes' if report['memory_mapped'] else 'no':>5}"
+        )
+        if report["skipped_unknown_labels"]:
+            print(f"  skipped samples of labels unknown to the model: {', '.join(report['skipped_unknown_labels'])}")
+        weakest = sorted(
+            (entry for entry in report["per_label"] if entry["recall"] is not None), key=lambda entry: entry["recall"]
+        )[:3]
+        if weakest:
+            print("  lowest recall: " + ", ".join(f"{entry['label']} {entry['recall']:.2f}" for entry in weakest))
+
+
+def _bundle_file(bundle: Path, key: str, override: Optional[Path]) -> Optional[Path]:
+    """Explicit CLI path wins over the bundle's own file (with a note); missing files are None."""
+    path = bundle / BUNDLE_FILES[key]
+    if override is not None:
+        if path.exists():
+            print(f"{bundle.name}: using --{key} {override} instead of {path}")
+        return override
+    return path if path.exists() else None
+
+
+def jobs_from_args(args: argparse.Namespace) -> list[EvalJob]:
+    jobs = []
+    for bundle in args.bundle or []:
+        model = bundle / BUNDLE_FILES["model"]
+        if not model.exists():
+            raise SystemExit(f"{bundle} has no {BUNDLE_FILES['model']}")
+        dataset = _bundle_file(bundle, "dataset", args.dataset)
+        if dataset is None:
+            raise SystemExit(f"{bundle} has no {BUNDLE_FILES['dataset']} (pass --dataset)")
+        jobs.append(
+            EvalJob(
+                name=bundle.name,
+                model=model,
+                dataset=dataset,
+                scaler=None if args.no_scaler else _bundle_file(bundle, "scaler", args.scaler),
+                labels=_bundle_file(bundle, "labels", args.labels),
+            )
+        )
+    for model in args.model or []:
+        if args.dataset is None:
+            raise SystemExit("--model needs --dataset")
+        jobs.append(
+            EvalJob(
+                name=model.stem,
+                model=model,
+                dataset=args.dataset,
+                scaler=None if args.no_scaler else args.scaler,
+                labels=args.labels,
+            )
+        )
+    if not jobs:
+        raise SystemExit("Pass at least one --bundle or --model.")
+    return jobs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk-evaluate TensorFlow Lite classifiers on a labelled `.npz` dataset.")
+    parser.add_argument("--bundle", type=Path, action="append", help="Directory with model, scaler, labels and dataset (repeatable).")
+    parser.add_argument("--model", type=Path, action="append", help="`.tflite` file to score against --dataset (repeatable).")
+    parser.add_argument("--dataset", type=Path, default=None, help="`.npz` with `X`, `y` and optional `labels` (overrides the bundle's).")
+    parser.add_argument("--scaler", type=Path, default=None, help="Scaler `.json`/`.npz` applied to `X` (overrides the bundle's).")
+    parser.add_argument("--no-scaler", action="store_true", help="Feed `X` unscaled, even when the bundle has a scaler.")
+    parser.add_argument("--labels", type=Path, default=None, help="Label list the model was trained with (overrides the bundle's).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Samples per invoke.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (0 = in this process).")
+    parser.add_argument("--threads", type=int, default=1, help="Interpreter threads per worker.")
+    parser.add_argument("--report", type=Path, default=None, help="Write all reports as JSON.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    reports = [evaluate(job, args.batch_size, args.workers, args.threads) for job in jobs_from_args(args)]
+    print_summary(reports)
+    if args.report is not None:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(reports, indent=2))
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
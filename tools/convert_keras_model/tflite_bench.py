@@ -0,0 +1,175 @@
+"""Benchmark a `.tflite` model with the TFLite interpreter.
+
+Runs in a fresh process when called through `benchmark_isolated()` so that the
+reported peak memory is not polluted by TensorFlow being loaded for conversion.
+
+Usage (run from repository root):
+    python tools/convert_keras_model/tflite_bench.py assets/models/sibi_compact_mlp.tflite
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def load_interpreter_class():
+    """`tflite_runtime` when installed (lighter), otherwise `tf.lite.Interpreter`."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def random_input(detail: dict, rng: np.random.Generator) -> np.ndarray:
+    """Random tensor matching an allocated input's actual shape (after any batch resize)."""
+    shape = [int(v) for v in detail["shape"]]
+    dtype = np.dtype(detail["dtype"])
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return rng.integers(info.min, info.max, size=shape, endpoint=True, dtype=dtype)
+    return rng.standard_normal(shape).astype(dtype)
+
+
+def make_interpreter(model_path: Path, num_threads: int, batch_size: int, interpreter_class=None):
+    """Allocated interpreter, with the batch dimension resized when the model allows it."""
+    Interpreter = interpreter_class or load_interpreter_class()
+    interpreter = Interpreter(model_path=str(model_path), num_threads=num_threads)
+    for detail in interpreter.get_input_details():
+        signature = detail.get("shape_signature", detail["shape"])
+        if len(signature) and int(signature[0]) == -1 and batch_size != int(detail["shape"][0]):
+            interpreter.resize_tensor_input(detail["index"], [batch_size] + [int(v) for v in detail["shape"][1:]])
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def input_batch_size(interpreter) -> int:
+    """Batch the interpreter actually runs; fixed-batch models ignore the requested size."""
+    return int(interpreter.get_input_details()[0]["shape"][0])
+
+
+def time_invokes(interpreter, runs: int, warmup: int, seed: int = 0) -> np.ndarray:
+    """Per-invoke latency in milliseconds on fixed random inputs."""
+    rng = np.random.default_rng(seed)
+    for detail in interpreter.get_input_details():
+        interpreter.set_tensor(detail["index"], random_input(detail, rng))
+    for _ in range(warmup):
+        interpreter.invoke()
+    timings = np.empty(runs, dtype=np.float64)
+    for i in range(runs):
+        started = time.perf_counter()
+        interpreter.invoke()
+        timings[i] = (time.perf_counter() - started) * 1000.0
+    return timings
+
+
+def latency_summary(timings: np.ndarray) -> dict:
+    return {
+        "mean_ms": round(float(timings.mean()), 4),
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+        "min_ms": round(float(timings.min()), 4),
+    }
+
+
+def benchmark(
+    model_path: Path,
+    runs: int = 50,
+    warmup: int = 5,
+    num_threads: int = 1,
+    batch_size: int = 1,
+) -> dict:
+    """Size, latency and peak memory of one model; errors are reported, not raised."""
+    model_path = Path(model_path)
+    report = {
+        "model": str(model_path),
+        "size_bytes": model_path.stat().st_size,
+        "num_threads": num_threads,
+        "batch_size": batch_size,
+    }
+    baseline = peak_rss_mb()
+    try:
+        interpreter = make_interpreter(model_path, num_threads, batch_size)
+        actual = input_batch_size(interpreter)
+        if actual != batch_size:
+            report["batch_size"] = actual
+            report["requested_batch_size"] = batch_size
+        report["latency"] = latency_summary(time_invokes(interpreter, runs, warmup))
+    except Exception as exc:  # e.g. Flex ops under tflite_runtime
+        report["error"] = f"{type(exc).__name__}: {exc}"
+    peak = peak_rss_mb()
+    if peak is not None:
+        report["peak_rss_mb"] = round(peak, 1)
+        report["peak_rss_delta_mb"] = round(peak - baseline, 1)
+    return report
+
+
+def benchmark_isolated(model_path: Path, runs: int = 50, num_threads: int = 1, batch_size: int = 1) -> dict:
+    """Run `benchmark()` in a fresh interpreter process and return its report."""
+    command = [
+        sys.executable,
+        str(Path(__file__).resolve()),
+        str(model_path),
+        "--runs",
+        str(runs),
+        "--threads",
+        str(num_threads),
+        "--batch-size",
+        str(batch_size),
+        "--json",
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, check=False)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        return {
+            "model": str(model_path),
+            "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "benchmark failed",
+        }
+    return json.loads(lines[-1])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark a TensorFlow Lite model.")
+    parser.add_argument("model", type=Path, help="Path to the `.tflite` file.")
+    parser.add_argument("--runs", type=int, default=50, help="Timed invocations.")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed warmup invocations.")
+    parser.add_argument("--threads", type=int, default=1, help="Interpreter thread count.")
+    parser.add_argument("--batch-size", type=int, default=1, help="Batch size for dynamic-batch models.")
+    parser.add_argument("--json", action="store_true", help="Print the report as a single JSON line.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    report = benchmark(args.model, args.runs, args.warmup, args.threads, args.batch_size)
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
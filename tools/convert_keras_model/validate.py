@@ -0,0 +1,236 @@
+"""Validate a converted `.tflite` model against its Keras source and profile it.
+
+The report covers:
+- ops used by the model, including Flex (SELECT_TF_OPS) ops that need the Flex delegate;
+- per-invoke latency across thread counts and batch sizes;
+- with the Keras model, max/mean output deltas and top-1 agreement on identical batches.
+
+Without `--keras` only NumPy and a TFLite interpreter are needed.
+
+Usage (run from repository root):
+    python tools/convert_keras_model/validate.py assets/models/sibi_compact_mlp.tflite \\
+        --threads 1 2 4 --batch-sizes 1 8 --report build/sibi_compact_mlp.validation.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from calibration import predict_tflite
+from tflite_bench import input_batch_size, latency_summary, load_interpreter_class, make_interpreter, time_invokes
+
+DEFAULT_THREADS = (1, 2, 4)
+DEFAULT_BATCH_SIZES = (1, 8)
+FLEX_PREFIX = "Flex"
+MIN_TOP1_AGREEMENT = 0.99
+
+
+def list_ops(model_path: Path, interpreter_class=None) -> dict:
+    """Op histogram of the model; Flex ops are listed separately."""
+    Interpreter = interpreter_class or load_interpreter_class()
+    try:
+        # Works before allocate_tensors(), so Flex models can be inspected with tflite_runtime.
+        details = Interpreter(model_path=str(model_path))._get_ops_details()  # pylint: disable=protected-access
+    except Exception as exc:
+        return {"error": f"{type(exc).__name__}: {exc}"}
+    counts = Counter(detail["op_name"] for detail in details)
+    flex_ops = sorted(name for name in counts if name.startswith(FLEX_PREFIX))
+    return {
+        "op_count": len(details),
+        "ops": dict(sorted(counts.items())),
+        "flex_ops": flex_ops,
+        "needs_flex_delegate": bool(flex_ops),
+    }
+
+
+def profile_latency(
+    model_path: Path,
+    threads: Sequence[int] = DEFAULT_THREADS,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    runs: int = 50,
+    warmup: int = 5,
+    interpreter_class=None,
+) -> list[dict]:
+    """Latency per (threads, batch size); per-sample time makes batch sizes comparable.
+
+    Fixed-batch models run at their own batch size; a requested size they cannot
+    take is timed once at the actual size instead of repeating the same entry.
+    """
+    grid = []
+    timed = set()
+    for batch_size in batch_sizes:
+        for num_threads in threads:
+            entry = {"threads": num_threads, "batch_size": batch_size}
+            try:
+                interpreter = make_interpreter(model_path, num_threads, batch_size, interpreter_class)
+                actual = input_batch_size(interpreter)
+                if actual != batch_size:
+                    if (num_threads, actual) in timed:
+                        continue
+                    entry.update(batch_size=actual, requested_batch_size=batch_size)
+                timings = time_invokes(interpreter, runs, warmup)
+            except Exception as exc:  # e.g. Flex ops under tflite_runtime
+                entry["error"] = f"{type(exc).__name__}: {exc}"
+            else:
+                timed.add((num_threads, entry["batch_size"]))
+                entry.update(latency_summary(timings))
+                entry["per_sample_p50_ms"] = round(entry["p50_ms"] / entry["batch_size"], 4)
+            grid.append(entry)
+    return grid
+
+
+def fastest(grid: list[dict]) -> Optional[dict]:
+    """Setting with the lowest per-sample p50 latency."""
+    timed = [entry for entry in grid if "error" not in entry]
+    return min(timed, key=lambda entry: entry["per_sample_p50_ms"]) if timed else None
+
+
+def random_inputs(model_path: Path, samples: int, seed: int = 0, interpreter_class=None) -> np.ndarray:
+    """Float inputs shaped like the model's first input (standard normal)."""
+    Interpreter = interpreter_class or load_interpreter_class()
+    detail = Interpreter(model_path=str(model_path)).get_input_details()[0]
+    signature = detail.get("shape_signature", detail["shape"])
+    sample_shape = [int(v) if int(v) > 0 else 1 for v in signature[1:]]
+    return np.random.default_rng(seed).standard_normal([samples, *sample_shape]).astype(np.float32)
+
+
+def compare_outputs(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Output deltas and top-1 agreement between two models on the same inputs."""
+    delta = np.abs(reference.astype(np.float32) - candidate.astype(np.float32))
+    report = {
+        "samples": int(len(reference)),
+        "max_abs_delta": round(float(delta.max()), 6),
+        "mean_abs_delta": round(float(delta.mean()), 6),
+    }
+    if reference.ndim >= 2 and reference.shape[-1] > 1:
+        agreement = reference.argmax(axis=-1) == candidate.argmax(axis=-1)
+        report["top1_agreement"] = round(float(agreement.mean()), 4)
+    return report
+
+
+def validate(
+    model_path: Path,
+    keras_model=None,
+    inputs: Optional[np.ndarray] = None,
+    samples: int = 64,
+    threads: Sequence[int] = DEFAULT_THREADS,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    runs: int = 50,
+    interpreter_class=None,
+) -> dict:
+    """Full validation report for one `.tflite` file.
+
+    `interpreter_class` should be `tf.lite.Interpreter` when TensorFlow is loaded,
+    so Flex models can be run; otherwise `tflite_runtime` is preferred.
+    """
+    model_path = Path(model_path)
+    report = {
+        "model": str(model_path),
+        "size_bytes": model_path.stat().st_size,
+        "ops": list_ops(model_path, interpreter_class),
+        "latency": profile_latency(model_path, threads, batch_sizes, runs, interpreter_class=interpreter_class),
+    }
+    report["fastest"] = fastest(report["latency"])
+    if keras_model is not None:
+        if inputs is None:
+            inputs = random_inputs(model_path, samples, interpreter_class=interpreter_class)
+        try:
+            candidate = predict_tflite(model_path, inputs, interpreter_class=interpreter_class)
+        except Exception as exc:
+            report["outputs"] = {"error": f"{type(exc).__name__}: {exc}"}
+        else:
+            reference = np.asarray(keras_model.predict(inputs, batch_size=256, verbose=0))
+            report["outputs"] = compare_outputs(reference, candidate)
+    return report
+
+
+def choose_variant(reports: dict[str, dict], min_agreement: float = MIN_TOP1_AGREEMENT) -> dict:
+    """Pick between validated conversions (e.g. select vs legacy ops) from measurements.
+
+    A variant qualifies when it runs and agrees with Keras on at least `min_agreement`
+    of top-1 predictions. Variants without Flex ops win (no Flex delegate to bundle);
+    otherwise the lowest single-sample p50 latency wins.
+    """
+    qualified = []
+    for name, report in reports.items():
+        if "error" in report:
+            continue
+        single = [e for e in report["latency"] if "error" not in e and e["batch_size"] == 1]
+        outputs = report.get("outputs", {})
+        if not single or "error" in outputs or outputs.get("top1_agreement", 1.0) < min_agreement:
+            continue
+        p50 = min(entry["p50_ms"] for entry in single)
+        qualified.append((report["ops"].get("needs_flex_delegate", True), p50, name))
+    if not qualified:
+        return {"choice": None, "reason": "no variant ran with matching outputs"}
+    needs_flex, p50, name = min(qualified)
+    reason = "runs without the Flex delegate" if not needs_flex else "lowest latency; every variant needs Flex"
+    return {"choice": name, "reason": f"{reason} (p50 {p50} ms)", "qualified": sorted(q[2] for q in qualified)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Validate and profile a TensorFlow Lite model.")
+    parser.add_argument("model", type=Path, help="Path to the `.tflite` file.")
+    parser.add_argument("--keras", type=Path, default=None, help="Source `.keras` model to compare outputs against (needs TensorFlow).")
+    parser.add_argument("--samples", type=int, default=64, help="Random samples used for the output comparison.")
+    parser.add_argument("--threads", type=int, nargs="+", default=list(DEFAULT_THREADS), help="Thread counts to profile.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES), help="Batch sizes to profile.")
+    parser.add_argument("--runs", type=int, default=50, help="Timed invocations per setting.")
+    parser.add_argument("--report", type=Path, default=None, help="Write the report as JSON.")
+    return parser.parse_args()
+
+
+def print_report(report: dict) -> None:
+    ops = report["ops"]
+    print(f"{report['model']} ({report['size_bytes'] / 1024:.1f} KB)")
+    if "error" in ops:
+        print(f"  ops: {ops['error']}")
+    else:
+        flex = ", ".join(ops["flex_ops"]) or "none"
+        print(f"  ops: {ops['op_count']} ({len(ops['ops'])} kinds), Flex ops: {flex}")
+    for entry in report["latency"]:
+        setting = f"  threads={entry['threads']:<2} batch={entry['batch_size']:<3}"
+        if "error" in entry:
+            print(f"{setting} error: {entry['error'][:100]}")
+        else:
+            print(f"{setting} p50 {entry['p50_ms']} ms  p95 {entry['p95_ms']} ms  per sample {entry['per_sample_p50_ms']} ms")
+    outputs = report.get("outputs")
+    if outputs:
+        print(f"  outputs vs Keras: {json.dumps(outputs)}")
+
+
+def main() -> None:
+    args = parse_args()
+    keras_model = None
+    interpreter_class = None
+    if args.keras is not None:
+        import tensorflow as tf
+
+        from convert import load_model
+
+        keras_model = load_model(args.keras, safe_mode=False)
+        interpreter_class = tf.lite.Interpreter
+    report = validate(
+        args.model,
+        keras_model,
+        samples=args.samples,
+        threads=args.threads,
+        batch_sizes=args.batch_sizes,
+        runs=args.runs,
+        interpreter_class=interpreter_class,
+    )
+    print_report(report)
+    if args.report is not None:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(report, indent=2))
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()